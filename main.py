@@ -20,6 +20,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 Main entry point for DBC Utility
 """
 
+import multiprocessing
 import sys
 import os
 
@@ -48,4 +49,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # Log decoding starts worker processes (see parallel_decode); needed in a frozen executable
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -29,7 +29,7 @@ Features:
     1. User can view and edit the DBC file.
     2. Helps Search signals for ease of access
     3. Able to edit both Messages and Signals.
-    4. TODO: Add ability to view CAN dumps ?
+    4. Decodes CAN logs (candump, Vector ASC/BLF) and live buses (python-can) with the loaded DBC.
 
 """
 
@@ -91,7 +91,9 @@ except ImportError:
     show_import_error('cantools')
 
 from search_module import UnifiedSearchWidget
-from dbc_editor_ui import DBCEditorWidget
+from dbc_editor import DBCEditor, DBCEditorError
+from dbc_editor_ui import DBCEditorWidget, offer_journal_recovery
+from can_bus_viewer import CANBusViewerWidget
 from home_screen import HomeScreenWidget, RecentFilesManager
 
 def get_version():
@@ -144,93 +146,39 @@ class DBCProcessor:
     """
     Handles the logic for loading DBC files and extracting data.
     Separated from the UI for better modularity.
+
+    The message data is the model of a DBCEditor, which is shared with the Edit
+    tab, so edits are visible here without reloading and the file is held in
+    memory once. Messages and signals use the editor's keys ('name',
+    'start_bit', 'length', 'choices', 'initial', ...).
     """
-    def __init__(self):
-        self.db = None
-        self._extracted_data = []
-        # Metadata about the currently loaded DBC (kept separate from message list)
-        self.dbc_info = None
+    def __init__(self, dbc_editor=None):
+        self.dbc_editor = dbc_editor if dbc_editor is not None else DBCEditor()
+
+    @property
+    def db(self):
+        return self.dbc_editor.db
+
+    @property
+    def dbc_info(self):
+        """Metadata about the currently loaded DBC (kept separate from message list)."""
+        if not self.dbc_editor.get_data():
+            return None
+        return self.dbc_editor.get_file_info()
 
     def load_dbc_file(self, dbc_path):
-        """Loads a DBC file and populates _extracted_data."""
+        """Loads a DBC file into the shared model and returns its messages."""
         if not dbc_path:
             raise ValueError("No DBC file path provided.")
         try:
-            self.db = cantools.database.load_file(dbc_path)
-        except Exception as e:
+            self.dbc_editor.load_dbc_file(dbc_path)
+        except DBCEditorError as e:
             raise RuntimeError(f"Failed to load DBC file: {e}")
-        self._extracted_data = []
-
-        self.dbc_info = {
-            "dbc_file_path": dbc_path,
-            "dbc_node_count": len(self.db.nodes),
-            "dbc_message_count": len(self.db.messages),
-            "dbc_signal_count": sum(len(msg.signals) for msg in self.db.messages),
-            "dbc_file_size": os.path.getsize(dbc_path),
-            "dbc_version": self.db.version,
-            "dbc_buses": self.db.buses,
-        }
-        
-        for msg in self.db.messages:
-            # Signal groups come from 'SIG_GROUP_ ...;' lines in the DBC.
-            # In cantools (>=40.x), they are exposed as 'Message.signal_groups'
-            signal_groups = []
-            for group in (getattr(msg, "signal_groups", None) or []):
-                group_name = getattr(group, "name", None)
-                group_signal_names = getattr(group, "signal_names", None) or []
-
-                if group_name and group_signal_names:
-                    signal_groups.append((group_name, list(group_signal_names)))
-
-            # Build a reverse index for quick membership lookups while preserving group order.
-            # signal_name -> [group_name1, group_name2, ...]
-            signal_to_groups = {}
-            for group_name, group_signals in signal_groups:
-                for sig_name in group_signals:
-                    signal_to_groups.setdefault(sig_name, []).append(group_name)
-            
-            message_info = {
-                "message_name": msg.name,
-                "senders": [str(s) for s in msg.senders],
-                "frame_id": msg.frame_id,
-                "length": msg.length,  # Message length in bytes
-                "signal_groups": signal_groups,  # List of (group_name, [signal_names]) tuples
-                "signals": []
-            }
-            for sig in msg.signals:
-                raw_comments = str(sig.comments).strip('\0').replace('\n', ' ') if sig.comments else ""
-                cleaned_comments = _clean_comment_text(raw_comments)
-                # Extract value table/enum if available
-                values_dict = {}
-                if hasattr(sig, 'choices') and sig.choices:
-                    values_dict = {int(k): str(v) for k, v in sig.choices.items()}
-                
-                # Find which signal groups this signal belongs to (if any)
-                signal_groups_membership = signal_to_groups.get(sig.name, [])
-                
-                signal_info = {
-                    "signal_name": sig.name,
-                    "byte_order": getattr(sig, 'byte_order', 'little_endian'),
-                    "is_signed": sig.is_signed,
-                    "scale": getattr(sig, 'scale', 1.0),
-                    "offset": getattr(sig, 'offset', 0.0),
-                    "minimum": sig.minimum,
-                    "maximum": sig.maximum,
-                    "start bit|length": f"{sig.start}|{sig.length}",
-                    "unit": getattr(sig, 'unit', '') or '',
-                    "initial_value": getattr(sig, 'initial', None),
-                    "values": values_dict if values_dict else None,  # Enum/choice table
-                    "receivers": [str(r) for r in sig.receivers],
-                    "signal_groups": signal_groups_membership,  # List[str] of group names this signal belongs to
-                    "comments": cleaned_comments,
-                    "item_text": f"{msg.name}.{sig.name}"
-                }
-                message_info["signals"].append(signal_info)
-            self._extracted_data.append(message_info)
-        return list(self._extracted_data)
+        return self.get_extracted_data()
 
     def get_extracted_data(self):
-        return list(self._extracted_data)
+        data = self.dbc_editor.get_data()
+        return list(data.get('messages', [])) if data else []
 
 
 
@@ -240,11 +188,21 @@ class ConverterWindow(QtWidgets.QWidget):
     """
     dbcFileLoaded = QtCore.pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    # Edits arrive in bursts (one notification per operation); redraw once they settle
+    REFRESH_DELAY_MS = 150
+
+    def __init__(self, parent=None, dbc_editor=None):
         super().__init__(parent)
-        self.dbc_processor = DBCProcessor()
+        self.dbc_processor = DBCProcessor(dbc_editor)
         self._full_data = []
+        self._loading = False
+        self._refresh_pending = False
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self._refresh_from_model)
         self._setup_ui()
+        self.dbc_processor.dbc_editor.add_change_listener(self._on_model_changed)
 
     def _setup_ui(self):
         main_h_layout = QtWidgets.QHBoxLayout()
@@ -409,7 +367,6 @@ class ConverterWindow(QtWidgets.QWidget):
         self.details_text_edit.clear()
         self.details_title_label.setText("Item Details")
         self.search_widget.clear_search()
-        self.dbc_processor._extracted_data = []
         self._full_data = []
         # Clear file info panel
         self.info_node_count.setText("Nodes: —")
@@ -423,9 +380,27 @@ class ConverterWindow(QtWidgets.QWidget):
         if not hasattr(self, 'dbc_path') or not self.dbc_path:
             self._show_error("Please select a DBC file first.")
             return
+        editor = self.dbc_processor.dbc_editor
+        if editor.has_changes():
+            reply = QtWidgets.QMessageBox.question(
+                self, "Unsaved Changes",
+                "The Edit tab has unsaved changes to the current DBC file.\n"
+                "Discard them and load the selected file?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, QtWidgets.QMessageBox.No
+            )
+            if reply != QtWidgets.QMessageBox.Yes:
+                return
         try:
             self.message_label.setText("Loading DBC file and extracting data...")
-            self._full_data = self.dbc_processor.load_dbc_file(self.dbc_path)
+            self._loading = True
+            try:
+                self.dbc_processor.load_dbc_file(self.dbc_path)
+                offer_journal_recovery(self, editor)
+                self._full_data = self.dbc_processor.get_extracted_data()
+            finally:
+                self._loading = False
+            self._refresh_timer.stop()
+            self._refresh_pending = False
             self._apply_filter_to_tree()
             self._update_file_info()
             self.message_label.setText("DBC file loaded successfully")
@@ -435,6 +410,36 @@ class ConverterWindow(QtWidgets.QWidget):
         except Exception as e:
             self._show_error(f"Error loading DBC file: {e}")
     
+    def _on_model_changed(self, event):
+        """Editor model listener: schedule a refresh unless this tab is loading the file itself."""
+        if not self._loading:
+            self._refresh_timer.start()
+
+    def _refresh_from_model(self):
+        """Redraw the tree and file info from the shared model, keeping the current search."""
+        if not self.isVisible():
+            # Redrawn when the tab is shown again
+            self._refresh_pending = True
+            return
+        self._refresh_pending = False
+        editor = self.dbc_processor.dbc_editor
+        if editor.file_path != getattr(self, 'dbc_path', None):
+            self.dbc_path = editor.file_path
+            self.dbc_file_name_label.setText(os.path.basename(editor.file_path) if editor.file_path else "No file selected")
+            self.dbc_file_name_label.setToolTip(editor.file_path or "")
+            self.details_text_edit.clear()
+            self.details_title_label.setText("Item Details")
+        self._full_data = self.dbc_processor.get_extracted_data()
+        self._apply_filter_to_tree(self.search_widget.get_search_query(), self.search_widget.get_filter_type())
+        self._update_file_info()
+        if editor.has_changes():
+            self.message_label.setText("Showing unsaved changes from the Edit tab")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._refresh_pending:
+            self._refresh_from_model()
+
     def _format_file_size(self, size_bytes):
         """Format file size in human-readable format."""
         if size_bytes < 1024:
@@ -477,7 +482,7 @@ class ConverterWindow(QtWidgets.QWidget):
                     message_matches = False
                     signals_matching = []
                     if filter_type == "all" or filter_type == "message":
-                        if search_query_lower in msg_data["message_name"].lower():
+                        if search_query_lower in msg_data["name"].lower():
                             message_matches = True
                     if filter_type == "all" or filter_type == "frame_id":
                         if search_query_lower in str(hex(msg_data["frame_id"])).lower() or \
@@ -486,9 +491,9 @@ class ConverterWindow(QtWidgets.QWidget):
                     for sig_data in msg_data["signals"]:
                         signal_level_match = False
                         if filter_type == "all" or filter_type == "signal":
-                            if (search_query_lower in sig_data["signal_name"].lower() or
-                                search_query_lower in sig_data["comments"].lower() or
-                                search_query_lower in ",".join(sig_data["receivers"]).lower() or
+                            if (search_query_lower in sig_data["name"].lower() or
+                                search_query_lower in _clean_comment_text(sig_data.get("comments")).lower() or
+                                search_query_lower in ",".join(sig_data.get("receivers") or []).lower() or
                                 search_query_lower in str(sig_data.get("minimum", "")).lower() or
                                 search_query_lower in str(sig_data.get("maximum", "")).lower()):
                                 signal_level_match = True
@@ -523,16 +528,17 @@ class ConverterWindow(QtWidgets.QWidget):
         item.setText(2, type_name)
         return item
 
-    def _add_signal_to_tree(self, parent_item, sig_data):
+    def _add_signal_to_tree(self, parent_item, sig_data, memberships=None):
         """
         Helper method to add a signal item with all its properties to the tree.
         
         Args:
             parent_item: QTreeWidgetItem to add the signal under
             sig_data: Dictionary containing signal information
+            memberships: Names of the signal groups the signal belongs to
         """
         sig_item = QtWidgets.QTreeWidgetItem(parent_item)
-        sig_item.setText(0, sig_data["signal_name"])
+        sig_item.setText(0, sig_data["name"])
         sig_item.setText(2, "Signal")
         sig_item.setData(0, QtCore.Qt.UserRole, sig_data)
 
@@ -557,9 +563,8 @@ class ConverterWindow(QtWidgets.QWidget):
 
         # Basic Properties
         basic_group = self._tree_add_group(sig_item, "Basic Properties")
-        start_bit_length = sig_data.get("start bit|length")
-        if start_bit_length:
-            self._tree_add_row(basic_group, "Start Bit|Length", start_bit_length, "str")
+        if sig_data.get("start_bit") is not None:
+            self._tree_add_row(basic_group, "Start Bit|Length", f"{sig_data['start_bit']}|{sig_data.get('length')}", "str")
         byte_order = sig_data.get("byte_order", "little_endian")
         byte_order_display = f"{byte_order} (Intel)" if byte_order == "little_endian" else f"{byte_order} (Motorola)"
         self._tree_add_row(basic_group, "Byte Order", byte_order_display, "str")
@@ -583,12 +588,12 @@ class ConverterWindow(QtWidgets.QWidget):
                 self._tree_add_row(range_group, "Maximum", maximum, "float")
 
         # Initial Value
-        initial_value = sig_data.get("initial_value")
+        initial_value = sig_data.get("initial")
         if initial_value is not None:
             self._tree_add_row(sig_item, "Initial Value", initial_value, type(initial_value).__name__)
 
         # Value Table (Enums)
-        values = sig_data.get("values")
+        values = sig_data.get("choices")
         if values:
             values_group = self._tree_add_group(sig_item, "Value Table (Enums)")
             for enum_val, enum_name in sorted(values.items()):
@@ -601,7 +606,7 @@ class ConverterWindow(QtWidgets.QWidget):
             self._tree_add_row(sig_item, "Receivers", ", ".join(receivers), "List")
 
         # Signal Groups
-        memberships = sig_data.get("signal_groups") or []
+        memberships = memberships or []
         if memberships:
             self._tree_add_row(sig_item, "Signal Groups", ", ".join(memberships), "List")
 
@@ -627,7 +632,7 @@ class ConverterWindow(QtWidgets.QWidget):
 
         for msg_data in data:
             msg_item = QtWidgets.QTreeWidgetItem(self.tree_widget)
-            msg_item.setText(0, msg_data["message_name"])
+            msg_item.setText(0, msg_data["name"])
 
             frame_id = msg_data["frame_id"]
             frame_type = "Extended" if frame_id > 0x7FF else "Standard"
@@ -648,11 +653,16 @@ class ConverterWindow(QtWidgets.QWidget):
 
             # Signals grouped by name for fast lookup
             signals = msg_data.get("signals") or []
-            signals_by_name = {sig["signal_name"]: sig for sig in signals}
+            signals_by_name = {sig["name"]: sig for sig in signals}
             signals_added_to_groups = set()
 
             # Signal Groups -> Signals
             signal_groups = msg_data.get("signal_groups") or []
+            # signal_name -> [group_name1, group_name2, ...] in group order
+            signal_to_groups = {}
+            for group_name, group_signal_names in signal_groups:
+                for sig_name in group_signal_names:
+                    signal_to_groups.setdefault(sig_name, []).append(group_name)
             if signal_groups:
                 signal_groups_item = self._tree_add_group(msg_item, "Signal Groups", "Collection")
                 for group_name, group_signal_names in signal_groups:
@@ -667,10 +677,10 @@ class ConverterWindow(QtWidgets.QWidget):
                         sig_data = signals_by_name.get(sig_name)
                         if sig_data:
                             signals_added_to_groups.add(sig_name)
-                            self._add_signal_to_tree(group_item, sig_data)
+                            self._add_signal_to_tree(group_item, sig_data, signal_to_groups.get(sig_name))
 
             # Ungrouped signals (or all signals if no groups)
-            ungrouped = [sig for sig in signals if sig["signal_name"] not in signals_added_to_groups]
+            ungrouped = [sig for sig in signals if sig["name"] not in signals_added_to_groups]
             if ungrouped:
                 title = "Ungrouped Signals" if signal_groups else "Signals"
                 root = self._tree_add_group(msg_item, title, "Collection")
@@ -685,39 +695,39 @@ class ConverterWindow(QtWidgets.QWidget):
             details_html = []
             # Set the title label appropriately
             if item_data:
-                if "message_name" in item_data:
-                    self.details_title_label.setText(f"Message: {item_data['message_name']}")
+                if "signals" in item_data:
+                    self.details_title_label.setText(f"Message: {item_data['name']}")
                     details_html.append("<div style='background-color:#f7fafc; border-radius:8px; padding:18px 18px 10px 18px; margin-bottom:10px; border:1px solid #e0e0e0;'>")
                     details_html.append(f"<div style='margin-bottom:8px;'><b>Frame ID:</b> <span style='color:#E67E22;'>{hex(item_data['frame_id'])}</span></div>")
                     details_html.append(f"<div style='margin-bottom:8px;'><b>Senders:</b> <span style='color:#2980B9;'>{', '.join(item_data['senders'])}</span></div>")
                     if item_data.get('comments'):
-                        details_html.append(f"<div style='margin-bottom:8px;'><b>Comments:</b> <span style='color:#888;'>{item_data['comments']}</span></div>")
+                        details_html.append(f"<div style='margin-bottom:8px;'><b>Comments:</b> <span style='color:#888;'>{_clean_comment_text(item_data['comments'])}</span></div>")
                     details_html.append("</div>")
                     if item_data["signals"]:
                         details_html.append("<div style='margin-top:18px;'><span style='font-size:14pt; color:#2C3E50; font-weight:bold;'>Signals</span></div>")
                         for sig in item_data["signals"]:
                             details_html.append("<div style='background-color:#f0f4f8; border-radius:6px; padding:10px 12px; margin:10px 0 10px 0; border-left: 4px solid #3498DB;'>")
-                            details_html.append(f"<div style='font-size:12pt; color:#16A085; font-weight:bold;'>{sig['signal_name']}</div>")
+                            details_html.append(f"<div style='font-size:12pt; color:#16A085; font-weight:bold;'>{sig['name']}</div>")
                             if sig.get('comments'):
-                                details_html.append(f"<div style='margin-bottom:4px; color:#888;'><b>Comments:</b> {sig['comments']}</div>")
-                            details_html.append(f"<div><b>Receivers:</b> {', '.join(sig['receivers'])}</div>")
+                                details_html.append(f"<div style='margin-bottom:4px; color:#888;'><b>Comments:</b> {_clean_comment_text(sig['comments'])}</div>")
+                            details_html.append(f"<div><b>Receivers:</b> {', '.join(sig.get('receivers') or [])}</div>")
                             details_html.append(f"<div><b>Is Signed:</b> {sig['is_signed']}</div>")
                             details_html.append(f"<div><b>Minimum:</b> {sig['minimum']}</div>")
                             details_html.append(f"<div><b>Maximum:</b> {sig['maximum']}</div>")
                             details_html.append(f"<div><b>Maximum:</b> {sig['maximum']}</div>")
-                            details_html.append(f"<div><b>Start Bit|Length:</b> {sig['start bit|length']}</div>")
+                            details_html.append(f"<div><b>Start Bit|Length:</b> {sig['start_bit']}|{sig['length']}</div>")
                             details_html.append("</div>")
                     else:
                         details_html.append("<div style='font-style:italic; color:#7F8C8D; margin-top:10px;'>No signals for this message.</div>")
-                elif "signal_name" in item_data:
-                    self.details_title_label.setText(f"Signal: {item_data['signal_name']}")
+                elif "start_bit" in item_data:
+                    self.details_title_label.setText(f"Signal: {item_data['name']}")
                     details_html.append("<div style='background-color:#f7fafc; border-radius:8px; padding:18px 18px 10px 18px; margin-bottom:10px; border:1px solid #e0e0e0;'>")
                     for key, value in item_data.items():
                         # Format byte_order with Intel/Motorola labels
                         if key == "byte_order":
                             byte_order_display = f"{value} (Intel)" if value == "little_endian" else f"{value} (Motorola)"
                             details_html.append(f"<div style='margin-bottom:8px;'><b>{key.replace('_', ' ').title()}:</b> {byte_order_display}</div>")
-                        elif key == "values" and isinstance(value, dict):
+                        elif key == "choices" and isinstance(value, dict):
                             # Format value table with hex values in a pretty list
                             details_html.append(f"<div style='margin-bottom:12px;'><b>{key.replace('_', ' ').title()}:</b></div>")
                             details_html.append("<div style='background-color:#f0f4f8; border-radius:6px; padding:10px; margin-left:10px;'>")
@@ -725,6 +735,8 @@ class ConverterWindow(QtWidgets.QWidget):
                                 hex_val = hex(enum_val)
                                 details_html.append(f"<div style='margin-bottom:6px; padding:4px 8px; background-color:#ffffff; border-radius:4px; border-left:3px solid #3498DB;'><span style='color:#E67E22; font-weight:bold;'>{hex_val}</span> → <span style='color:#2C3E50;'>{enum_name}</span></div>")
                             details_html.append("</div>")
+                        elif key == "comments":
+                            details_html.append(f"<div style='margin-bottom:8px;'><b>Comments:</b> {_clean_comment_text(value)}</div>")
                         elif isinstance(value, list):
                             details_html.append(f"<div style='margin-bottom:8px;'><b>{key.replace('_', ' ').title()}:</b> {', '.join(map(str, value))}</div>")
                         else:
@@ -773,9 +785,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self._stack = QtWidgets.QStackedWidget()
         self.setCentralWidget(self._stack)
 
-        self.view_dbc_page = ConverterWindow(self)
-        self.edit_dbc_page = DBCEditorWidget(self)
-        self.view_can_bus_page = EmptyWidget("Coming Soon: CAN Bus Viewer.")
+        # One model shared by the View and Edit tabs
+        self.dbc_editor = DBCEditor()
+        self.view_dbc_page = ConverterWindow(self, dbc_editor=self.dbc_editor)
+        self.edit_dbc_page = DBCEditorWidget(self, dbc_editor=self.dbc_editor)
+        self.view_can_bus_page = CANBusViewerWidget(self, dbc_editor=self.dbc_editor)
 
         self.tab_widget = QtWidgets.QTabWidget()
         # Add tabs with icons
@@ -899,9 +913,16 @@ class MainWindow(QtWidgets.QMainWindow):
     def closeEvent(self, event):
         """Handle application close event to clean up backup files."""
         try:
+            # Let a background save finish writing before the application exits
+            if hasattr(self.edit_dbc_page, 'wait_for_save'):
+                self.edit_dbc_page.wait_for_save()
+            self.view_can_bus_page.wait_for_decode()
+            self.view_can_bus_page.stop_capture()
             # Clean up backup files from DBC editor
             if hasattr(self.edit_dbc_page, 'dbc_editor'):
                 self.edit_dbc_page.dbc_editor.cleanup_all_backups()
+                # The crash-recovery journal is only kept when the app does not close normally
+                self.edit_dbc_page.dbc_editor.discard_journal()
         except Exception as e:
             print(f"Error during cleanup: {e}")
         
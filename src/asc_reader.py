@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Reader for Vector ASC (ASCII) log files.
+
+After a header ("date ...", "base hex  timestamps absolute", ...) each event
+is one line starting with its timestamp:
+    0.012345 1  123             Rx   d 8 01 02 03 04 05 06 07 08  Length = ...
+    0.012400 2  18FEF100x       Tx   d 3 01 02 03
+    0.012500 1  123             Rx   r                     remote frame
+    0.012600 1  ErrorFrame                                 error frame
+    0.012700 CANFD   1 Rx        123  EngineData  1 0 d 12 01 02 ... 0 0 ...
+CAN FD lines carry the channel after "CANFD", an optional symbolic message
+name, the BRS and ESI bits, the DLC code and the number of data bytes.
+
+As with the candump reader (see TextLogReader) the file is read in chunks
+and each chunk is parsed with vectorized NumPy operations: the lines are
+split into whitespace-separated tokens once, then token k of every line is
+gathered and converted in one go. Timestamps are seconds since the start of
+the measurement; with "timestamps relative" each line holds the time since
+the previous event and the reader accumulates them. Error frames are
+skipped (and counted in `error_frames`), as are all other events (status,
+statistics, J1939 transport, comments) and transmit requests.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from can_frames import (
+    FrameBatch, TextLogReader, LineTokens, FLAG_FD, FLAG_REMOTE, FLAG_TX, FLAG_BRS,
+    CLASSIC_WIDTH, FD_WIDTH, CHUNK_SIZE, parse_seconds, parse_hex_fields, parse_hex_bytes,
+    parse_decimal_fields, find_next, field_equals, channel_indices, line_bounds,
+)
+
+# Header lines; they come before the first event, so the first chunk holds them
+_HEADER_BYTES = 64 * 1024
+_BASE_RE = re.compile(rb'^\s*base\s+(hex|dec)(?:\s+timestamps\s+(absolute|relative))?', re.I | re.M)
+_DATE_RE = re.compile(rb'^\s*date\s+\w+\s+(.+?)\s*$', re.I | re.M)
+_DATE_FORMATS = (
+    "%b %d %I:%M:%S.%f %p %Y",
+    "%b %d %I:%M:%S %p %Y",
+    "%b %d %H:%M:%S.%f %Y",
+    "%b %d %H:%M:%S %Y",
+)
+
+
+def _parse_date(text: str) -> Optional[float]:
+    """POSIX time of the header date ("Jun 10 10:15:32.123 am 2020"), None if not understood."""
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class ASCReader(TextLogReader):
+    """
+    Iterate over an ASC log as FrameBatch chunks (see TextLogReader).
+    The header sets `base` ('hex' or 'dec' ids and data bytes),
+    `relative_timestamps` and `start_time` (POSIX time of the header date,
+    None when absent).
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = CHUNK_SIZE):
+        super().__init__(file_path, chunk_size)
+        self.base = 'hex'
+        self.relative_timestamps = False
+        self.start_time: Optional[float] = None
+        self.error_frames = 0
+        self._header_read = False
+        self._clock = 0.0
+
+    def reset(self) -> None:
+        super().reset()
+        self.error_frames = 0
+        self._header_read = False
+        self._clock = 0.0
+
+    def prepare(self) -> bool:
+        """Read the header; relative timestamps chain every event to the one before, so they need one pass."""
+        super().prepare()
+        with open(self.file_path, 'rb') as f:
+            self._read_header(f.read(_HEADER_BYTES))
+        return not self.relative_timestamps
+
+    def _read_header(self, chunk: bytes) -> None:
+        head = chunk[:_HEADER_BYTES]
+        match = _BASE_RE.search(head)
+        if match:
+            self.base = match.group(1).decode('ascii').lower()
+            self.relative_timestamps = (match.group(2) or b'').lower() == b'relative'
+        match = _DATE_RE.search(head)
+        if match:
+            self.start_time = _parse_date(match.group(1).decode('latin-1'))
+        self._header_read = True
+
+    def _parse_numbers(self, buf: np.ndarray, begin: np.ndarray, end: np.ndarray,
+                       hex_width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Integer fields in the base of the log as uint64; returns (values, valid mask)."""
+        if self.base == 'hex':
+            return parse_hex_fields(buf, begin, end, hex_width)
+        values, valid = parse_decimal_fields(buf, begin, end, 10)
+        return values.astype(np.uint64), valid
+
+    def _parse_data(self, buf: np.ndarray, tokens: LineTokens, first: np.ndarray, counts: np.ndarray,
+                    width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Data bytes given by `counts` tokens from token `first` of each line;
+        returns ((n, width) uint8 payload, valid mask). Hex bytes written as
+        "01 02 03" (the usual layout) are read as fixed-stride pairs, the
+        remaining lines token by token.
+        """
+        payload = np.zeros((len(counts), width), dtype=np.uint8)
+        valid = np.ones(len(counts), dtype=bool)
+        if self.base == 'hex':
+            data_begin, _ = tokens.field(first)
+            _, data_end = tokens.field(first + counts - 1)
+            # With single spaces between 2-digit bytes the last data token ends at a fixed offset
+            strided = (counts == 0) | (data_end == data_begin + 3 * counts - 1)
+            valid &= strided
+            # Classic-length frames are read 8 bytes wide even in batches with CAN FD frames
+            short = counts <= CLASSIC_WIDTH
+            for rows, row_width in ((strided & short, CLASSIC_WIDTH), (strided & ~short, width)):
+                rows = np.flatnonzero(rows)
+                if len(rows):
+                    payload[rows, :row_width], valid[rows] = parse_hex_bytes(
+                        buf, data_begin[rows], counts[rows], row_width, separator=1)
+            rows = np.flatnonzero(~valid)
+            valid[rows] = True
+        else:
+            rows = np.arange(len(counts))
+        if len(rows):
+            counts = counts[rows]
+            line = np.repeat(np.arange(len(rows)), counts)
+            columns = np.arange(len(line)) - np.repeat(np.cumsum(counts) - counts, counts)
+            fields = tokens.select(rows[line]).field(first[rows][line] + columns)
+            values, values_valid = self._parse_numbers(buf, *fields, 2)
+            values_valid &= values < 256
+            payload[rows[line], columns] = values
+            valid[rows[line[~values_valid]]] = False
+        return payload, valid
+
+    def parse_chunk(self, chunk: bytes) -> FrameBatch:
+        """Parse complete lines (chunk ends with a newline) into a FrameBatch."""
+        if not self._header_read:
+            self._read_header(chunk)
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        begin, end = line_bounds(buf)
+        tokens = LineTokens(buf, begin, end)
+        events = tokens.count > 0
+
+        time_begin, time_end = tokens.field(0)
+        dots = find_next(np.flatnonzero(buf == ord('.')), time_begin, len(buf))
+        timestamp, has_time = parse_seconds(buf, time_begin, time_end, np.minimum(dots, time_end))
+        if self.relative_timestamps:
+            timestamp = self._clock + np.cumsum(np.where(has_time, timestamp, 0.0))
+            if len(timestamp):
+                self._clock = float(timestamp[-1])
+
+        # Classic frames: <time> <channel> <id> <dir> d|r ...
+        # CAN FD frames:  <time> CANFD <channel> <dir> <id> [name] <brs> <esi> <dlc> <length> ...
+        is_fd = field_equals(buf, *tokens.field(1), b'CANFD')
+        _, is_classic = parse_decimal_fields(buf, *tokens.field(1), 3)
+        frames = has_time & (is_fd | is_classic)
+        id_token = np.where(is_fd, 4, 2)
+        errors = frames & field_equals(buf, *tokens.field(id_token), b'ErrorFrame')
+        self.error_frames += int(errors.sum())
+        rows = np.flatnonzero(frames & ~errors)
+        self.skipped_lines += int(events.sum()) - len(rows)
+        tokens = tokens.select(rows)
+        timestamp, is_fd, id_token = timestamp[rows], is_fd[rows], id_token[rows]
+
+        direction = tokens.field(3)
+        is_tx = field_equals(buf, *direction, b'Tx')
+        valid = is_tx | field_equals(buf, *direction, b'Rx')
+        channel_begin, channel_end = tokens.field(np.where(is_fd, 2, 1))
+
+        id_begin, id_end = tokens.field(id_token)
+        is_extended = (id_end > id_begin) & ((buf[np.maximum(id_end - 1, 0)] | 0x20) == ord('x'))
+        raw_id, id_valid = self._parse_numbers(buf, id_begin, id_end - is_extended, 8)
+        valid &= id_valid
+
+        frame_type = tokens.field(4)
+        is_remote = ~is_fd & field_equals(buf, *frame_type, b'r')
+        valid &= is_fd | is_remote | field_equals(buf, *frame_type, b'd')
+        dlc_token, data_token = 5, 6
+        brs = fd_length = None
+        if is_fd.any():
+            # CAN FD: a digit after the id is the BRS bit, anything else the symbolic name
+            _, brs_first = parse_decimal_fields(buf, *tokens.field(5), 1)
+            fd_token = 5 + (~brs_first).astype(np.int64)
+            brs = is_fd & field_equals(buf, *tokens.field(fd_token), b'1')
+            fd_length, fd_length_valid = parse_decimal_fields(buf, *tokens.field(fd_token + 3), 2)
+            fd_length = fd_length.astype(np.int64)
+            valid &= ~is_fd | fd_length_valid
+            dlc_token = np.where(is_fd, fd_token + 2, 5)
+            data_token = np.where(is_fd, fd_token + 4, 6)
+
+        dlc_code, dlc_valid = self._parse_numbers(buf, *tokens.field(dlc_token), 2)
+        valid &= dlc_valid | is_remote
+        dlc_code = np.where(dlc_valid, dlc_code.astype(np.int64), 0)
+        data_bytes = np.where(is_remote, 0, np.minimum(dlc_code, CLASSIC_WIDTH))
+        if fd_length is not None:
+            # An FD line without data bytes but with a DLC is a remote frame of a classic frame
+            is_remote |= is_fd & (fd_length == 0) & (dlc_code > 0)
+            data_bytes = np.where(is_fd & ~is_remote, fd_length, data_bytes)
+        data_token = np.broadcast_to(data_token, len(rows))
+        width = FD_WIDTH if is_fd.any() else CLASSIC_WIDTH
+        valid &= (data_bytes <= width) & (data_token + data_bytes <= tokens.count)
+
+        keep = np.flatnonzero(valid)
+        payload, good = self._parse_data(buf, tokens.select(keep), data_token[keep], data_bytes[keep], width)
+        payload = payload[good]
+        keep = keep[good]
+
+        dlc = np.where(is_remote, dlc_code, data_bytes)
+        flags = np.where(is_fd, FLAG_FD, 0).astype(np.uint8)
+        if brs is not None:
+            flags |= np.where(brs, FLAG_BRS, 0).astype(np.uint8)
+        flags |= np.where(is_remote, FLAG_REMOTE, 0).astype(np.uint8)
+        flags |= np.where(is_tx, FLAG_TX, 0).astype(np.uint8)
+        channel = channel_indices(buf, channel_begin[keep], channel_end[keep], self.channels)
+
+        self.skipped_lines += len(rows) - len(keep)
+        self.frame_count += len(keep)
+        return FrameBatch(
+            timestamp[keep],
+            channel,
+            raw_id[keep].astype(np.uint32),
+            is_extended[keep],
+            flags[keep],
+            dlc[keep].astype(np.uint8),
+            payload,
+            self.channels,
+        )
+
+
+def read_asc(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[FrameBatch]:
+    """Shorthand for iterating over ASCReader(file_path, chunk_size)."""
+    return iter(ASCReader(file_path, chunk_size))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Bit layout helpers for CAN signals.
+
+A signal's footprint inside a message payload is represented as a Python int used
+as a bitmap: bit n of the mask is set when payload bit n (byte n // 8, bit n % 8,
+the numbering DBC start bits use) belongs to the signal. Python ints have no width
+limit, so the same code covers classic CAN (64 bits) and CAN FD (512 bits), and
+overlap tests between whole sets of signals are a single AND.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+
+def signal_bit_mask(start_bit: int, length: int, byte_order: str = 'little_endian',
+                    message_length: Optional[int] = None) -> Optional[int]:
+    """
+    Return the bitmap of payload bits used by a signal.
+
+    - little_endian (Intel): start_bit is the LSB and the signal grows upward.
+    - big_endian (Motorola): start_bit is the MSB and the signal grows towards the
+      next byte in "sawtooth" order (7..0, 15..8, ...).
+
+    Returns None if the signal does not fit inside message_length bytes
+    (or has a negative start bit / non-positive length).
+    """
+    if length < 1 or start_bit < 0:
+        return None
+    total_bits = message_length * 8 if message_length is not None else None
+
+    if byte_order != 'big_endian':
+        if total_bits is not None and start_bit + length > total_bits:
+            return None
+        return ((1 << length) - 1) << start_bit
+
+    mask = 0
+    pos = start_bit
+    for _ in range(length):
+        if pos < 0 or (total_bits is not None and pos >= total_bits):
+            return None
+        mask |= 1 << pos
+        # Motorola bits run from bit 0 of a byte to bit 7 of the following byte
+        pos = pos + 15 if pos % 8 == 0 else pos - 1
+    return mask
+
+
+def _iter_bits(mask: int):
+    """Yield the positions of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class MessageOccupancy:
+    """
+    Reference-counted bit occupancy of one message payload.
+
+    Signals are added/removed incrementally (O(signal length) each), so the
+    occupancy of a message can follow every editor operation without rescanning
+    its signals. Multiplexed signals are kept in one layer per multiplexer value:
+    they only collide with non-multiplexed signals and with signals sharing a
+    multiplexer value.
+    """
+
+    def __init__(self, message_length: int):
+        self.message_length = message_length
+        # layer -> (bit -> count); layer None holds the non-multiplexed signals
+        self._counts = {}
+        # layer -> bitmap of bits used in that layer
+        self._masks = {}
+
+    @staticmethod
+    def _layers(multiplexer_ids):
+        return list(multiplexer_ids) if multiplexer_ids else [None]
+
+    def add(self, mask: int, multiplexer_ids=None) -> None:
+        for layer in self._layers(multiplexer_ids):
+            counts = self._counts.setdefault(layer, {})
+            for bit in _iter_bits(mask):
+                counts[bit] = counts.get(bit, 0) + 1
+            self._masks[layer] = self._masks.get(layer, 0) | mask
+
+    def remove(self, mask: int, multiplexer_ids=None) -> None:
+        for layer in self._layers(multiplexer_ids):
+            counts = self._counts.get(layer)
+            if not counts:
+                continue
+            layer_mask = self._masks.get(layer, 0)
+            for bit in _iter_bits(mask):
+                count = counts.get(bit, 0) - 1
+                if count > 0:
+                    counts[bit] = count
+                else:
+                    counts.pop(bit, None)
+                    layer_mask &= ~(1 << bit)
+            self._masks[layer] = layer_mask
+
+    def occupied(self, multiplexer_ids=None) -> int:
+        """Bitmap of the bits a signal with the given multiplexer ids would collide with."""
+        if not multiplexer_ids:
+            mask = 0
+            for layer_mask in self._masks.values():
+                mask |= layer_mask
+            return mask
+        mask = self._masks.get(None, 0)
+        for layer in multiplexer_ids:
+            mask |= self._masks.get(layer, 0)
+        return mask
+
+    def conflicts(self) -> int:
+        """Bitmap of the bits claimed by more than one signal that can be present at the same time."""
+        static_mask = self._masks.get(None, 0)
+        mask = 0
+        for layer, counts in self._counts.items():
+            for bit, count in counts.items():
+                if count > 1:
+                    mask |= 1 << bit
+            if layer is not None:
+                mask |= self._masks.get(layer, 0) & static_mask
+        return mask
+
+    def out_of_bounds(self) -> int:
+        """Bitmap of occupied bits lying beyond the message length."""
+        return self.occupied() >> (self.message_length * 8) << (self.message_length * 8)
+
+
+def bit_sequence(byte_order: str, message_length: int) -> List[int]:
+    """
+    Return the payload bits in the order a signal of the given byte order fills them.
+    A contiguous signal always occupies consecutive entries of this sequence and
+    its start bit is the first of them (LSB for Intel, MSB for Motorola).
+    """
+    if byte_order != 'big_endian':
+        return list(range(message_length * 8))
+    return [byte * 8 + bit for byte in range(message_length) for bit in range(7, -1, -1)]
+
+
+def find_free_range(occupied: int, length: int, message_length: int,
+                    byte_order: str = 'little_endian', strategy: str = 'first_fit') -> Optional[int]:
+    """
+    Find a start bit for a signal of `length` bits that does not touch `occupied`.
+
+    strategy 'first_fit' takes the first free run that is long enough;
+    'best_fit' takes the shortest such run (earliest on ties) to keep large
+    gaps available. Returns None if no free run is long enough.
+    """
+    if length < 1:
+        return None
+    sequence = bit_sequence(byte_order, message_length)
+    best_start = None
+    best_size = None
+    run_start = None
+    # A sentinel "occupied" entry at the end closes the last run
+    for pos, bit in enumerate(sequence + [None]):
+        is_free = bit is not None and not (occupied >> bit) & 1
+        if is_free:
+            if run_start is None:
+                run_start = pos
+            continue
+        if run_start is not None:
+            size = pos - run_start
+            if size >= length:
+                if strategy != 'best_fit':
+                    return sequence[run_start]
+                if best_size is None or size < best_size:
+                    best_start, best_size = sequence[run_start], size
+            run_start = None
+    return best_start
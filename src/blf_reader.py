@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Reader for Vector BLF (binary logging format) files.
+
+A BLF file is a "LOGG" file header followed by log containers: "LOBJ"
+objects holding up to ~128 kB of zlib-compressed objects (CAN messages,
+CAN FD messages, error frames, markers, ...). Inner objects may continue
+from one container into the next.
+
+Containers are independent zlib streams, so they are decompressed on a
+thread pool (zlib releases the GIL) while the main thread reads ahead and
+parses. The decompressed data of about chunk_size bytes is parsed at once
+with NumPy: the chain of object headers is found with a vectorized search
+for the "LOBJ" signature (checked against the object sizes, so signatures
+inside payloads are ignored), then every field of the CAN objects is
+gathered as a column. Timestamps are seconds since the start of the
+measurement; `start_time` is the POSIX time of the measurement start.
+
+Object layouts follow the Vector BLF documentation as implemented by
+python-can and vector_blf.
+"""
+
+from __future__ import annotations
+
+import calendar
+import logging
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Deque, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from can_frames import (
+    FrameBatch, LogReader, LogFormatError, FLAG_FD, FLAG_REMOTE, FLAG_TX, FLAG_BRS,
+    CLASSIC_WIDTH, FD_WIDTH, CHUNK_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# signature, header size, application and format versions, file size,
+# uncompressed size, object counts, start and stop time (SYSTEMTIME)
+_FILE_HEADER = struct.Struct('<4sLBBBBBBBBQQLL8H8H')
+# signature, header size, header version, object size, object type
+_OBJECT_HEADER = struct.Struct('<4sHHLL')
+# compression method, uncompressed size (after the object header)
+_CONTAINER_HEADER = struct.Struct('<H6xL4x')
+
+LOG_CONTAINER = 10
+CAN_MESSAGE = 1
+CAN_ERROR_EXT = 73
+CAN_MESSAGE2 = 86
+CAN_FD_MESSAGE = 100
+CAN_FD_MESSAGE_64 = 101
+
+NO_COMPRESSION = 0
+ZLIB_DEFLATE = 2
+
+CAN_MSG_EXT = 0x80000000
+CAN_EFF_MASK = 0x1FFFFFFF
+# flags of CAN_MESSAGE / CAN_FD_MESSAGE
+MSG_TX = 0x01
+MSG_REMOTE = 0x80
+# fd_flags of CAN_FD_MESSAGE
+FD_EDL = 0x01
+FD_BRS = 0x02
+# flags of CAN_FD_MESSAGE_64
+FD64_REMOTE = 0x0010
+FD64_EDL = 0x1000
+FD64_BRS = 0x2000
+# object header flags: timestamp unit
+TIME_TEN_MICS = 0x01
+
+_SIGNATURE = np.frombuffer(b'LOBJ', dtype=np.uint8)
+# Inner objects are padded to 4 bytes; readers tolerate up to 8
+_MAX_PADDING = 8
+_OBJECT_HEADER_SIZE = 16
+_FD64_HEADER_SIZE = 40
+
+
+def _inflate(method: int, data: bytes) -> bytes:
+    if method == ZLIB_DEFLATE:
+        return zlib.decompress(data)
+    if method == NO_COMPRESSION:
+        return data
+    raise LogFormatError(f"Unknown BLF compression method {method}")
+
+
+def _systemtime(fields: Tuple[int, ...]) -> Optional[float]:
+    """POSIX time of a SYSTEMTIME (year, month, weekday, day, hour, minute, second, ms)."""
+    year, month, _, day, hour, minute, second, millisecond = fields
+    if not year:
+        return None
+    try:
+        return calendar.timegm((year, month, day, hour, minute, second)) + millisecond / 1000.0
+    except (ValueError, OverflowError):
+        return None
+
+
+def _read(buf: np.ndarray, offsets: np.ndarray, dtype: str) -> np.ndarray:
+    """Little-endian values of `dtype` at the given byte offsets of buf."""
+    size = np.dtype(dtype).itemsize
+    # Objects are 4-byte aligned, so most fields can be read from a typed view
+    for unit in (size, 4):
+        if unit <= size and not (offsets % unit).any():
+            words = buf[:len(buf) - len(buf) % unit].view(f'<u{unit}')[offsets // unit]
+            if unit == size:
+                return words.view(dtype)
+            high = buf[:len(buf) - len(buf) % 4].view('<u4')[offsets // 4 + 1]
+            return (words.astype(np.uint64) | (high.astype(np.uint64) << np.uint64(32))).view(dtype)
+    columns = buf[offsets[:, None] + np.arange(size)]
+    return np.ascontiguousarray(columns).view(dtype).reshape(-1)
+
+
+def _object_chain(buf: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Offsets of the complete objects in buf (which starts with an object
+    header, possibly after padding), and the offset where the unparsed rest
+    begins: an object that continues in the next container, or a header cut
+    off by the end of the data.
+    """
+    size = len(buf)
+    if size < _OBJECT_HEADER_SIZE:
+        return np.empty(0, dtype=np.int64), 0
+    candidates = np.flatnonzero(buf[:size - _OBJECT_HEADER_SIZE + 1] == _SIGNATURE[0])
+    for k in range(1, 4):
+        candidates = candidates[buf[candidates + k] == _SIGNATURE[k]]
+    if not len(candidates):
+        if size >= _OBJECT_HEADER_SIZE + _MAX_PADDING:
+            raise LogFormatError("BLF container does not start with an object header")
+        return np.empty(0, dtype=np.int64), 0
+    if candidates[0] >= _MAX_PADDING:
+        raise LogFormatError("BLF container does not start with an object header")
+    candidates = candidates.astype(np.int64)
+    ends = candidates + _read(buf, candidates + 8, '<u4').astype(np.int64)
+    # The object that follows each candidate, if a header comes right after its end
+    count = len(candidates)
+    following = np.searchsorted(candidates, ends)
+    linked = (following < count) & (candidates[np.minimum(following, count - 1)] < ends + _MAX_PADDING)
+    jump = np.where(linked, following, count)
+    if (jump == np.arange(1, count + 1)).all():
+        # Every candidate leads to the next one: no signatures inside payloads
+        chain = np.arange(count)
+    else:
+        # Objects reachable from the first one, by pointer doubling; a "LOBJ" inside
+        # a payload is never reached because the enclosing object jumps over it
+        jump = np.append(jump, count)
+        on_chain = np.zeros(count + 1, dtype=bool)
+        on_chain[0] = True
+        for _ in range(count.bit_length()):
+            on_chain[jump[on_chain]] = True
+            jump = jump[jump]
+        chain = np.flatnonzero(on_chain[:count])
+    incomplete = np.flatnonzero(ends[chain] > size)
+    if len(incomplete):
+        return candidates[chain[:incomplete[0]]], int(candidates[chain[incomplete[0]]])
+    rest = int(ends[chain[-1]])
+    if size - rest >= _OBJECT_HEADER_SIZE + _MAX_PADDING:
+        raise LogFormatError(f"BLF object chain broken at offset {rest}")
+    return candidates[chain], rest
+
+
+class BLFReader(LogReader):
+    """
+    Iterate over a BLF log as FrameBatch chunks (see LogReader); chunk_size
+    is the amount of decompressed data parsed per batch. `workers` threads
+    decompress the containers (default: one per CPU).
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = CHUNK_SIZE, workers: Optional[int] = None):
+        super().__init__(file_path, chunk_size)
+        self.workers = workers or os.cpu_count() or 1
+        self.error_frames = 0
+        with open(file_path, 'rb') as f:
+            header = f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size or header[:4] != b'LOGG':
+            raise LogFormatError(f"{os.path.basename(file_path)} is not a BLF file")
+        fields = _FILE_HEADER.unpack(header)
+        self.header_size = fields[1]
+        self.object_count = fields[12]
+        self.start_time = _systemtime(fields[14:22])
+
+    def reset(self) -> None:
+        super().reset()
+        self.error_frames = 0
+
+    def _containers(self, f) -> Iterator[Tuple[int, int, bytes]]:
+        """(compression method, uncompressed size, data) of the log containers."""
+        f.seek(self.header_size)
+        while True:
+            head = f.read(_OBJECT_HEADER.size)
+            if len(head) < _OBJECT_HEADER.size:
+                break
+            signature, _, _, object_size, object_type = _OBJECT_HEADER.unpack(head)
+            if signature != b'LOBJ':
+                raise LogFormatError(f"Missing BLF object header at offset {f.tell() - len(head)}")
+            body = f.read(object_size - _OBJECT_HEADER.size)
+            f.read(object_size % 4)
+            self.bytes_read = f.tell()
+            if object_type != LOG_CONTAINER or len(body) < _CONTAINER_HEADER.size:
+                continue
+            method, size = _CONTAINER_HEADER.unpack_from(body)
+            yield method, size, body[_CONTAINER_HEADER.size:]
+
+    def __iter__(self) -> Iterator[FrameBatch]:
+        self.reset()
+        tail = b''
+        with open(self.file_path, 'rb') as f, ThreadPoolExecutor(self.workers) as pool:
+            # Groups of ~chunk_size decompressed bytes; up to `workers` + 1 groups in flight
+            pending: Deque[List[Future]] = deque()
+            group: List[Future] = []
+            group_size = 0
+            for method, size, data in self._containers(f):
+                group.append(pool.submit(_inflate, method, data))
+                group_size += size
+                if group_size >= self.chunk_size:
+                    pending.append(group)
+                    group, group_size = [], 0
+                    if len(pending) > self.workers:
+                        batch, tail = self._parse_group(pending.popleft(), tail)
+                        if len(batch):
+                            yield batch
+            if group:
+                pending.append(group)
+            while pending:
+                batch, tail = self._parse_group(pending.popleft(), tail)
+                if len(batch):
+                    yield batch
+        if len(tail) >= _OBJECT_HEADER_SIZE + _MAX_PADDING:
+            logger.warning(f"{self.file_path}: {len(tail)} bytes of a truncated object at the end")
+        logger.info(f"Read {self.frame_count} frames from {self.file_path} "
+                    f"({self.skipped_lines} other objects skipped)")
+
+    def _parse_group(self, group: List[Future], tail: bytes) -> Tuple[FrameBatch, bytes]:
+        data = b''.join([tail] + [future.result() for future in group])
+        buf = np.frombuffer(data, dtype=np.uint8)
+        objects, rest = _object_chain(buf)
+        return self.parse_objects(buf, objects), data[rest:]
+
+    def parse_objects(self, buf: np.ndarray, objects: np.ndarray) -> FrameBatch:
+        """FrameBatch of the CAN and CAN FD message objects at the given offsets of buf."""
+        object_type = _read(buf, objects + 12, '<u4')
+        is_classic = (object_type == CAN_MESSAGE) | (object_type == CAN_MESSAGE2)
+        is_fd_object = object_type == CAN_FD_MESSAGE
+        is_fd64 = object_type == CAN_FD_MESSAGE_64
+        errors = int((object_type == CAN_ERROR_EXT).sum())
+        self.error_frames += errors
+        rows = np.flatnonzero(is_classic | is_fd_object | is_fd64)
+        self.skipped_lines += len(objects) - len(rows) - errors
+        objects, is_fd_object, is_fd64 = objects[rows], is_fd_object[rows], is_fd64[rows]
+        object_size = _read(buf, objects + 8, '<u4').astype(np.int64)
+
+        header_flags = _read(buf, objects + 16, '<u4')
+        ticks = _read(buf, objects + 24, '<u8').astype(np.float64)
+        timestamp = ticks * np.where(header_flags == TIME_TEN_MICS, 1e-5, 1e-9)
+
+        header_size = _read(buf, objects + 4, '<u2').astype(np.int64)
+        body = objects + header_size
+        channel = _read(buf, body, '<u2')
+        channel = np.where(is_fd64, channel & 0xFF, channel)
+        raw_id = _read(buf, body + 4, '<u4')
+        # CAN_MESSAGE(2) / CAN_FD_MESSAGE: channel u16, flags u8, dlc u8, id u32, ...
+        msg_flags = buf[body + 2]
+        dlc_field = buf[body + 3]
+        fd_flags = buf[np.minimum(body + 13, len(buf) - 1)]
+        valid_bytes = buf[np.minimum(body + 14, len(buf) - 1)]
+        # CAN_FD_MESSAGE_64: channel u8, dlc u8, valid bytes u8, tx count u8, id u32,
+        # frame length u32, flags u32, ..., direction u8 at 34, ext data offset u8 at 35
+        fd64_flags = _read(buf, np.where(is_fd64, body + 12, body), '<u4')
+        fd64_valid = buf[body + 2]
+        fd64_tx = buf[np.where(is_fd64, body + 34, body)] != 0
+        fd64_ext_offset = buf[np.where(is_fd64, body + 35, body)].astype(np.int64)
+
+        is_fd = np.where(is_fd64, (fd64_flags & FD64_EDL) != 0, is_fd_object & ((fd_flags & FD_EDL) != 0))
+        is_remote = np.where(is_fd64, (fd64_flags & FD64_REMOTE) != 0, (msg_flags & MSG_REMOTE) != 0)
+        is_tx = np.where(is_fd64, fd64_tx, (msg_flags & MSG_TX) != 0)
+        brs = np.where(is_fd64, (fd64_flags & FD64_BRS) != 0, is_fd_object & ((fd_flags & FD_BRS) != 0))
+
+        # Number of data bytes and where they start
+        data_offset = np.where(is_fd64, body + _FD64_HEADER_SIZE, np.where(is_fd_object, body + 20, body + 8))
+        fd64_room = np.where(fd64_ext_offset > 0, fd64_ext_offset, object_size) - header_size - _FD64_HEADER_SIZE
+        data_bytes = np.where(is_fd64, fd64_valid,
+                              np.where(is_fd_object, np.minimum(valid_bytes, FD_WIDTH),
+                                       np.minimum(dlc_field, CLASSIC_WIDTH))).astype(np.int64)
+        stored_bytes = np.where(is_fd64, np.clip(fd64_room, 0, FD_WIDTH), data_bytes)
+        data_bytes = np.minimum(data_bytes, FD_WIDTH)
+        dlc = np.where(is_remote, np.where(is_fd64, buf[body + 1], dlc_field), data_bytes)
+        data_bytes = np.where(is_remote, 0, data_bytes)
+
+        width = FD_WIDTH if (is_fd_object | is_fd64).any() else CLASSIC_WIDTH
+        if len(buf) >= width:
+            windows = np.lib.stride_tricks.sliding_window_view(buf, width)
+            payload = windows[np.minimum(data_offset, len(buf) - width)]
+            shifted = np.flatnonzero(data_offset > len(buf) - width)
+            if len(shifted):
+                index = np.minimum(data_offset[shifted, None] + np.arange(width), len(buf) - 1)
+                payload[shifted] = buf[index]
+        else:
+            payload = buf[np.minimum(data_offset[:, None] + np.arange(width), len(buf) - 1)]
+        np.copyto(payload, 0, where=np.arange(width) >= np.minimum(data_bytes, stored_bytes)[:, None])
+
+        flags = np.where(is_fd, FLAG_FD, 0).astype(np.uint8)
+        flags |= np.where(brs, FLAG_BRS, 0).astype(np.uint8)
+        flags |= np.where(is_remote, FLAG_REMOTE, 0).astype(np.uint8)
+        flags |= np.where(is_tx, FLAG_TX, 0).astype(np.uint8)
+        self.frame_count += len(objects)
+        return FrameBatch(
+            timestamp,
+            self._channel_indices(channel),
+            (raw_id & np.uint32(CAN_EFF_MASK)).astype(np.uint32),
+            (raw_id & np.uint32(CAN_MSG_EXT)) != 0,
+            flags,
+            dlc.astype(np.uint8),
+            payload,
+            self.channels,
+        )
+
+    def _channel_indices(self, channel: np.ndarray) -> np.ndarray:
+        """int16 indices into `channels` of the (1-based) BLF channel numbers."""
+        numbers, inverse = np.unique(channel, return_inverse=True)
+        lookup = np.empty(len(numbers), dtype=np.int16)
+        for i, number in enumerate(numbers.tolist()):
+            name = str(number)
+            if name not in self.channels:
+                self.channels.append(name)
+            lookup[i] = self.channels.index(name)
+        return lookup[inverse.reshape(-1)]
+
+
+def read_blf(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[FrameBatch]:
+    """Shorthand for iterating over BLFReader(file_path, chunk_size)."""
+    return iter(BLFReader(file_path, chunk_size))
@@ -0,0 +1,811 @@
+#!/usr/bin/env python3
+"""
+CAN Bus Viewer tab: opens a CAN log (candump, Vector ASC or BLF, see log_readers)
+or monitors a live bus (python-can, see can_capture) and decodes the frames
+against the DBC loaded in the View/Edit tabs.
+
+A log is read and decoded batch by batch on a LogDecodeWorker thread, so
+the GUI stays responsive and shows the progress. The worker keeps a
+LogSummary (traffic statistics per frame id, see can_statistics, and
+min/max/last per signal) instead of the decoded values, so memory stays
+bounded whatever the length of the log.
+
+Live frames are received into the FrameRing of a LiveCapture and decoded by
+a LiveDecodeWorker that drains the ring every few milliseconds. The worker
+publishes at most LIVE_REFRESH_HZ summaries per second and the tab picks up
+only the latest one on its own timer, so a fully loaded bus costs the GUI
+one table refresh per timer tick however many frames arrived.
+
+Double-clicking a signal of a decoded log reads the log once more on a
+SignalSeriesWorker, keeping only that signal, and opens its plot (see
+signal_plot) backed by a min/max pyramid.
+
+Large candump and ASC logs are parsed and decoded by a pool of worker
+processes (see parallel_decode); the decode threads then only merge the
+results in file order.
+
+A completed decode is also written to a sidecar cache next to the log (see
+decode_cache): the summary plus one memory-mapped column per signal. Opening
+the same log with the same DBC again shows the summary without reading the
+log, and plots page in only the column of the plotted signal.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import time
+from contextlib import closing
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from can_capture import CaptureError, LiveCapture, available_interfaces
+from can_decoder import DecodedBatch, FrameDecoder, MessageDecoder
+from can_frames import FrameBatch, LogReader
+from can_statistics import DEFAULT_BITRATE, FrameStatistics, split_key
+from dbc_editor import DBCEditor
+from parallel_decode import decode_parallel, parallel_workers
+from decode_cache import (CachedLog, CacheWriter, DecodeCacheError, create_writer, find_cached, log_fingerprint,
+                          model_digest)
+from log_readers import LOG_FILE_FILTER, LogFormatError, open_log_reader
+from signal_plot import SignalPlotDialog
+from signal_pyramid import MinMaxPyramid
+
+logger = logging.getLogger(__name__)
+
+# Progress bar resolution (the byte counts of large logs do not fit in an int)
+_PROGRESS_STEPS = 1000
+
+# Live view: table refreshes per second, and how often the decode thread drains the ring
+LIVE_REFRESH_HZ = 30
+_LIVE_DECODE_INTERVAL_MS = 10
+
+
+def _milliseconds(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}" if math.isfinite(seconds) else ""
+
+
+def _percent(share: float) -> str:
+    return f"{share * 100:.2f}" if math.isfinite(share) else ""
+
+
+class LogSummary:
+    """
+    Running summary of a decoded log, updated batch by batch:
+        frames   FrameStatistics: count, period, jitter, lengths, bus load per frame id
+        signals  frame id -> signal name -> [samples, min, max, last value]
+    Multiplexed signals only count the frames that carry them.
+    """
+
+    def __init__(self):
+        self.frames = FrameStatistics()
+        self.signals: Dict[int, Dict[str, List[Any]]] = {}
+
+    @property
+    def frame_count(self) -> int:
+        return self.frames.frame_count
+
+    def update(self, batch: FrameBatch, decoded: DecodedBatch) -> None:
+        if not len(batch):
+            return
+        self.frames.update(batch)
+        self._add_signals(decoded)
+
+    def add(self, frames: FrameStatistics, decoded: DecodedBatch) -> None:
+        """Like update(), for frames whose statistics were computed elsewhere (see parallel_decode)."""
+        self.frames.merge(frames)
+        self._add_signals(decoded)
+
+    def _add_signals(self, decoded: DecodedBatch) -> None:
+        for frame_id, (_, values) in decoded.items():
+            signals = self.signals.setdefault(frame_id, {})
+            for name, column in values.items():
+                column = column[~np.isnan(column)]
+                if not len(column):
+                    continue
+                low, high, last = float(column.min()), float(column.max()), float(column[-1])
+                entry = signals.get(name)
+                if entry is None:
+                    signals[name] = [len(column), low, high, last]
+                else:
+                    entry[0] += len(column)
+                    entry[1] = min(entry[1], low)
+                    entry[2] = max(entry[2], high)
+                    entry[3] = last
+
+    def snapshot(self) -> Tuple[FrameStatistics, Dict[int, Dict[str, tuple]]]:
+        """Copy of (frames, signals), safe to hand to another thread."""
+        return (self.frames.snapshot(),
+                {frame_id: {name: tuple(entry) for name, entry in signals.items()}
+                 for frame_id, signals in self.signals.items()})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-compatible copy, stored in the decode cache."""
+        return {'frames': self.frames.to_dict(),
+                'signals': {str(frame_id): signals for frame_id, signals in self.signals.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LogSummary':
+        summary = cls()
+        summary.frames = FrameStatistics.from_dict(data['frames'])
+        summary.signals = {int(frame_id): signals for frame_id, signals in data['signals'].items()}
+        return summary
+
+
+class LogDecodeWorker(QtCore.QThread):
+    """
+    Reads a log with `reader` and decodes each batch off the GUI thread.
+    With a `cache` writer the decoded columns are stored as well; the entry
+    is committed (`cached`) only when the whole log was decoded. With
+    `workers` the log is decoded by that many processes, each compiling
+    `messages` itself.
+    """
+    progress = QtCore.pyqtSignal('qint64', 'qint64')
+    summaryUpdated = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, reader: LogReader, decoder: FrameDecoder, cache: Optional[CacheWriter] = None,
+                 messages: Optional[List[Dict[str, Any]]] = None, workers: int = 0, parent=None):
+        super().__init__(parent)
+        self.reader = reader
+        self.decoder = decoder
+        self.cache = cache
+        self.messages = messages or []
+        self.workers = workers
+        self.cached: Optional[CachedLog] = None
+        self.summary = LogSummary()
+        self.elapsed = 0.0
+        # Qt clears the interruption request when the thread finishes
+        self.cancelled = False
+
+    def run(self):
+        started = time.perf_counter()
+        completed = False
+        try:
+            completed = self._decode_parallel() if self.workers else self._decode()
+        except Exception as e:
+            self.failed.emit(str(e))
+        self.elapsed = time.perf_counter() - started
+        if self.cache is not None:
+            if completed:
+                self._commit()
+            else:
+                self.cache.abort()
+
+    def _decode(self) -> bool:
+        """Read and decode on this thread; False if cancelled."""
+        for batch in self.reader:
+            decoded = self.decoder.decode_batch(batch)
+            self.summary.update(batch, decoded)
+            if not self._publish(decoded):
+                return False
+        return True
+
+    def _decode_parallel(self) -> bool:
+        """Merge the ranges decoded by the worker processes; False if cancelled."""
+        with closing(decode_parallel(self.reader, self.messages, self.workers)) as chunks:
+            for chunk in chunks:
+                self.summary.add(chunk.frames, chunk.decoded)
+                if not self._publish(chunk.decoded):
+                    return False
+        return True
+
+    def _publish(self, decoded: DecodedBatch) -> bool:
+        """Cache and report a decoded batch; False once cancellation is requested."""
+        if self.cache is not None:
+            self._store(decoded)
+        self.progress.emit(self.reader.bytes_read, self.reader.file_size)
+        self.summaryUpdated.emit(self.summary.snapshot())
+        if self.isInterruptionRequested():
+            self.cancelled = True
+            return False
+        return True
+
+    def _store(self, decoded: DecodedBatch) -> None:
+        # A full disk or similar only costs the cache, not the decode
+        try:
+            self.cache.append(decoded)
+        except (OSError, DecodeCacheError) as e:
+            logger.warning(f"Decoded log will not be cached: {e}")
+            self.cache.abort()
+            self.cache = None
+
+    def _commit(self) -> None:
+        reader = self.reader
+        try:
+            self.cached = self.cache.commit(self.summary.to_dict(), {
+                'frame_count': reader.frame_count,
+                'skipped_lines': reader.skipped_lines,
+                'error_frames': getattr(reader, 'error_frames', 0),
+                'elapsed': self.elapsed,
+            })
+        except (OSError, DecodeCacheError) as e:
+            logger.warning(f"Decoded log will not be cached: {e}")
+            self.cache.abort()
+
+
+class SignalSeriesWorker(QtCore.QThread):
+    """
+    Collects the samples of one signal into a MinMaxPyramid (`pyramid`):
+    from the memory-mapped columns of a decode cache entry when one is
+    given, else by reading and decoding the log again (with `workers`
+    processes, like LogDecodeWorker).
+    """
+    progress = QtCore.pyqtSignal('qint64', 'qint64')
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, reader: Optional[LogReader], decoder: FrameDecoder, frame_id: int, signal: str,
+                 cache: Optional[CachedLog] = None, messages: Optional[List[Dict[str, Any]]] = None,
+                 workers: int = 0, parent=None):
+        super().__init__(parent)
+        self.reader = reader
+        self.decoder = decoder
+        self.frame_id = frame_id
+        self.signal = signal
+        self.cache = cache
+        self.messages = messages or []
+        self.workers = workers
+        self.pyramid: Optional[MinMaxPyramid] = None
+        self.cancelled = False
+
+    def run(self):
+        if self.cache is not None:
+            try:
+                self.pyramid = MinMaxPyramid(self.cache.timestamps(self.frame_id),
+                                             self.cache.values(self.frame_id, self.signal))
+            except DecodeCacheError as e:
+                self.failed.emit(str(e))
+            return
+        timestamps, values = [], []
+        try:
+            with closing(self._decoded()) as batches:
+                for decoded in batches:
+                    decoded = decoded.get(self.frame_id)
+                    if decoded is not None and self.signal in decoded[1]:
+                        timestamps.append(decoded[0])
+                        values.append(decoded[1][self.signal])
+                    self.progress.emit(self.reader.bytes_read, self.reader.file_size)
+                    if self.isInterruptionRequested():
+                        self.cancelled = True
+                        return
+            self.pyramid = MinMaxPyramid(np.concatenate(timestamps) if timestamps else np.empty(0),
+                                         np.concatenate(values) if values else np.empty(0))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _decoded(self) -> Iterator[DecodedBatch]:
+        if self.workers:
+            with closing(decode_parallel(self.reader, self.messages, self.workers, [self.signal],
+                                         statistics=False)) as chunks:
+                for chunk in chunks:
+                    yield chunk.decoded
+        else:
+            for batch in self.reader:
+                yield self.decoder.decode_batch(batch, [self.signal])
+
+
+class LiveDecodeWorker(QtCore.QThread):
+    """
+    Decodes the frames of a running LiveCapture off the GUI thread. The
+    latest summary is kept for take_snapshot() instead of being signalled,
+    so updates the GUI has not picked up yet are coalesced.
+    """
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, capture: LiveCapture, decoder: FrameDecoder, parent=None):
+        super().__init__(parent)
+        self.capture = capture
+        self.decoder = decoder
+        self.summary = LogSummary()
+        self.dropped = 0
+        self._snapshot = None
+        self._lock = QtCore.QMutex()
+
+    def take_snapshot(self):
+        """Summary published since the last call, None if nothing changed."""
+        with QtCore.QMutexLocker(self._lock):
+            snapshot, self._snapshot = self._snapshot, None
+        return snapshot
+
+    def _publish(self):
+        snapshot = self.summary.snapshot()
+        with QtCore.QMutexLocker(self._lock):
+            self._snapshot = snapshot
+
+    def run(self):
+        ring = self.capture.ring
+        position = 0
+        published = 0.0
+        changed = False
+        try:
+            while not self.isInterruptionRequested():
+                self.msleep(_LIVE_DECODE_INTERVAL_MS)
+                batch, position, dropped = ring.read_since(position)
+                self.dropped += dropped
+                if len(batch):
+                    self.summary.update(batch, self.decoder.decode_batch(batch))
+                    changed = True
+                now = time.perf_counter()
+                if changed and now - published >= 1.0 / LIVE_REFRESH_HZ:
+                    self._publish()
+                    published, changed = now, False
+                if self.capture.error is not None:
+                    self.failed.emit(str(self.capture.error))
+                    break
+        except Exception as e:
+            self.failed.emit(str(e))
+        if changed:
+            self._publish()
+
+
+class CANBusViewerWidget(QtWidgets.QWidget):
+    """
+    Log viewer and live monitor tab: frames per id and signal ranges of a log
+    or a live bus, decoded with the shared DBC model.
+    """
+
+    def __init__(self, parent=None, dbc_editor: Optional[DBCEditor] = None):
+        super().__init__(parent)
+        self.dbc_editor = dbc_editor if dbc_editor is not None else DBCEditor()
+        self.log_path: Optional[str] = None
+        self._worker: Optional[LogDecodeWorker] = None
+        self._series_worker: Optional[SignalSeriesWorker] = None
+        self._capture: Optional[LiveCapture] = None
+        self._live_worker: Optional[LiveDecodeWorker] = None
+        self._live_rate = (0.0, 0)  # (time, frames) of the previous refresh, for the frame rate
+        self._live_timer = QtCore.QTimer(self)
+        self._live_timer.setInterval(1000 // LIVE_REFRESH_HZ)
+        self._live_timer.timeout.connect(self._refresh_live)
+        self._decoder: Optional[FrameDecoder] = None
+        self._messages: List[Dict[str, Any]] = []
+        self._cache: Optional[CachedLog] = None
+        self._units: Dict[int, Dict[str, str]] = {}
+        self._frames = FrameStatistics()
+        self._signals: Dict[int, Dict[str, tuple]] = {}
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+
+        file_group = QtWidgets.QGroupBox("Log File")
+        file_layout = QtWidgets.QHBoxLayout()
+        self.file_label = QtWidgets.QLabel("No log loaded")
+        self.open_button = QtWidgets.QPushButton("Open Log...")
+        self.open_button.setToolTip("Decode a candump (.log), Vector ASC (.asc) or BLF (.blf) log with the loaded DBC")
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.open_button.clicked.connect(self.select_log_file)
+        self.cancel_button.clicked.connect(self.cancel_decode)
+        file_layout.addWidget(self.file_label)
+        file_layout.addStretch()
+        file_layout.addWidget(self.open_button)
+        file_layout.addWidget(self.cancel_button)
+        file_group.setLayout(file_layout)
+        layout.addWidget(file_group)
+
+        live_group = QtWidgets.QGroupBox("Live Capture")
+        live_layout = QtWidgets.QHBoxLayout()
+        self.interface_combo = QtWidgets.QComboBox()
+        self.interface_combo.setEditable(True)
+        self.interface_combo.addItems(available_interfaces())
+        self.channel_edit = QtWidgets.QLineEdit("can0")
+        self.channel_edit.setMaximumWidth(120)
+        self.bitrate_edit = QtWidgets.QLineEdit()
+        self.bitrate_edit.setPlaceholderText("default")
+        self.bitrate_edit.setValidator(QtGui.QIntValidator(1, 16000000, self))
+        self.bitrate_edit.setMaximumWidth(100)
+        self.bitrate_edit.setToolTip("Bit rate of the bus; also used for the bus load estimate")
+        self.bitrate_edit.editingFinished.connect(self._populate_messages)
+        self.capture_button = QtWidgets.QPushButton("Start")
+        self.capture_button.clicked.connect(self.toggle_capture)
+        live_layout.addWidget(QtWidgets.QLabel("Interface:"))
+        live_layout.addWidget(self.interface_combo)
+        live_layout.addWidget(QtWidgets.QLabel("Channel:"))
+        live_layout.addWidget(self.channel_edit)
+        live_layout.addWidget(QtWidgets.QLabel("Bitrate:"))
+        live_layout.addWidget(self.bitrate_edit)
+        live_layout.addStretch()
+        live_layout.addWidget(self.capture_button)
+        live_group.setLayout(live_layout)
+        layout.addWidget(live_group)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        self.message_table = self._create_table(
+            ["ID", "Message", "Frames", "DLC", "Period (ms)", "Min (ms)", "Max (ms)", "Jitter (ms)",
+             "Load (%)", "First (s)", "Last (s)"], 1)
+        self.message_table.horizontalHeaderItem(7).setToolTip("Standard deviation of the period")
+        self.message_table.horizontalHeaderItem(8).setToolTip(
+            "Estimated share of the bus at the bit rate set under Live Capture (default "
+            f"{DEFAULT_BITRATE // 1000} kbit/s), without stuff bits")
+        self.message_table.itemSelectionChanged.connect(self._show_selected_signals)
+        self.signal_table = self._create_table(["Signal", "Samples", "Min", "Max", "Last", "Unit"], 0)
+        self.signal_table.setToolTip("Double-click a signal of a decoded log to plot it")
+        self.signal_table.itemDoubleClicked.connect(self._plot_selected_signal)
+        splitter.addWidget(self.message_table)
+        splitter.addWidget(self.signal_table)
+        layout.addWidget(splitter, 1)
+
+        status_layout = QtWidgets.QHBoxLayout()
+        self.status_label = QtWidgets.QLabel("Ready")
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setRange(0, _PROGRESS_STEPS)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setMaximumHeight(16)
+        self.progress_bar.setVisible(False)
+        status_layout.addWidget(self.status_label)
+        status_layout.addStretch()
+        status_layout.addWidget(self.progress_bar)
+        layout.addLayout(status_layout)
+
+    @staticmethod
+    def _create_table(headers: List[str], stretch_column: int) -> QtWidgets.QTableWidget:
+        table = QtWidgets.QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(stretch_column, QtWidgets.QHeaderView.Stretch)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def is_decoding(self) -> bool:
+        return self._worker is not None or self._series_worker is not None
+
+    def is_capturing(self) -> bool:
+        return self._capture is not None
+
+    def select_log_file(self):
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open CAN Log", "", LOG_FILE_FILTER)
+        if file_path:
+            self.open_log(file_path)
+
+    def open_log(self, file_path: str, use_cache: bool = True) -> bool:
+        """
+        Show the cached summary of file_path if it was decoded with the
+        current DBC before, else start decoding it on a LogDecodeWorker;
+        False if it cannot be opened.
+        """
+        if self.is_decoding() or self.is_capturing():
+            return False
+        try:
+            reader = open_log_reader(file_path)
+            fingerprint = log_fingerprint(file_path)
+        except (LogFormatError, OSError) as e:
+            self._show_error(f"Failed to open log: {e}")
+            return False
+        messages = self._compile_messages()
+        dbc_digest = model_digest(messages)
+
+        self.log_path = file_path
+        self.file_label.setText(f"Log: {file_path}")
+        cached = find_cached(file_path, dbc_digest, fingerprint) if use_cache else None
+        if cached is not None and self._load_cached(cached):
+            return True
+        workers = parallel_workers(reader)
+        processes = f" with {workers} processes" if workers else ""
+        self.status_label.setText(f"Decoding {os.path.basename(file_path)}{processes}..."
+                                  if messages else
+                                  f"Reading {os.path.basename(file_path)}{processes} "
+                                  "(no DBC loaded, signals are not decoded)...")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self._worker = LogDecodeWorker(reader, self._decoder, create_writer(file_path, dbc_digest, fingerprint),
+                                       messages, workers, self)
+        self._worker.progress.connect(self._on_progress)
+        self._worker.summaryUpdated.connect(self._on_summary)
+        self._worker.failed.connect(self._on_failed)
+        self._worker.finished.connect(self._on_worker_done)
+        self._worker.start()
+        self.open_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.capture_button.setEnabled(False)
+        return True
+
+    def _load_cached(self, cached: CachedLog) -> bool:
+        """Show the summary of a decode cache entry; False if it is unusable."""
+        try:
+            summary = LogSummary.from_dict(cached.summary)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring decode cache {cached.directory}: {e}")
+            return False
+        self._cache = cached
+        self._frames, self._signals = summary.snapshot()
+        self._populate_messages()
+        reader = cached.reader
+        details = self._log_details(reader.get('frame_count', self._frames.frame_count),
+                                    reader.get('skipped_lines', 0), reader.get('error_frames', 0))
+        self.status_label.setText(f"Loaded {', '.join(details)} from the decode cache "
+                                  f"(decoded in {reader.get('elapsed', 0.0):.1f} s)")
+        return True
+
+    def _log_details(self, frame_count: int, skipped_lines: int, error_frames: int) -> List[str]:
+        details = [f"{frame_count:,} frames", f"{len(self._frames):,} IDs"]
+        load = self._bus_load_text()
+        if load:
+            details.append(load)
+        if skipped_lines:
+            details.append(f"{skipped_lines:,} other records skipped")
+        if error_frames:
+            details.append(f"{error_frames:,} error frames")
+        return details
+
+    def _compile_messages(self) -> List[Dict[str, Any]]:
+        """Compile the decoder for the current DBC model and clear the tables; returns the messages."""
+        messages = self.dbc_editor.get_data().get('messages', [])
+        self._decoder = FrameDecoder(messages)
+        self._messages = messages
+        self._cache = None
+        self._units = {int(message['frame_id']): {signal['name']: signal.get('unit') or ''
+                                                  for signal in message.get('signals', [])}
+                       for message in messages}
+        self._frames, self._signals = FrameStatistics(), {}
+        self.message_table.setRowCount(0)
+        self.signal_table.setRowCount(0)
+        return messages
+
+    def toggle_capture(self):
+        if self.is_capturing():
+            self.stop_capture()
+        else:
+            bitrate = self.bitrate_edit.text().strip()
+            self.start_capture(self.interface_combo.currentText().strip(), self.channel_edit.text().strip(),
+                               int(bitrate) if bitrate else None)
+
+    def start_capture(self, interface: str, channel: str, bitrate: Optional[int] = None, **bus_options) -> bool:
+        """Start monitoring a live bus through python-can; False if it cannot be opened."""
+        if self.is_decoding() or self.is_capturing():
+            return False
+        try:
+            capture = LiveCapture(interface, channel, bitrate, **bus_options)
+            capture.start()
+        except CaptureError as e:
+            self._show_error(f"Failed to start capture: {e}")
+            return False
+        messages = self._compile_messages()
+        self._capture = capture
+        self.log_path = None
+        self.file_label.setText(f"Live: {interface} channel {channel}")
+        self.status_label.setText("Capturing..." if messages else
+                                  "Capturing (no DBC loaded, signals are not decoded)...")
+        self._live_rate = (time.perf_counter(), 0)
+        self._live_worker = LiveDecodeWorker(capture, self._decoder, self)
+        self._live_worker.failed.connect(self._on_capture_failed)
+        self._live_worker.start()
+        self._live_timer.start()
+        self.capture_button.setText("Stop")
+        self.open_button.setEnabled(False)
+        for widget in (self.interface_combo, self.channel_edit, self.bitrate_edit):
+            widget.setEnabled(False)
+        return True
+
+    def stop_capture(self) -> None:
+        """Stop receiving and decoding; the tables keep the final summary."""
+        capture, worker = self._capture, self._live_worker
+        if capture is None:
+            return
+        self._live_timer.stop()
+        capture.stop()
+        worker.requestInterruption()
+        worker.wait()
+        self._refresh_live()
+        details = [f"{capture.ring.written:,} frames", f"{len(self._frames):,} IDs"]
+        load = self._bus_load_text()
+        if load:
+            details.append(load)
+        if worker.dropped:
+            details.append(f"{worker.dropped:,} dropped")
+        if capture.error_frames:
+            details.append(f"{capture.error_frames:,} error frames")
+        self.status_label.setText(f"Capture stopped: {', '.join(details)}")
+        worker.deleteLater()
+        self._capture = self._live_worker = None
+        self.capture_button.setText("Start")
+        self.open_button.setEnabled(True)
+        for widget in (self.interface_combo, self.channel_edit, self.bitrate_edit):
+            widget.setEnabled(True)
+
+    def _refresh_live(self):
+        """Timer tick: show the latest summary of the live worker, if it published a new one."""
+        worker, capture = self._live_worker, self._capture
+        if worker is None:
+            return
+        snapshot = worker.take_snapshot()
+        if snapshot is not None:
+            self._frames, self._signals = snapshot
+            self._populate_messages()
+        now, written = time.perf_counter(), capture.ring.written
+        if now - self._live_rate[0] >= 1.0:
+            rate = (written - self._live_rate[1]) / (now - self._live_rate[0])
+            self._live_rate = (now, written)
+            details = [f"{written:,} frames", f"{rate:,.0f} frames/s", f"{len(self._frames):,} IDs"]
+            load = self._bus_load_text()
+            if load:
+                details.append(load)
+            if worker.dropped:
+                details.append(f"{worker.dropped:,} dropped")
+            if capture.error_frames:
+                details.append(f"{capture.error_frames:,} error frames")
+            self.status_label.setText(f"Capturing: {', '.join(details)}")
+
+    def _on_capture_failed(self, message: str):
+        self.stop_capture()
+        self._show_error(f"Capture failed: {message}")
+
+    def cancel_decode(self) -> None:
+        for worker in (self._worker, self._series_worker):
+            if worker is not None:
+                worker.requestInterruption()
+                self.status_label.setText("Cancelling...")
+
+    def wait_for_decode(self) -> None:
+        """Stop a running decode and wait for its thread (e.g. before closing)."""
+        for worker in (self._worker, self._series_worker):
+            if worker is not None:
+                worker.requestInterruption()
+                worker.wait()
+        QtWidgets.QApplication.processEvents()
+
+    def plot_signal(self, frame_id: int, signal: str) -> bool:
+        """
+        Read the decoded log again for one signal of the message with
+        frame_id and open its plot; False if no log is loaded or a decode
+        is running.
+        """
+        decoder = self._decoder.get(frame_id) if self._decoder else None
+        if self.log_path is None or decoder is None or self.is_decoding() or self.is_capturing():
+            return False
+        reader = None
+        cache = self._cache
+        try:
+            if cache is not None and signal not in cache.signal_names(decoder.frame_id):
+                cache = None
+        except DecodeCacheError:
+            cache = None
+        if cache is None:
+            try:
+                reader = open_log_reader(self.log_path)
+            except (LogFormatError, OSError) as e:
+                self._show_error(f"Failed to open log: {e}")
+                return False
+        worker = SignalSeriesWorker(reader, self._decoder, decoder.frame_id, signal, cache, self._messages,
+                                    parallel_workers(reader) if reader is not None else 0, self)
+        worker.progress.connect(self._on_progress)
+        worker.failed.connect(self._on_failed)
+        worker.finished.connect(self._on_series_done)
+        self._series_worker = worker
+        self.status_label.setText(f"Reading {decoder.name}.{signal} from {os.path.basename(self.log_path)}...")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.open_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.capture_button.setEnabled(False)
+        worker.start()
+        return True
+
+    def _plot_selected_signal(self, item: QtWidgets.QTableWidgetItem):
+        decoder = self._selected_decoder()
+        name = self.signal_table.item(item.row(), 0)
+        if decoder is not None and name is not None:
+            self.plot_signal(decoder.frame_id, name.text())
+
+    def _on_series_done(self):
+        worker = self._series_worker
+        self._series_worker = None
+        worker.deleteLater()
+        self.progress_bar.setVisible(False)
+        self.open_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.capture_button.setEnabled(True)
+        if worker.pyramid is None:
+            self.status_label.setText("Plot cancelled" if worker.cancelled else "Plot failed")
+            return
+        decoder = self._decoder.get(worker.frame_id)
+        unit = self._units.get(worker.frame_id, {}).get(worker.signal, "")
+        self.status_label.setText(f"{decoder.name}.{worker.signal}: {len(worker.pyramid):,} samples")
+        dialog = SignalPlotDialog(f"{decoder.name}.{worker.signal}", worker.pyramid, unit, self)
+        dialog.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        dialog.show()
+
+    def _on_progress(self, done: int, total: int):
+        self.progress_bar.setValue(int(done * _PROGRESS_STEPS / total) if total else _PROGRESS_STEPS)
+
+    def _on_summary(self, snapshot):
+        self._frames, self._signals = snapshot
+        self._populate_messages()
+        if self._worker is not None and not self._worker.isInterruptionRequested():
+            frames = self._frames.frame_count
+            self.status_label.setText(f"Decoding {os.path.basename(self.log_path)}... {frames:,} frames")
+
+    def _on_failed(self, message: str):
+        self._show_error(f"Failed to read log: {message}")
+
+    def _on_worker_done(self):
+        worker = self._worker
+        reader = worker.reader
+        self._cache = worker.cached
+        details = self._log_details(reader.frame_count, reader.skipped_lines, getattr(reader, 'error_frames', 0))
+        verb = "Cancelled after" if worker.cancelled else "Decoded"
+        self.status_label.setText(f"{verb} {', '.join(details)} in {worker.elapsed:.1f} s")
+        worker.deleteLater()
+        self._worker = None
+        self.progress_bar.setVisible(False)
+        self.open_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.capture_button.setEnabled(True)
+
+    def _populate_messages(self) -> None:
+        selected = self._selected_key()
+        table = self.message_table
+        table.setUpdatesEnabled(False)
+        table.blockSignals(True)
+        try:
+            keys = sorted(self._frames)
+            table.setRowCount(len(keys))
+            bitrate = self.bitrate()
+            for row, key in enumerate(keys):
+                stats = self._frames.get(key)
+                frame_id, is_extended = split_key(key)
+                decoder = self._decoder.get(frame_id, is_extended) if self._decoder else None
+                label = f"0x{frame_id:08X}" if is_extended else f"0x{frame_id:X}"
+                cells = [label, decoder.name if decoder else "", f"{stats.count:,}",
+                         ", ".join(str(size) for size in stats.lengths),
+                         _milliseconds(stats.mean_period), _milliseconds(stats.min_period),
+                         _milliseconds(stats.max_period), _milliseconds(stats.jitter),
+                         _percent(self._frames.bus_load(bitrate, key)),
+                         f"{stats.first:.3f}", f"{stats.last:.3f}"]
+                self._set_row(table, row, cells, key)
+                if key == selected:
+                    table.selectRow(row)
+        finally:
+            table.blockSignals(False)
+            table.setUpdatesEnabled(True)
+        self._show_selected_signals()
+
+    def bitrate(self) -> int:
+        """Bit rate for the bus load: the one entered for live capture, else DEFAULT_BITRATE."""
+        text = self.bitrate_edit.text().strip()
+        return int(text) if text else DEFAULT_BITRATE
+
+    def _bus_load_text(self) -> str:
+        bitrate = self.bitrate()
+        load = self._frames.bus_load(bitrate)
+        return f"bus load {_percent(load)}% at {bitrate / 1000:g} kbit/s" if math.isfinite(load) else ""
+
+    def _selected_key(self) -> Optional[int]:
+        """Statistics key (see can_statistics.frame_key) of the selected row."""
+        items = self.message_table.selectedItems()
+        return items[0].data(QtCore.Qt.UserRole) if items else None
+
+    def _selected_decoder(self) -> Optional[MessageDecoder]:
+        key = self._selected_key()
+        return self._decoder.get(*split_key(key)) if self._decoder and key is not None else None
+
+    def _show_selected_signals(self) -> None:
+        # Decoded signals are summarized under the frame id of their message (J1939 frames included)
+        decoder = self._selected_decoder()
+        signals = self._signals.get(decoder.frame_id, {}) if decoder is not None else {}
+        units = self._units.get(decoder.frame_id, {}) if decoder is not None else {}
+        table = self.signal_table
+        table.setRowCount(len(signals))
+        for row, (name, (samples, low, high, last)) in enumerate(signals.items()):
+            cells = [name, f"{samples:,}", f"{low:g}", f"{high:g}", f"{last:g}", units.get(name, "")]
+            self._set_row(table, row, cells)
+
+    @staticmethod
+    def _set_row(table: QtWidgets.QTableWidget, row: int, cells: List[str], key: Any = None) -> None:
+        """Fill a table row, reusing its items (the live view refreshes the same rows many times a second)."""
+        for col, text in enumerate(cells):
+            item = table.item(row, col)
+            if item is None:
+                item = QtWidgets.QTableWidgetItem(text)
+                table.setItem(row, col, item)
+            elif item.text() != text:
+                item.setText(text)
+            if key is not None:
+                item.setData(QtCore.Qt.UserRole, key)
+
+    def _show_error(self, message):
+        QtWidgets.QMessageBox.critical(self, "Error", message)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Live capture of CAN frames with python-can (SocketCAN/vcan on Linux, the
+`virtual` interface for tests, or any other python-can interface).
+
+python-can is installed with cantools; the bus is opened by interface name
+and channel, so any interface python-can supports works the same way.
+
+Received frames go into a FrameRing, a fixed-size columnar ring buffer with
+the columns of a FrameBatch. python-can's Notifier thread writes each frame
+as it arrives; a consumer (the CAN Bus Viewer's decode thread) takes all
+frames written since its last read as one FrameBatch. When the consumer
+falls more than the ring's capacity behind, the oldest frames are
+overwritten and counted as dropped, so memory stays fixed whatever the bus
+load.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import can
+import numpy as np
+
+from can_frames import FrameBatch, FLAG_FD, FLAG_REMOTE, FLAG_TX, FLAG_BRS, CLASSIC_WIDTH, FD_WIDTH
+
+logger = logging.getLogger(__name__)
+
+# Frames kept in the ring; about 8 s of a fully loaded 1 Mbit/s bus
+RING_CAPACITY = 65536
+
+# Interfaces offered in the UI; python-can accepts any other installed one too
+DEFAULT_INTERFACES = ('socketcan', 'virtual', 'pcan', 'vector', 'kvaser', 'slcan')
+
+
+class CaptureError(Exception):
+    pass
+
+
+class FrameRing:
+    """
+    Fixed-size ring buffer of CAN frames, one NumPy array per FrameBatch
+    column. Frames are numbered in arrival order; `written` is the number of
+    frames appended so far. Safe for one writer and one reader thread.
+    """
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        if capacity < 1:
+            raise CaptureError("Ring capacity must be positive")
+        self.capacity = capacity
+        self.timestamp = np.zeros(capacity, np.float64)
+        self.channel = np.zeros(capacity, np.int16)
+        self.frame_id = np.zeros(capacity, np.uint32)
+        self.is_extended = np.zeros(capacity, bool)
+        self.flags = np.zeros(capacity, np.uint8)
+        self.dlc = np.zeros(capacity, np.uint8)
+        self.payload = np.zeros((capacity, FD_WIDTH), np.uint8)
+        self.channels: List[str] = []
+        self._channel_index: Dict[Any, int] = {}
+        self.written = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, channel: Any, frame_id: int, is_extended: bool,
+               flags: int, dlc: int, data: bytes) -> None:
+        """
+        Store one frame, overwriting the oldest one when the ring is full. dlc
+        is the data length of the frame, which remote frames carry without data.
+        """
+        index = self._channel_index.get(channel)
+        if index is None:
+            index = self._channel_index[channel] = len(self.channels)
+            self.channels.append(str(channel))
+        size = len(data)
+        with self._lock:
+            slot = self.written % self.capacity
+            self.timestamp[slot] = timestamp
+            self.channel[slot] = index
+            self.frame_id[slot] = frame_id
+            self.is_extended[slot] = is_extended
+            self.flags[slot] = flags
+            self.dlc[slot] = dlc
+            row = self.payload[slot]
+            row[:size] = np.frombuffer(data, np.uint8, size)
+            row[size:] = 0
+            self.written += 1
+
+    def read_since(self, position: int) -> Tuple[FrameBatch, int, int]:
+        """
+        Frames appended after frame number `position`, as a copied
+        FrameBatch. Returns (batch, new position, frames lost because they
+        were overwritten before being read).
+        """
+        with self._lock:
+            written = self.written
+            dropped = max(0, written - self.capacity - position)
+            start = position + dropped
+            slots = np.arange(start, written) % self.capacity
+            flags = self.flags[slots]
+            width = FD_WIDTH if (flags & FLAG_FD).any() else CLASSIC_WIDTH
+            batch = FrameBatch(self.timestamp[slots], self.channel[slots], self.frame_id[slots],
+                               self.is_extended[slots], flags, self.dlc[slots],
+                               self.payload[slots, :width], self.channels)
+        return batch, written, dropped
+
+    def latest(self, count: int) -> FrameBatch:
+        """The last `count` frames (fewer if not received yet)."""
+        with self._lock:
+            written = self.written
+        return self.read_since(max(0, written - min(count, self.capacity)))[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.written = 0
+            self.channels.clear()
+            self._channel_index.clear()
+
+
+def available_interfaces() -> List[str]:
+    """Interface names to offer, the common ones first."""
+    valid = set(getattr(can.interfaces, 'VALID_INTERFACES', ()) or DEFAULT_INTERFACES)
+    common = [name for name in DEFAULT_INTERFACES if name in valid]
+    return common + sorted(valid - set(common))
+
+
+class _RingListener(can.Listener):
+    """Notifier callback: stores received frames in a FrameRing."""
+
+    def __init__(self, ring: FrameRing, start_time: float, channel: str):
+        self.ring = ring
+        self.start_time = start_time
+        self.channel = channel
+        self.error_frames = 0
+        self.error: Optional[Exception] = None
+
+    def on_message_received(self, msg) -> None:
+        if msg.is_error_frame:
+            self.error_frames += 1
+            return
+        flags = 0
+        if msg.is_fd:
+            flags |= FLAG_FD
+            if msg.bitrate_switch:
+                flags |= FLAG_BRS
+        if msg.is_remote_frame:
+            flags |= FLAG_REMOTE
+        if not msg.is_rx:
+            flags |= FLAG_TX
+        channel = msg.channel if msg.channel is not None else self.channel
+        self.ring.append(msg.timestamp - self.start_time, channel, msg.arbitration_id,
+                         msg.is_extended_id, flags, msg.dlc, b'' if msg.is_remote_frame else bytes(msg.data))
+
+    def on_error(self, exc: Exception) -> None:
+        logger.error(f"CAN receive failed: {exc}")
+        self.error = exc
+
+    def stop(self) -> None:
+        pass
+
+
+class LiveCapture:
+    """
+    Receives frames from a python-can bus into a FrameRing until stopped.
+    Timestamps are seconds since start().
+    """
+
+    def __init__(self, interface: str, channel: str, bitrate: Optional[int] = None,
+                 capacity: int = RING_CAPACITY, **bus_options):
+        self.interface = interface
+        self.channel = channel
+        self.bitrate = bitrate
+        self.bus_options = bus_options
+        self.ring = FrameRing(capacity)
+        self.start_time = 0.0
+        self._bus = None
+        self._notifier = None
+        self._listener: Optional[_RingListener] = None
+
+    @property
+    def running(self) -> bool:
+        return self._notifier is not None
+
+    @property
+    def error_frames(self) -> int:
+        return self._listener.error_frames if self._listener else 0
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """Exception that stopped reception, if any."""
+        return self._listener.error if self._listener else None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        options = dict(self.bus_options)
+        if self.bitrate:
+            options['bitrate'] = self.bitrate
+        try:
+            self._bus = can.Bus(interface=self.interface, channel=self.channel, **options)
+        except Exception as e:
+            raise CaptureError(f"Cannot open {self.interface} channel '{self.channel}': {e}") from e
+        self.ring.clear()
+        self.start_time = time.time()
+        self._listener = _RingListener(self.ring, self.start_time, self.channel)
+        self._notifier = can.Notifier(self._bus, [self._listener], timeout=0.1)
+        logger.info(f"Capturing from {self.interface} channel '{self.channel}'")
+
+    def stop(self) -> None:
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+        if self._bus is not None:
+            try:
+                self._bus.shutdown()
+            except Exception as e:
+                logger.warning(f"Closing {self.interface} channel '{self.channel}' failed: {e}")
+            self._bus = None
+            logger.info(f"Stopped capture after {self.ring.written:,} frames")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Vectorized decoding of CAN frames with the signals of a DBC model.
+
+Every signal of a message (as loaded by DBCProcessor / DBCEditor) is compiled
+once into a SignalPlan: which 64-bit window of the payload holds it, the shift
+and mask that isolate its raw bits, whether to sign-extend, and its scale and
+offset. Decoding all frames of one frame id then runs a handful of NumPy
+operations per signal over a uint64 payload column instead of a Python loop
+per frame.
+
+Payloads are passed as a 2-D uint8 array with one row per frame (8 columns
+for classic CAN, up to 64 for CAN FD); shorter frames are zero-padded.
+
+Frames are matched to messages by a DispatchTable: exact frame ids first,
+then, for extended frames, the parameter group number (PGN) of the messages
+the DBC marks as J1939, so one message definition decodes the frames of every
+sender and priority.
+
+Bit numbering follows the DBC conventions (see bit_occupancy):
+- little_endian (Intel): start_bit is the LSB; payload bytes read as a
+  little-endian integer, the signal is (word >> start_bit) & mask.
+- big_endian (Motorola): start_bit is the MSB in sawtooth numbering; payload
+  bytes read as a big-endian integer, the signal ends at a fixed bit of it.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from can_frames import FrameBatch, FLAG_REMOTE
+
+logger = logging.getLogger(__name__)
+
+DecodedSignals = Dict[str, np.ndarray]
+# frame id -> (timestamps, decoded signals) of the frames of one batch
+DecodedBatch = Dict[int, Tuple[np.ndarray, DecodedSignals]]
+
+_U64 = np.uint64
+
+
+class CANDecoderError(Exception):
+    pass
+
+
+class SignalPlan:
+    """
+    Extraction recipe of one signal. The raw value is read from the 64-bit
+    window starting at payload byte `window`. A signal that does not fit in
+    one window (more than 57 bits, not byte aligned) takes its remaining
+    `spill` bits from the byte after the window.
+    """
+    __slots__ = ('name', 'big_endian', 'window', 'shift', 'spill', 'mask', 'length',
+                 'is_signed', 'scale', 'offset', 'multiplexer_ids', 'is_multiplexer')
+
+    def __init__(self, signal: Dict[str, Any]):
+        start_bit = int(signal.get('start_bit', 0))
+        length = int(signal.get('length', 1))
+        if length < 1 or length > 64 or start_bit < 0:
+            raise CANDecoderError(f"Signal '{signal.get('name')}': unsupported layout {start_bit}|{length}")
+        self.name = signal['name']
+        self.length = length
+        self.big_endian = signal.get('byte_order') == 'big_endian'
+        if self.big_endian:
+            # Position of the MSB counted from the first bit of the payload (bit 7 of byte 0)
+            msb = (start_bit // 8) * 8 + 7 - start_bit % 8
+            self.window = msb // 8
+            used = msb % 8 + length  # bits of the window down to and including the LSB
+            self.spill = max(0, used - 64)
+            self.shift = 64 - used if used <= 64 else 0
+        else:
+            self.window = start_bit // 8
+            self.shift = start_bit % 8
+            self.spill = max(0, self.shift + length - 64)
+        self.mask = (1 << length) - 1
+        self.is_signed = bool(signal.get('is_signed'))
+        self.scale = float(signal.get('scale', 1) if signal.get('scale') is not None else 1)
+        self.offset = float(signal.get('offset', 0) or 0)
+        ids = signal.get('multiplexer_ids')
+        self.multiplexer_ids = [int(i) for i in ids] if ids else None
+        self.is_multiplexer = bool(signal.get('is_multiplexer'))
+
+    @property
+    def end_byte(self) -> int:
+        """Number of payload bytes the windows of this signal read."""
+        return self.window + 8 + (1 if self.spill else 0)
+
+    def raw(self, words: '_PayloadWords') -> np.ndarray:
+        """Raw (unscaled, unsigned) values as uint64."""
+        if self.big_endian:
+            word = words.big_endian(self.window)
+            if self.spill:
+                tail = words.byte(self.window + 8) >> _U64(8 - self.spill)
+                raw = (word << _U64(self.spill)) | tail
+            else:
+                raw = word >> _U64(self.shift) if self.shift else word.copy()
+        else:
+            word = words.little_endian(self.window)
+            raw = word >> _U64(self.shift) if self.shift else word.copy()
+            if self.spill:
+                raw |= words.byte(self.window + 8) << _U64(64 - self.shift)
+        if self.length < 64:
+            raw &= _U64(self.mask)
+        return raw
+
+    def integer(self, raw: np.ndarray) -> np.ndarray:
+        """Raw values as int64 (sign-extended) or uint64."""
+        if not self.is_signed:
+            return raw
+        if self.length == 64:
+            return raw.view(np.int64)
+        values = raw.view(np.int64)
+        sign_bit = np.int64(1 << (self.length - 1))
+        values ^= sign_bit
+        values -= sign_bit
+        return values
+
+    def physical(self, raw: np.ndarray) -> np.ndarray:
+        """Scaled values as float64 (consumes raw)."""
+        values = self.integer(raw).astype(np.float64)
+        if self.scale != 1.0:
+            values *= self.scale
+        if self.offset != 0.0:
+            values += self.offset
+        return values
+
+
+class _PayloadWords:
+    """Lazily built 64-bit views of a payload array, shared by the signals of one decode call."""
+
+    def __init__(self, payloads: np.ndarray, width: int):
+        payloads = np.asarray(payloads, dtype=np.uint8)
+        if payloads.ndim != 2:
+            raise CANDecoderError("Payloads must be a 2-D uint8 array (one row per frame)")
+        if payloads.shape[1] < width:
+            padded = np.zeros((payloads.shape[0], width), dtype=np.uint8)
+            padded[:, :payloads.shape[1]] = payloads
+            payloads = padded
+        self.payloads = payloads
+        self._little: Dict[int, np.ndarray] = {}
+        self._big: Dict[int, np.ndarray] = {}
+        self._bytes: Dict[int, np.ndarray] = {}
+
+    def little_endian(self, window: int) -> np.ndarray:
+        word = self._little.get(window)
+        if word is None:
+            block = self.payloads[:, window:window + 8]
+            if not block.flags.c_contiguous:
+                block = np.ascontiguousarray(block)
+            word = block.view('<u8').reshape(-1)
+            self._little[window] = word
+        return word
+
+    def big_endian(self, window: int) -> np.ndarray:
+        word = self._big.get(window)
+        if word is None:
+            word = self.little_endian(window).byteswap()
+            self._big[window] = word
+        return word
+
+    def byte(self, index: int) -> np.ndarray:
+        column = self._bytes.get(index)
+        if column is None:
+            column = self.payloads[:, index].astype(np.uint64)
+            self._bytes[index] = column
+        return column
+
+
+class MessageDecoder:
+    """Compiled signals of one message; decodes many frames of its frame id at once."""
+
+    def __init__(self, message: Dict[str, Any]):
+        self.name = message['name']
+        self.frame_id = int(message['frame_id'])
+        self.length = int(message.get('length', 8))
+        self.plans: List[SignalPlan] = []
+        for signal in message.get('signals', []):
+            try:
+                self.plans.append(SignalPlan(signal))
+            except CANDecoderError as e:
+                logger.warning(f"Message '{self.name}': {e}; signal skipped")
+        self.multiplexer: Optional[SignalPlan] = next(
+            (plan for plan in self.plans if plan.is_multiplexer), None)
+        self.width = max([self.length] + [plan.end_byte for plan in self.plans])
+
+    @property
+    def signal_names(self) -> List[str]:
+        return [plan.name for plan in self.plans]
+
+    def decode(self, payloads: np.ndarray, signals: Optional[Iterable[str]] = None) -> DecodedSignals:
+        """
+        Physical values (float64) of the signals, one array per signal name
+        aligned with the rows of payloads. Multiplexed signals are NaN in the
+        frames where the multiplexer selects another group.
+        signals restricts decoding to the given names.
+        """
+        words = _PayloadWords(payloads, self.width)
+        wanted = set(signals) if signals is not None else None
+        selector = None
+        if self.multiplexer is not None and any(plan.multiplexer_ids for plan in self.plans):
+            selector = self.multiplexer.integer(self.multiplexer.raw(words))
+        result: DecodedSignals = {}
+        for plan in self.plans:
+            if wanted is not None and plan.name not in wanted:
+                continue
+            values = plan.physical(plan.raw(words))
+            if plan.multiplexer_ids and selector is not None:
+                values[~np.isin(selector, plan.multiplexer_ids)] = np.nan
+            result[plan.name] = values
+        return result
+
+    def decode_raw(self, payloads: np.ndarray, signal: str) -> np.ndarray:
+        """Integer raw value of one signal (int64 if signed, else uint64), e.g. for value tables."""
+        for plan in self.plans:
+            if plan.name == signal:
+                return plan.integer(plan.raw(_PayloadWords(payloads, self.width)))
+        raise CANDecoderError(f"Message '{self.name}' has no signal '{signal}'")
+
+
+def j1939_pgn(frame_id):
+    """
+    Parameter group number of 29-bit J1939 ids (int or integer array). The
+    priority and source address bits are dropped; for PDU1 formats (PF < 240)
+    the PS byte is the destination address and is cleared as well.
+    """
+    pgn = (frame_id >> 8) & 0x3FFFF
+    pdu1 = ((pgn >> 8) & 0xFF) < 240
+    if isinstance(pdu1, np.ndarray):
+        return np.where(pdu1, pgn & 0x3FF00, pgn)
+    return pgn & 0x3FF00 if pdu1 else pgn
+
+
+class DispatchTable:
+    """
+    Compiled frame id -> message lookup of a DBC model. Messages are
+    numbered in model order; `exact` maps their frame ids to that number and
+    `pgn` the PGNs of J1939 messages (protocol 'j1939'), which extended
+    frames fall back to when their id has no exact match. Resolved ids are
+    memoized, as a log carries few distinct ids.
+    """
+    __slots__ = ('exact', 'pgn', '_resolved')
+
+    def __init__(self, frame_ids: Iterable[int], j1939: Iterable[bool]):
+        self.exact: Dict[int, int] = {}
+        self.pgn: Dict[int, int] = {}
+        for index, (frame_id, is_j1939) in enumerate(zip(frame_ids, j1939)):
+            self.exact.setdefault(frame_id, index)
+            if is_j1939:
+                self.pgn.setdefault(j1939_pgn(frame_id), index)
+        self._resolved: Dict[Tuple[int, bool], int] = {}
+
+    def lookup(self, frame_id: int, is_extended: Optional[bool] = None) -> int:
+        """
+        Number of the message for a frame, -1 if none matches. Without
+        is_extended, ids above 0x7FF are taken as extended.
+        """
+        if is_extended is None:
+            is_extended = frame_id > 0x7FF
+        key = (frame_id, is_extended)
+        index = self._resolved.get(key)
+        if index is None:
+            index = self.exact.get(frame_id, -1)
+            if index < 0 and is_extended and self.pgn:
+                index = self.pgn.get(j1939_pgn(frame_id), -1)
+            self._resolved[key] = index
+        return index
+
+    def group(self, frame_id: np.ndarray, is_extended: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Group frames by message: returns (message numbers, bounds, order)
+        where rows order[bounds[k]:bounds[k + 1]] (in their original order)
+        belong to message number k. Frames without a message are left out.
+        """
+        # Extended ids get bit 31 so that 11- and 29-bit frames with equal ids resolve separately
+        keys = frame_id.astype(np.int64) | (is_extended.astype(np.int64) << 31)
+        ids, inverse = np.unique(keys, return_inverse=True)
+        index = np.array([self.lookup(int(key) & 0x7FFFFFFF, bool(key >> 31)) for key in ids], dtype=np.int64)
+        message = index[inverse.reshape(-1)]
+        rows = np.flatnonzero(message >= 0)
+        message = message[rows]
+        # Message numbers are small, so a stable sort of int16/int32 keys is a radix sort
+        message = message.astype(np.int16 if len(self.exact) < 2 ** 15 else np.int32)
+        order = np.argsort(message, kind='stable')
+        message = message[order]
+        starts = np.flatnonzero(np.diff(message, prepend=-1))
+        bounds = np.append(starts, len(message))
+        return message[starts].astype(np.int64), bounds, rows[order]
+
+
+class FrameDecoder:
+    """Message decoders of a DBC model, looked up through a DispatchTable."""
+
+    def __init__(self, messages: Iterable[Dict[str, Any]]):
+        self.decoders: Dict[int, MessageDecoder] = {}
+        j1939 = []
+        for message in messages:
+            decoder = MessageDecoder(message)
+            if decoder.frame_id in self.decoders:
+                logger.warning(f"Frame ID 0x{decoder.frame_id:X} is defined more than once; "
+                               f"using '{self.decoders[decoder.frame_id].name}'")
+                continue
+            self.decoders[decoder.frame_id] = decoder
+            j1939.append(message.get('protocol') == 'j1939')
+        self._by_index: List[MessageDecoder] = list(self.decoders.values())
+        self.dispatch = DispatchTable(self.decoders, j1939)
+
+    @classmethod
+    def from_processor(cls, processor) -> 'FrameDecoder':
+        """Compile the messages currently loaded by a DBCProcessor."""
+        return cls(processor.get_extracted_data())
+
+    def __contains__(self, frame_id: int) -> bool:
+        return self.dispatch.lookup(frame_id) >= 0
+
+    def get(self, frame_id: int, is_extended: Optional[bool] = None) -> Optional[MessageDecoder]:
+        """Decoder for a frame id: its exact message, else a J1939 message with the same PGN."""
+        index = self.dispatch.lookup(frame_id, is_extended)
+        return self._by_index[index] if index >= 0 else None
+
+    def decode(self, frame_id: int, payloads: np.ndarray,
+               signals: Optional[Iterable[str]] = None) -> DecodedSignals:
+        """Decode the payloads of frames that all carry frame_id."""
+        decoder = self.get(frame_id)
+        if decoder is None:
+            raise CANDecoderError(f"No message with frame ID 0x{frame_id:X}")
+        return decoder.decode(payloads, signals)
+
+    def decode_batch(self, batch: FrameBatch, signals: Optional[Iterable[str]] = None) -> DecodedBatch:
+        """
+        Decode the data frames of a FrameBatch that match a message. Results
+        are keyed by the frame id of the message, so J1939 frames from all
+        source addresses are decoded together.
+        """
+        data_frames = np.flatnonzero((batch.flags & FLAG_REMOTE) == 0)
+        indices, bounds, order = self.dispatch.group(batch.frame_id[data_frames], batch.is_extended[data_frames])
+        rows = data_frames[order]
+        result: DecodedBatch = {}
+        for k, index in enumerate(indices):
+            decoder = self._by_index[index]
+            group = rows[bounds[k]:bounds[k + 1]]
+            result[decoder.frame_id] = (batch.timestamp[group], decoder.decode(batch.payload[group], signals))
+        return result
+
+    def iter_decoded(self, batches: Iterable[FrameBatch],
+                     signals: Optional[Iterable[str]] = None) -> Iterator[DecodedBatch]:
+        """Decode a stream of batches (e.g. from a log reader) one batch at a time."""
+        for batch in batches:
+            yield self.decode_batch(batch, signals)
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Columnar batches of CAN frames, as produced by the log readers and consumed
+by can_decoder.
+
+A FrameBatch holds one NumPy array per column instead of one object per frame,
+so a batch of a few hundred thousand frames costs a handful of allocations and
+can be filtered, grouped and decoded with vectorized operations.
+
+The parse_* helpers turn fields of text logs into numbers without a Python
+loop per line. Each field is given by its begin/end byte offsets in the
+chunk, one pair per line. The fields are gathered into a fixed-width matrix
+and converted with lookup tables.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bits of FrameBatch.flags
+FLAG_FD = 0x01        # CAN FD frame
+FLAG_REMOTE = 0x02    # remote transmission request, no payload
+FLAG_TX = 0x04        # transmitted by the logging node (ASC "Tx")
+FLAG_BRS = 0x08       # CAN FD bit rate switch
+
+CLASSIC_WIDTH = 8
+FD_WIDTH = 64
+
+# Bytes read from a text log per batch
+CHUNK_SIZE = 16 * 1024 * 1024
+
+_INVALID = 255
+HEX_VALUES = np.full(256, _INVALID, dtype=np.uint8)
+for _i, _c in enumerate(b'0123456789abcdef'):
+    HEX_VALUES[_c] = _i
+for _i, _c in enumerate(b'ABCDEF'):
+    HEX_VALUES[_c] = 10 + _i
+
+
+class FrameBatch:
+    """
+    Frames as parallel arrays:
+        timestamp   float64, seconds
+        channel     int16, index into `channels`
+        frame_id    uint32, without the extended-frame flag
+        is_extended bool
+        flags       uint8, FLAG_* bits
+        dlc         uint8, number of data bytes
+        payload     uint8 (n, width), data bytes zero-padded to the batch width
+    """
+    __slots__ = ('timestamp', 'channel', 'frame_id', 'is_extended', 'flags', 'dlc', 'payload', 'channels')
+
+    def __init__(self, timestamp: np.ndarray, channel: np.ndarray, frame_id: np.ndarray,
+                 is_extended: np.ndarray, flags: np.ndarray, dlc: np.ndarray, payload: np.ndarray,
+                 channels: Sequence[str]):
+        self.timestamp = timestamp
+        self.channel = channel
+        self.frame_id = frame_id
+        self.is_extended = is_extended
+        self.flags = flags
+        self.dlc = dlc
+        self.payload = payload
+        self.channels = list(channels)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__ if name != 'channels')
+
+    def select(self, rows) -> 'FrameBatch':
+        """Frames at the given indices or boolean mask."""
+        return FrameBatch(self.timestamp[rows], self.channel[rows], self.frame_id[rows],
+                          self.is_extended[rows], self.flags[rows], self.dlc[rows],
+                          self.payload[rows], self.channels)
+
+    @classmethod
+    def empty(cls, channels: Sequence[str] = (), width: int = CLASSIC_WIDTH) -> 'FrameBatch':
+        return cls(np.empty(0, np.float64), np.empty(0, np.int16), np.empty(0, np.uint32),
+                   np.empty(0, bool), np.empty(0, np.uint8), np.empty(0, np.uint8),
+                   np.empty((0, width), np.uint8), channels)
+
+    @classmethod
+    def concatenate(cls, batches: List['FrameBatch']) -> 'FrameBatch':
+        """One batch of all frames (payloads padded to the widest batch); batches share channel names."""
+        if not batches:
+            return cls.empty()
+        width = max(batch.payload.shape[1] for batch in batches)
+        payload = np.zeros((sum(len(batch) for batch in batches), width), np.uint8)
+        row = 0
+        for batch in batches:
+            payload[row:row + len(batch), :batch.payload.shape[1]] = batch.payload
+            row += len(batch)
+        return cls(*(np.concatenate([getattr(batch, name) for batch in batches])
+                     for name in ('timestamp', 'channel', 'frame_id', 'is_extended', 'flags', 'dlc')),
+                   payload, batches[-1].channels)
+
+
+def _gather(buf: np.ndarray, begin: np.ndarray, end: np.ndarray, width: int,
+            right_align: bool, fill: int) -> np.ndarray:
+    """
+    (n, width) matrix of the bytes of buf[begin:end] per row, padded with fill.
+    When all right-aligned fields have the same length L <= width, the matrix
+    is (n, L) and needs no padding (e.g. fixed-format timestamps).
+    """
+    if not len(begin):
+        return np.empty((0, width), dtype=np.uint8)
+    lengths = end - begin
+    shortest = int(lengths.min())
+    uniform = shortest == int(lengths.max())
+    if right_align and uniform and 0 < shortest <= width:
+        width = shortest
+    first = (end - width) if right_align else begin
+    if len(buf) >= width:
+        windows = np.lib.stride_tricks.sliding_window_view(buf, width)
+        edge = (first < 0) | (first > len(buf) - width)
+        if edge.any():
+            values = windows[np.clip(first, 0, len(buf) - width)]
+            rows = np.flatnonzero(edge)
+            index = np.clip(first[rows, None] + np.arange(width), 0, len(buf) - 1)
+            values[rows] = buf[index]
+        else:
+            values = windows[first]
+    else:
+        values = buf[np.clip(first[:, None] + np.arange(width), 0, len(buf) - 1)]
+    columns = np.arange(width)
+    if not (uniform and shortest >= width):
+        if right_align:
+            outside = columns < (width - lengths)[:, None]
+        else:
+            outside = columns >= lengths[:, None]
+        np.copyto(values, fill, where=outside)
+    return values
+
+
+def parse_decimal_fields(buf: np.ndarray, begin: np.ndarray, end: np.ndarray,
+                         width: int = 15) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unsigned decimal numbers of at most width (<= 15) digits; returns (float64
+    values, exact as they stay below 2**53, valid mask).
+    """
+    digits = _gather(buf, begin, end, width, True, ord('0'))
+    digits -= ord('0')  # non-digits wrap around to values >= 10
+    valid = (digits.max(axis=1, initial=0) < 10) & (end > begin) & (end - begin <= width)
+    weights = 10.0 ** np.arange(digits.shape[1] - 1, -1, -1)
+    return digits.astype(np.float64) @ weights, valid
+
+
+def parse_hex_fields(buf: np.ndarray, begin: np.ndarray, end: np.ndarray,
+                     width: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+    """Hexadecimal numbers of at most width digits (width <= 16); returns (uint64 values, valid mask)."""
+    digits = HEX_VALUES[_gather(buf, begin, end, width, True, ord('0'))]
+    valid = (digits.max(axis=1, initial=0) != _INVALID) & (end > begin) & (end - begin <= width)
+    digits[digits == _INVALID] = 0
+    values = np.zeros(len(begin), dtype=np.uint64)
+    for column in range(digits.shape[1]):
+        values <<= np.uint64(4)
+        values |= digits[:, column]
+    return values, valid
+
+
+def parse_seconds(buf: np.ndarray, begin: np.ndarray, end: np.ndarray,
+                  dots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decimal timestamps "s.fff" given the offset of their dot (a field without
+    a dot has its dot at end); returns (float64 seconds, valid mask).
+    """
+    seconds, valid = parse_decimal_fields(buf, begin, dots, 12)
+    has_fraction = dots < end
+    fraction_begin = np.where(has_fraction, dots + 1, end)
+    fraction, fraction_valid = parse_decimal_fields(buf, fraction_begin, end, 9)
+    fraction_digits = end - fraction_begin
+    valid &= fraction_valid | (fraction_digits == 0)
+    return seconds + fraction / 10.0 ** fraction_digits, valid
+
+
+def parse_hex_bytes(buf: np.ndarray, begin: np.ndarray, count: np.ndarray, width: int,
+                    separator: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Data bytes written as hex pairs from begin, count bytes per row, each pair
+    followed by `separator` characters; returns ((n, width) uint8 payload, valid mask).
+    """
+    stride = 2 + separator
+    text = _gather(buf, begin, begin + count * stride, width * stride, False, ord('0'))
+    nibbles = HEX_VALUES[text.reshape(len(begin), width, stride)[:, :, :2]]
+    valid = nibbles.max(axis=(1, 2), initial=0) != _INVALID
+    return (nibbles[:, :, 0] << 4) | (nibbles[:, :, 1] & 0x0F), valid
+
+
+def find_next(positions: np.ndarray, after: np.ndarray, missing: int,
+              before: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    For every offset in after, the first of the sorted positions >= it, or
+    `missing` when there is none. When the line ends are given as before and
+    every line holds exactly one of the positions (the usual case for a
+    delimiter), the positions are the answer and no search is needed.
+    """
+    if before is not None and len(positions) == len(after) and len(after) \
+            and not ((positions < after) | (positions >= before)).any():
+        return positions
+    index = np.searchsorted(positions, after)
+    extended = np.append(positions, missing)
+    return extended[index]
+
+
+def channel_indices(buf: np.ndarray, begin: np.ndarray, end: np.ndarray,
+                    channels: List[str], width: int = 16) -> np.ndarray:
+    """
+    int16 indices of the channel names buf[begin:end] in channels, appending
+    names seen for the first time (channels is shared by all batches of a log).
+    Logs have few channels, so names are first matched against the known ones.
+    """
+    if len(begin):
+        # Compare 8-byte words: round the longest name up to a multiple of 8
+        width = min(width, max(8, -(-int((end - begin).max()) // 8) * 8))
+    names = np.ascontiguousarray(_gather(buf, begin, end, width, False, 0))
+    if names.shape[1] < width:
+        names = np.pad(names, ((0, 0), (0, width - names.shape[1])))
+    keys = names.view(np.uint64)
+    result = np.full(len(begin), -1, dtype=np.int16)
+    for index, name in enumerate(channels):
+        pattern = np.frombuffer(name.encode('latin-1')[:width].ljust(width, b'\0'), dtype=np.uint64)
+        matches = (keys == pattern).all(axis=1)
+        result[matches] = index
+    unknown = np.flatnonzero(result < 0)
+    if len(unknown):
+        unique, inverse = np.unique(names[unknown].view(f'S{width}').ravel(), return_inverse=True)
+        for i, name in enumerate(unique):
+            channels.append(name.decode('latin-1'))
+        result[unknown] = len(channels) - len(unique) + inverse.ravel()
+    return result
+
+
+def field_equals(buf: np.ndarray, begin: np.ndarray, end: np.ndarray, word: bytes) -> np.ndarray:
+    """Mask of the fields buf[begin:end] that are exactly word."""
+    matches = (end - begin) == len(word)
+    if len(begin):
+        text = _gather(buf, begin, end, len(word), False, 0)
+        matches &= (text == np.frombuffer(word, dtype=np.uint8)).all(axis=1)
+    return matches
+
+
+class LineTokens:
+    """
+    Whitespace-separated tokens of the lines of a chunk: token k of every
+    line is field(k), where k may differ per line. Lines with fewer tokens
+    get an empty field, which none of the parse_* helpers accepts.
+    """
+    __slots__ = ('starts', 'ends', 'first', 'count')
+
+    def __init__(self, buf: np.ndarray, begin: np.ndarray, end: np.ndarray):
+        text = (buf != ord(' ')) & (buf != ord('\t')) & (buf != ord('\n')) & (buf != ord('\r'))
+        edges = np.diff(text.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+        self.starts = np.flatnonzero(edges == 1)
+        self.ends = np.flatnonzero(edges == -1)
+        self.first = np.searchsorted(self.starts, begin)
+        self.count = np.searchsorted(self.starts, end) - self.first
+
+    def select(self, rows) -> 'LineTokens':
+        """Tokens of the lines at the given indices or boolean mask."""
+        tokens = LineTokens.__new__(LineTokens)
+        tokens.starts, tokens.ends = self.starts, self.ends
+        tokens.first, tokens.count = self.first[rows], self.count[rows]
+        return tokens
+
+    def field(self, k) -> Tuple[np.ndarray, np.ndarray]:
+        """Begin and end offsets of token k (int or per-line array) of every line."""
+        present = k < self.count
+        if present.all():
+            index = self.first + k
+            return self.starts[index], self.ends[index]
+        if not len(self.starts):
+            empty = np.zeros(len(self.first), dtype=np.int64)
+            return empty, empty
+        index = np.minimum(self.first + k, len(self.starts) - 1)
+        return np.where(present, self.starts[index], 0), np.where(present, self.ends[index], 0)
+
+
+def line_bounds(buf: np.ndarray, newlines: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Begin and end offsets of the lines of buf (which ends with a newline), without CR/LF."""
+    if newlines is None:
+        newlines = np.flatnonzero(buf == ord('\n'))
+    begin = np.empty(len(newlines), dtype=np.int64)
+    begin[0:1] = 0
+    begin[1:] = newlines[:-1] + 1
+    end = newlines.astype(np.int64)
+    has_cr = (end > begin) & (buf[np.maximum(end - 1, 0)] == ord('\r'))
+    end -= has_cr
+    return begin, end
+
+
+class LogFormatError(Exception):
+    pass
+
+
+class LogReader:
+    """
+    Base of the log readers:
+        for batch in Reader(path): ...
+    yields the frames of the log as FrameBatch chunks of about chunk_size
+    bytes of log data, so memory stays bounded by the chunk size whatever
+    the size of the log. `bytes_read` / `file_size` give the progress while
+    iterating; records that are not frames are counted in `skipped_lines`.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = CHUNK_SIZE):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.channels: List[str] = []
+        self.skipped_lines = 0
+        self.frame_count = 0
+        self.bytes_read = 0
+        self.file_size = os.path.getsize(file_path)
+
+    def reset(self) -> None:
+        """Clear the counters (and any parsing state) before a new pass over the file."""
+        self.skipped_lines = 0
+        self.frame_count = 0
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[FrameBatch]:
+        raise NotImplementedError
+
+
+class TextLogReader(LogReader):
+    """
+    Base of the readers of line-based text logs. The file is read in chunks
+    of chunk_size bytes, cut after their last newline, and parse_chunk turns
+    the complete lines of each chunk into a FrameBatch.
+    """
+
+    def parse_chunk(self, chunk: bytes) -> FrameBatch:
+        """Parse complete lines (chunk ends with a newline) into a FrameBatch."""
+        raise NotImplementedError
+
+    def prepare(self) -> bool:
+        """
+        Reset and read what the lines depend on (e.g. a file header), so that
+        parse_range() can parse chunks of the file in any order, in other
+        processes too (see parallel_decode). False if each line depends on
+        the lines before it and the file must be read front to back.
+        """
+        self.reset()
+        return True
+
+    def parse_range(self, start: int, end: int) -> FrameBatch:
+        """Parse the lines in bytes [start, end) of the file; start must be the beginning of a line."""
+        with open(self.file_path, 'rb') as f:
+            f.seek(start)
+            chunk = f.read(end - start)
+        if not chunk.endswith(b'\n'):
+            chunk += b'\n'
+        return self.parse_chunk(chunk)
+
+    def __iter__(self) -> Iterator[FrameBatch]:
+        self.reset()
+        with open(self.file_path, 'rb') as f:
+            tail = b''
+            while True:
+                block = f.read(self.chunk_size)
+                self.bytes_read += len(block)
+                if not block:
+                    if tail.strip():
+                        batch = self.parse_chunk(tail + b'\n')
+                        if len(batch):
+                            yield batch
+                    break
+                cut = block.rfind(b'\n')
+                if cut < 0:
+                    tail += block
+                    continue
+                chunk = tail + block[:cut + 1]
+                tail = block[cut + 1:]
+                batch = self.parse_chunk(chunk)
+                if len(batch):
+                    yield batch
+        logger.info(f"Read {self.frame_count} frames from {self.file_path} "
+                    f"({self.skipped_lines} lines skipped)")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Per-frame-id traffic statistics of a CAN log or live bus: frame count,
+mean/min/max period, jitter, data lengths seen and estimated bus load.
+
+Statistics are updated batch by batch and never keep the frames. The period
+of an id is the time between two of its consecutive frames; its mean and
+variance are accumulated with Welford's method. Within a batch the periods
+of every id are summarized with vectorized NumPy reductions and the result
+is merged into the running values with the pairwise form of Welford's update
+(Chan et al.), so each frame costs O(1) and a batch costs a handful of array
+operations plus a short Python loop over the ids it contains.
+
+Bus load is estimated from the nominal frame length without stuff bits:
+47 + 8 * n bits for a standard frame with n data bytes and 67 + 8 * n for an
+extended one, interframe space included. CAN FD frames are counted as if
+sent at the nominal bit rate, which overestimates their share.
+
+Standard and extended frames with the same id number are different ids on
+the bus, so statistics are keyed by frame id with bit 31 set for extended
+frames, as DispatchTable.group() keys them (see frame_key / split_key).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from can_frames import FrameBatch, FLAG_REMOTE
+
+# Assumed bit rate for the bus load when none is given
+DEFAULT_BITRATE = 500000
+
+_STANDARD_FRAME_BITS = 47
+_EXTENDED_FRAME_BITS = 67
+
+# Set in the statistics key of extended frames
+EXTENDED_KEY = 1 << 31
+
+# Data length of each DLC code (CAN FD lengths above 8 use codes 9-15) and the inverse table
+_DLC_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+_DLC_CODES = np.array([next(code for code, size in enumerate(_DLC_LENGTHS) if size >= length)
+                       for length in range(65)], dtype=np.uint8)
+
+
+def frame_key(frame_id: int, is_extended: bool) -> int:
+    """Statistics key of a frame id."""
+    return frame_id | EXTENDED_KEY if is_extended else frame_id
+
+
+def split_key(key: int) -> Tuple[int, bool]:
+    """(frame id, is_extended) of a statistics key."""
+    return key & (EXTENDED_KEY - 1), bool(key & EXTENDED_KEY)
+
+
+class IdStatistics:
+    """
+    Running statistics of one frame id. Times are in seconds; `periods` is
+    the number of periods seen (count - 1), `m2` the sum of squared
+    deviations of the periods from their mean, `dlc_mask` has bit k set when
+    a frame with DLC code k was seen and `bits` is the estimated number of
+    bits on the bus.
+    """
+    __slots__ = ('count', 'first', 'last', 'periods', 'mean', 'm2', 'min_period', 'max_period',
+                 'dlc_mask', 'bits')
+
+    def __init__(self):
+        self.count = 0
+        self.first = math.inf
+        self.last = -math.inf
+        self.periods = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_period = math.inf
+        self.max_period = -math.inf
+        self.dlc_mask = 0
+        self.bits = 0
+
+    def copy(self) -> 'IdStatistics':
+        other = IdStatistics()
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def add_periods(self, count: int, mean: float, m2: float, minimum: float, maximum: float) -> None:
+        """Merge the summary of `count` more periods."""
+        if count <= 0:
+            return
+        total = self.periods + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.periods * count / total
+        self.periods = total
+        self.min_period = min(self.min_period, minimum)
+        self.max_period = max(self.max_period, maximum)
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the period (NaN before two periods are seen)."""
+        return math.sqrt(self.m2 / self.periods) if self.periods > 1 else math.nan
+
+    @property
+    def mean_period(self) -> float:
+        return self.mean if self.periods else math.nan
+
+    @property
+    def lengths(self) -> List[int]:
+        """Data lengths seen, in bytes."""
+        return [size for code, size in enumerate(_DLC_LENGTHS) if self.dlc_mask >> code & 1]
+
+
+class FrameStatistics:
+    """Per-id statistics of all frames passed to update(), keyed by frame_key()."""
+
+    def __init__(self):
+        self.ids: Dict[int, IdStatistics] = {}
+        self.frame_count = 0
+        self.first = math.inf
+        self.last = -math.inf
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def get(self, key: int) -> Optional[IdStatistics]:
+        return self.ids.get(key)
+
+    def update(self, batch: FrameBatch) -> None:
+        count = len(batch)
+        if not count:
+            return
+        self.frame_count += count
+        self.first = min(self.first, float(batch.timestamp.min()))
+        self.last = max(self.last, float(batch.timestamp.max()))
+
+        # Frames of an id together, in arrival order
+        keys = batch.frame_id.astype(np.int64) | (batch.is_extended.astype(np.int64) << 31)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        timestamp = batch.timestamp[order]
+        starts = np.flatnonzero(np.diff(keys, prepend=np.int64(-1)) != 0)
+        counts = np.diff(np.append(starts, count))
+
+        # Period before each frame; the first frame of each id has none within the batch
+        within = np.ones(count, dtype=bool)
+        within[starts] = False
+        period = np.zeros(count)
+        period[1:] = np.diff(timestamp)
+        period[~within] = 0.0
+        periods = counts - 1
+        sums = np.add.reduceat(period, starts)
+        means = np.divide(sums, periods, out=np.zeros(len(starts)), where=periods > 0)
+        deviation = np.where(within, period - np.repeat(means, counts), 0.0)
+        m2 = np.add.reduceat(deviation * deviation, starts)
+        minimum = np.minimum.reduceat(np.where(within, period, np.inf), starts)
+        maximum = np.maximum.reduceat(np.where(within, period, -np.inf), starts)
+
+        data_bytes = np.where(batch.flags & FLAG_REMOTE, 0, batch.dlc)[order].astype(np.int64)
+        frame_bits = 8 * data_bytes + np.where(batch.is_extended[order], _EXTENDED_FRAME_BITS,
+                                               _STANDARD_FRAME_BITS)
+        bits = np.add.reduceat(frame_bits, starts)
+        dlc_masks = np.bitwise_or.reduceat(
+            np.left_shift(1, _DLC_CODES[np.minimum(batch.dlc[order], 64)].astype(np.int64)), starts)
+        last_rows = starts + counts - 1
+
+        for k, key in enumerate(keys[starts].tolist()):
+            stats = self.ids.get(key)
+            if stats is None:
+                stats = self.ids[key] = IdStatistics()
+            first, last = float(timestamp[starts[k]]), float(timestamp[last_rows[k]])
+            if stats.count:
+                # The period from the last frame of the previous batch
+                gap = first - stats.last
+                stats.add_periods(1, gap, 0.0, gap, gap)
+            stats.add_periods(int(periods[k]), float(means[k]), float(m2[k]),
+                              float(minimum[k]), float(maximum[k]))
+            stats.count += int(counts[k])
+            stats.first = min(stats.first, first)
+            stats.last = last
+            stats.bits += int(bits[k])
+            stats.dlc_mask |= int(dlc_masks[k])
+
+    def merge(self, other: 'FrameStatistics') -> None:
+        """
+        Add the statistics of frames that came after those seen so far, e.g.
+        the next chunk of a log decoded in another process (see
+        parallel_decode). Same result as passing their batches to update().
+        """
+        if not other.frame_count:
+            return
+        self.frame_count += other.frame_count
+        self.first = min(self.first, other.first)
+        self.last = max(self.last, other.last)
+        for key, theirs in other.ids.items():
+            stats = self.ids.get(key)
+            if stats is None:
+                self.ids[key] = theirs.copy()
+                continue
+            gap = theirs.first - stats.last
+            stats.add_periods(1, gap, 0.0, gap, gap)
+            stats.add_periods(theirs.periods, theirs.mean, theirs.m2, theirs.min_period, theirs.max_period)
+            stats.count += theirs.count
+            stats.first = min(stats.first, theirs.first)
+            stats.last = theirs.last
+            stats.bits += theirs.bits
+            stats.dlc_mask |= theirs.dlc_mask
+
+    @property
+    def duration(self) -> float:
+        return self.last - self.first if self.frame_count else 0.0
+
+    def bus_load(self, bitrate: int = DEFAULT_BITRATE, key: Optional[int] = None) -> float:
+        """
+        Estimated share (0..1) of the bus time taken over the whole
+        observation, by one frame id (its frame_key()) or by all frames.
+        """
+        duration = self.duration
+        if duration <= 0 or bitrate <= 0:
+            return math.nan
+        if key is None:
+            bits = sum(stats.bits for stats in self.ids.values())
+        else:
+            stats = self.ids.get(key)
+            bits = stats.bits if stats else 0
+        return bits / (duration * bitrate)
+
+    def snapshot(self) -> 'FrameStatistics':
+        """Independent copy, safe to hand to another thread."""
+        other = FrameStatistics()
+        other.ids = {key: stats.copy() for key, stats in self.ids.items()}
+        other.frame_count, other.first, other.last = self.frame_count, self.first, self.last
+        return other
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-compatible copy (ids become strings), see from_dict()."""
+        return {'frame_count': self.frame_count, 'first': self.first, 'last': self.last,
+                'ids': {str(key): [getattr(stats, name) for name in IdStatistics.__slots__]
+                        for key, stats in self.ids.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FrameStatistics':
+        other = cls()
+        other.frame_count, other.first, other.last = data['frame_count'], data['first'], data['last']
+        for key, values in data['ids'].items():
+            stats = other.ids[int(key)] = IdStatistics()
+            for name, value in zip(IdStatistics.__slots__, values):
+                setattr(stats, name, value)
+        return other
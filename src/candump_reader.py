@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Reader for Linux SocketCAN `candump -l` log files.
+
+Each line holds one frame:
+    (1436509052.249713) can0 123#DEADBEEF        classic frame, 11-bit id
+    (1436509052.249713) can0 12345678#DEADBEEF   29-bit id (8 hex digits)
+    (1436509052.249713) can0 123##1DEADBEEF      CAN FD frame, flags nibble, data
+    (1436509052.249713) can0 123#R               remote frame (optionally #R<len>)
+
+The file is read in chunks of CHUNK_SIZE bytes (see TextLogReader). Each
+chunk is parsed with vectorized NumPy operations over its bytes: offsets of
+the delimiters, then timestamps, ids and data bytes converted with lookup
+tables. One FrameBatch is yielded per chunk, so memory stays bounded by the
+chunk size whatever the size of the log. Lines that do not parse (comments, error frames,
+truncated lines) are counted in `skipped_lines`.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+from can_frames import (
+    FrameBatch, TextLogReader, FLAG_FD, FLAG_REMOTE, FLAG_BRS, CLASSIC_WIDTH, FD_WIDTH,
+    CHUNK_SIZE, HEX_VALUES, parse_seconds, parse_hex_fields, parse_hex_bytes,
+    find_next, channel_indices, line_bounds,
+)
+
+# SocketCAN flags carried in 8-digit ids
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+# Flags nibble of CAN FD lines
+CANFD_BRS = 0x01
+
+
+class CandumpReader(TextLogReader):
+    """Iterate over a candump log as FrameBatch chunks (see TextLogReader)."""
+
+    def parse_chunk(self, chunk: bytes) -> FrameBatch:
+        """Parse complete lines (chunk ends with a newline) into a FrameBatch."""
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        begin, end = line_bounds(buf)
+        nonblank = end > begin
+        valid = nonblank & (buf[begin] == ord('('))
+        size = len(buf)
+
+        close = find_next(np.flatnonzero(buf == ord(')')), begin, size, end)
+        dots = find_next(np.flatnonzero(buf == ord('.')), begin, size, end)
+        spaces = np.flatnonzero(buf == ord(' '))
+        channel_begin = close + 2
+        channel_end = find_next(spaces, channel_begin, size)
+        id_begin = channel_end + 1
+        hashes = find_next(np.flatnonzero(buf == ord('#')), id_begin, size, end)
+        valid &= (close < end) & (channel_end < end) & (hashes < end)
+        # Drop the unparseable lines before the heavier conversions
+        rows = np.flatnonzero(valid)
+        self.skipped_lines += int(nonblank.sum()) - len(rows)
+        begin, end, close, dots, channel_begin, channel_end, id_begin, hashes = (
+            a[rows] for a in (begin, end, close, dots, channel_begin, channel_end, id_begin, hashes))
+
+        timestamp, valid = parse_seconds(buf, begin + 1, close, np.minimum(dots, close))
+        raw_id, id_valid = parse_hex_fields(buf, id_begin, hashes, 8)
+        valid &= id_valid
+        is_extended = (hashes - id_begin) > 3
+        valid &= ~(is_extended & ((raw_id & CAN_ERR_FLAG) != 0))
+
+        marker = buf[np.minimum(hashes + 1, size - 1)]
+        is_fd = (marker == ord('#')) & (hashes + 1 < end)
+        is_remote = marker == ord('R')
+        data_begin = np.where(is_fd, hashes + 3, hashes + 1)
+        data_chars = np.where(is_remote, 0, np.maximum(end - data_begin, 0))
+        valid &= (data_chars % 2 == 0)
+        dlc = data_chars // 2
+        # The character after "##" (FD flags) or "#R" (optional remote frame length)
+        nibble = HEX_VALUES[buf[np.minimum(hashes + 2, size - 1)]]
+        valid &= ~is_fd | (nibble < 16)
+        dlc = np.where(is_remote, np.where((hashes + 2 < end) & (nibble < 16), nibble, 0), dlc)
+
+        width = FD_WIDTH if is_fd.any() else CLASSIC_WIDTH
+        valid &= np.where(is_remote, True, dlc <= width)
+        payload, payload_valid = parse_hex_bytes(buf, data_begin, np.minimum(data_chars // 2, width), width)
+        valid &= payload_valid
+
+        flags = np.where(is_fd, FLAG_FD, 0).astype(np.uint8)
+        flags |= np.where(is_fd & ((nibble & CANFD_BRS) != 0), FLAG_BRS, 0).astype(np.uint8)
+        flags |= np.where(is_remote, FLAG_REMOTE, 0).astype(np.uint8)
+        channel = channel_indices(buf, channel_begin, channel_end, self.channels)
+
+        keep = np.flatnonzero(valid)
+        self.skipped_lines += len(valid) - len(keep)
+        self.frame_count += len(keep)
+        return FrameBatch(
+            timestamp[keep],
+            channel[keep],
+            (raw_id[keep] & np.uint64(CAN_EFF_MASK)).astype(np.uint32),
+            is_extended[keep],
+            flags[keep],
+            dlc[keep].astype(np.uint8),
+            payload[keep],
+            self.channels,
+        )
+
+
+def read_candump(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[FrameBatch]:
+    """Shorthand for iterating over CandumpReader(file_path, chunk_size)."""
+    return iter(CandumpReader(file_path, chunk_size))
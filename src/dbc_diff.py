@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+DBC Diff Module
+Compares two DBC files (or two editor models) message by message and signal by signal.
+
+Messages are matched by name and then, among the remaining ones, by frame id so
+renamed messages show up as modifications instead of a removal plus an addition.
+Signals are matched the same way, by name and then by their position in the
+payload (start bit, length, byte order, multiplexer ids). Messages and signals
+with equal content hashes (see dbc_hashing) are skipped without comparing
+fields, so the cost grows with the size of the change.
+"""
+
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dbc_editor import DBCEditor
+from dbc_hashing import MessageHashes, MESSAGE_HASH_FIELDS
+
+HashFunction = Callable[[Dict[str, Any]], MessageHashes]
+
+
+def _field_changes(old: Dict[str, Any], new: Dict[str, Any], fields) -> List[Tuple[str, Any, Any]]:
+    return [(field, old.get(field), new.get(field)) for field in fields if old.get(field) != new.get(field)]
+
+
+def signal_position(signal: Dict[str, Any]):
+    ids = signal.get('multiplexer_ids')
+    return (signal.get('start_bit'), signal.get('length'), signal.get('byte_order'),
+            tuple(ids) if ids else None)
+
+
+def match_items(old_items: List[Dict[str, Any]], new_items: List[Dict[str, Any]], fallback_key):
+    """
+    Pair items by name, then the unpaired ones by fallback_key(item).
+    Returns (pairs, added, removed).
+    """
+    old_by_name = {}
+    for item in old_items:
+        old_by_name.setdefault(item['name'], item)
+    pairs = []
+    unpaired_new = []
+    used = set()
+    for item in new_items:
+        old = old_by_name.get(item['name'])
+        if old is not None and id(old) not in used:
+            pairs.append((old, item))
+            used.add(id(old))
+        else:
+            unpaired_new.append(item)
+    by_key = {}
+    for item in old_items:
+        if id(item) not in used:
+            by_key.setdefault(fallback_key(item), item)
+    added = []
+    for item in unpaired_new:
+        old = by_key.pop(fallback_key(item), None)
+        if old is not None:
+            pairs.append((old, item))
+            used.add(id(old))
+        else:
+            added.append(item)
+    removed = [item for item in old_items if id(item) not in used]
+    return pairs, added, removed
+
+
+def _diff_signals(old_msg: Dict[str, Any], new_msg: Dict[str, Any],
+                  old_hashes: MessageHashes, new_hashes: MessageHashes) -> Dict[str, Any]:
+    pairs, added, removed = match_items(old_msg.get('signals', []), new_msg.get('signals', []), signal_position)
+    modified = []
+    for old_sig, new_sig in pairs:
+        if old_sig['name'] == new_sig['name'] and \
+                old_hashes.signals.get(old_sig['name']) == new_hashes.signals.get(new_sig['name']):
+            continue
+        fields = sorted((set(old_sig) | set(new_sig)) - {'name'})
+        changes = _field_changes(old_sig, new_sig, fields)
+        if changes or old_sig['name'] != new_sig['name']:
+            modified.append({
+                'name': new_sig['name'],
+                'old_name': old_sig['name'],
+                'fields': changes,
+            })
+    return {
+        'added_signals': [s['name'] for s in added],
+        'removed_signals': [s['name'] for s in removed],
+        'modified_signals': modified,
+    }
+
+
+def diff_models(old_messages: List[Dict[str, Any]], new_messages: List[Dict[str, Any]],
+                old_hashes: HashFunction = MessageHashes, new_hashes: HashFunction = MessageHashes) -> Dict[str, Any]:
+    """
+    Compare two lists of editor message dicts (DBCEditor.get_data()['messages']).
+    old_hashes / new_hashes give the MessageHashes of a message of either
+    side; pass DBCEditor.message_hashes for the editor's data to reuse the
+    hashes it has already computed.
+
+    Returns a dict with:
+        added_messages / removed_messages: lists of {'name', 'frame_id'}
+        modified_messages: list of {'name', 'old_name', 'frame_id', 'fields',
+            'added_signals', 'removed_signals', 'modified_signals'} where fields
+            and the signal entries' fields are lists of (field, old, new)
+        unchanged_messages: number of messages with identical content
+    """
+    pairs, added, removed = match_items(old_messages, new_messages, lambda m: m.get('frame_id'))
+    modified = []
+    unchanged = 0
+    for old_msg, new_msg in pairs:
+        old_msg_hashes, new_msg_hashes = old_hashes(old_msg), new_hashes(new_msg)
+        if old_msg_hashes.digest == new_msg_hashes.digest:
+            unchanged += 1
+            continue
+        entry = {
+            'name': new_msg['name'],
+            'old_name': old_msg['name'],
+            'frame_id': new_msg.get('frame_id'),
+            'fields': [] if old_msg_hashes.header == new_msg_hashes.header else
+            _field_changes(old_msg, new_msg, [f for f in MESSAGE_HASH_FIELDS if f != 'name']),
+        }
+        entry.update(_diff_signals(old_msg, new_msg, old_msg_hashes, new_msg_hashes))
+        if not (entry['fields'] or entry['added_signals'] or entry['removed_signals'] or
+                entry['modified_signals'] or entry['name'] != entry['old_name']):
+            # Only the signal order differs
+            entry['fields'] = [('signal_order', [s['name'] for s in old_msg.get('signals', [])],
+                                [s['name'] for s in new_msg.get('signals', [])])]
+        modified.append(entry)
+    return {
+        'added_messages': [{'name': m['name'], 'frame_id': m.get('frame_id')} for m in added],
+        'removed_messages': [{'name': m['name'], 'frame_id': m.get('frame_id')} for m in removed],
+        'modified_messages': modified,
+        'unchanged_messages': unchanged,
+    }
+
+
+def diff_dbc_files(old_path: str, new_path: str) -> Dict[str, Any]:
+    """Load two DBC files through DBCEditor and compare them with diff_models()."""
+    old_editor, new_editor = DBCEditor(), DBCEditor()
+    old_editor.load_dbc_file(old_path)
+    new_editor.load_dbc_file(new_path)
+    return diff_models(old_editor.get_data()['messages'], new_editor.get_data()['messages'])
+
+
+def has_differences(diff: Dict[str, Any]) -> bool:
+    return bool(diff['added_messages'] or diff['removed_messages'] or diff['modified_messages'])
+
+
+def format_diff_report(diff: Dict[str, Any]) -> str:
+    """Render a diff as plain text, one change per line."""
+    def message_label(name: str, frame_id: Optional[int]) -> str:
+        return f"{name} (0x{frame_id:X})" if isinstance(frame_id, int) else name
+
+    lines = [
+        f"Added messages: {len(diff['added_messages'])}, removed: {len(diff['removed_messages'])}, "
+        f"modified: {len(diff['modified_messages'])}, unchanged: {diff['unchanged_messages']}"
+    ]
+    for msg in diff['added_messages']:
+        lines.append(f"+ {message_label(msg['name'], msg['frame_id'])}")
+    for msg in diff['removed_messages']:
+        lines.append(f"- {message_label(msg['name'], msg['frame_id'])}")
+    for msg in diff['modified_messages']:
+        label = message_label(msg['name'], msg['frame_id'])
+        if msg['old_name'] != msg['name']:
+            label += f" (renamed from {msg['old_name']})"
+        lines.append(f"~ {label}")
+        for field, old, new in msg['fields']:
+            lines.append(f"    {field}: {old!r} -> {new!r}")
+        for name in msg['added_signals']:
+            lines.append(f"    + {name}")
+        for name in msg['removed_signals']:
+            lines.append(f"    - {name}")
+        for sig in msg['modified_signals']:
+            sig_label = sig['name']
+            if sig['old_name'] != sig['name']:
+                sig_label += f" (renamed from {sig['old_name']})"
+            lines.append(f"    ~ {sig_label}")
+            for field, old, new in sig['fields']:
+                lines.append(f"        {field}: {old!r} -> {new!r}")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python dbc_diff.py OLD.dbc NEW.dbc")
+        sys.exit(2)
+    result = diff_dbc_files(sys.argv[1], sys.argv[2])
+    print(format_diff_report(result))
+    sys.exit(1 if has_differences(result) else 0)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Compare dialog for DBC Utility: shows the differences between two DBC files,
+or between the data currently open in the editor and a DBC file.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from dbc_editor import DBCEditor, DBCEditorError
+from dbc_diff import HashFunction, diff_models, format_diff_report
+from dbc_hashing import MessageHashes
+
+CURRENT_DATA_LABEL = "<Current editor data>"
+
+_ADDED_COLOR = QtGui.QColor("#2e7d32")
+_REMOVED_COLOR = QtGui.QColor("#c62828")
+_MODIFIED_COLOR = QtGui.QColor("#ef6c00")
+
+
+class DBCDiffDialog(QtWidgets.QDialog):
+    """
+    Old/new file pickers and a tree of message, signal and field changes.
+    current_hashes gives the MessageHashes of the current messages
+    (DBCEditor.message_hashes), so they are not hashed again.
+    """
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None,
+                 current_messages: Optional[List[Dict[str, Any]]] = None,
+                 current_path: Optional[str] = None,
+                 current_hashes: Optional[HashFunction] = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Compare DBC Files")
+        self.resize(760, 560)
+        self.current_messages = current_messages
+        self.current_hashes = current_hashes
+        self.report = ""
+
+        layout = QtWidgets.QVBoxLayout(self)
+        form = QtWidgets.QFormLayout()
+        self.old_edit, old_row = self._file_row(current_path or "")
+        self.new_edit, new_row = self._file_row(CURRENT_DATA_LABEL if current_messages is not None else "")
+        form.addRow("Old:", old_row)
+        form.addRow("New:", new_row)
+        layout.addLayout(form)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.compare_button = QtWidgets.QPushButton("Compare")
+        self.compare_button.clicked.connect(self.compare)
+        self.copy_button = QtWidgets.QPushButton("Copy Report")
+        self.copy_button.setEnabled(False)
+        self.copy_button.clicked.connect(self.copy_report)
+        buttons.addWidget(self.compare_button)
+        buttons.addWidget(self.copy_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.summary_label = QtWidgets.QLabel("Select two DBC files and press Compare.")
+        layout.addWidget(self.summary_label)
+
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderLabels(["Item", "Old", "New"])
+        self.tree.setColumnWidth(0, 300)
+        self.tree.setColumnWidth(1, 200)
+        layout.addWidget(self.tree)
+
+        close_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close)
+        close_box.rejected.connect(self.reject)
+        layout.addWidget(close_box)
+
+    def _file_row(self, text: str):
+        edit = QtWidgets.QLineEdit(text)
+        browse = QtWidgets.QPushButton("Browse...")
+        browse.clicked.connect(lambda: self._browse(edit))
+        row = QtWidgets.QHBoxLayout()
+        row.addWidget(edit)
+        row.addWidget(browse)
+        return edit, row
+
+    def _browse(self, edit: QtWidgets.QLineEdit) -> None:
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Select DBC File", "", "DBC Files (*.dbc);;All Files (*)"
+        )
+        if file_path:
+            edit.setText(file_path)
+
+    def _load_messages(self, source: str) -> Tuple[List[Dict[str, Any]], HashFunction]:
+        """Messages of a source and the function giving their hashes."""
+        if source == CURRENT_DATA_LABEL and self.current_messages is not None:
+            return self.current_messages, self.current_hashes or MessageHashes
+        editor = DBCEditor()
+        editor.load_dbc_file(source)
+        return editor.get_data()['messages'], MessageHashes
+
+    def compare(self) -> None:
+        old_source = self.old_edit.text().strip()
+        new_source = self.new_edit.text().strip()
+        if not old_source or not new_source:
+            QtWidgets.QMessageBox.warning(self, "Compare", "Please select both files.")
+            return
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            old_messages, old_hashes = self._load_messages(old_source)
+            new_messages, new_hashes = self._load_messages(new_source)
+            diff = diff_models(old_messages, new_messages, old_hashes, new_hashes)
+        except DBCEditorError as e:
+            QtWidgets.QMessageBox.critical(self, "Compare", str(e))
+            return
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.show_diff(diff)
+
+    def show_diff(self, diff: Dict[str, Any]) -> None:
+        self.report = format_diff_report(diff)
+        self.copy_button.setEnabled(True)
+        self.summary_label.setText(self.report.splitlines()[0])
+        self.tree.setUpdatesEnabled(False)
+        self.tree.clear()
+        for msg in diff['added_messages']:
+            self._item(self.tree, f"+ {msg['name']}", "", self._frame_id_text(msg['frame_id']), _ADDED_COLOR)
+        for msg in diff['removed_messages']:
+            self._item(self.tree, f"- {msg['name']}", self._frame_id_text(msg['frame_id']), "", _REMOVED_COLOR)
+        for msg in diff['modified_messages']:
+            label = f"~ {msg['name']}"
+            if msg['old_name'] != msg['name']:
+                label += f" (renamed from {msg['old_name']})"
+            parent = self._item(self.tree, label, "", self._frame_id_text(msg['frame_id']), _MODIFIED_COLOR)
+            for field, old, new in msg['fields']:
+                self._item(parent, field, repr(old), repr(new))
+            for name in msg['added_signals']:
+                self._item(parent, f"+ {name}", "", "", _ADDED_COLOR)
+            for name in msg['removed_signals']:
+                self._item(parent, f"- {name}", "", "", _REMOVED_COLOR)
+            for sig in msg['modified_signals']:
+                sig_label = f"~ {sig['name']}"
+                if sig['old_name'] != sig['name']:
+                    sig_label += f" (renamed from {sig['old_name']})"
+                sig_item = self._item(parent, sig_label, "", "", _MODIFIED_COLOR)
+                for field, old, new in sig['fields']:
+                    self._item(sig_item, field, repr(old), repr(new))
+        # Expanding everything is only affordable for small diffs
+        if len(diff['modified_messages']) <= 200:
+            self.tree.expandAll()
+        self.tree.setUpdatesEnabled(True)
+
+    @staticmethod
+    def _frame_id_text(frame_id) -> str:
+        return f"0x{frame_id:X}" if isinstance(frame_id, int) else ""
+
+    @staticmethod
+    def _item(parent, text: str, old: str, new: str,
+              color: Optional[QtGui.QColor] = None) -> QtWidgets.QTreeWidgetItem:
+        item = QtWidgets.QTreeWidgetItem(parent, [text, old, new])
+        if color is not None:
+            item.setForeground(0, color)
+        return item
+
+    def copy_report(self) -> None:
+        QtWidgets.QApplication.clipboard().setText(self.report)
@@ -6,24 +6,170 @@ Supports loading, editing, and saving CAN/J1939 DBC files.
 """
 
 import os
+import re
+import csv
+import copy
+import functools
+import inspect
 import logging
-import json
 import shutil
-from typing import Dict, List, Any, Optional
+import tempfile
+from typing import Dict, List, Any, Optional, Callable, Iterable
 import cantools
 
+from bit_occupancy import signal_bit_mask, find_free_range, MessageOccupancy
+from dbc_writer import DBCTextIndex
+from dbc_hashing import MessageHashes, file_digest, diff_hashes
+from dbc_journal import OperationJournal, read_journal, file_content_digest, journal_path
+from dbc_history import DBCHistory, DBCHistoryError
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DBCEditorError(Exception):
     pass
 
+# Write buffer used when streaming a DBC file to disk
+SAVE_BUFFER_SIZE = 1 << 16
+
+# Normalized CSV/TSV header names accepted by DBCEditor.import_signals_csv()
+_IMPORT_COLUMN_ALIASES = {
+    'message': 'message', 'message_name': 'message', 'msg': 'message',
+    'frame_id': 'frame_id', 'id': 'frame_id', 'can_id': 'frame_id',
+    'message_length': 'message_length', 'dlc': 'message_length',
+    'sender': 'senders', 'senders': 'senders',
+    'signal': 'signal', 'signal_name': 'signal', 'name': 'signal',
+    'start_bit': 'start_bit', 'start': 'start_bit',
+    'length': 'length', 'bit_length': 'length', 'size': 'length',
+    'byte_order': 'byte_order', 'endianness': 'byte_order',
+    'is_signed': 'is_signed', 'signed': 'is_signed',
+    'scale': 'scale', 'factor': 'scale',
+    'offset': 'offset',
+    'minimum': 'minimum', 'min': 'minimum',
+    'maximum': 'maximum', 'max': 'maximum',
+    'unit': 'unit',
+    'receivers': 'receivers', 'receiver': 'receivers',
+    'comment': 'comments', 'comments': 'comments',
+}
+
+_TRUE_TEXT = {'1', 'true', 'yes', 'y', 'signed', 's', '-'}
+_BIG_ENDIAN_TEXT = {'big_endian', 'big', 'motorola', 'be', '0'}
+
+
+def _journaled(method):
+    """
+    Record successful calls of an editing method in the operation journal.
+    Only the outermost call is recorded: the operations that apply_batch() or
+    pack_signals() run internally are covered by the recorded batch.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._journal_depth += 1
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self._journal_depth -= 1
+        if self._journal_depth == 0:
+            arguments = signature.bind(self, *args, **kwargs).arguments
+            arguments.pop('self')
+            self._record_operation(method.__name__, arguments)
+        return result
+    return wrapper
+
+
+def _checked_rows(indices: Iterable[int], count: int, what: str) -> List[int]:
+    """Sorted distinct indices, raising DBCEditorError if one is out of range."""
+    rows = sorted(set(indices))
+    if rows and (rows[0] < 0 or rows[-1] >= count):
+        raise DBCEditorError(f"Invalid {what} index")
+    return rows
+
+
+def _move_rows(items: List[Any], rows: List[int], step: int) -> List[int]:
+    """
+    Move the items at the sorted rows by one position (step -1 or 1) as a block,
+    keeping their order. Items already at the edge, or behind one that is, stay
+    where they are. Returns the new rows.
+    """
+    count = len(items)
+    order = rows if step < 0 else list(reversed(rows))
+    limit = 0 if step < 0 else count - 1  # first position an item may not move past
+    moved = []
+    for row in order:
+        target = row + step
+        if row == limit:
+            target = row
+        else:
+            items[target], items[row] = items[row], items[target]
+        moved.append(target)
+        limit = target - step
+    return sorted(moved)
+
+
 class DBCEditor:
+    # Methods that may be named by the 'op' key of an apply_batch() operation
+    BATCH_OPERATIONS = (
+        'add_message', 'update_message', 'set_message_fields', 'duplicate_message',
+        'move_message_up', 'move_message_down', 'delete_message',
+        'add_signal', 'update_signal', 'set_signal_fields', 'duplicate_signal',
+        'move_signal_up', 'move_signal_down', 'delete_signal', 'pack_signals',
+        'delete_messages', 'move_messages', 'duplicate_messages',
+        'delete_signals', 'move_signals', 'duplicate_signals',
+    )
+
     def __init__(self):
         self.db = None
         self.file_path = None
         self._original_data = None
         self._modified_data = None
+        self._change_listeners: List[Callable[[str], None]] = []
+        self._batch_depth = 0
+        self._batch_pending = False
+        # id(message dict) -> (message dict, MessageOccupancy), see get_occupancy()
+        self._occupancy_cache = {}
+        # Span index of the file text, used to write only what changed (see dbc_writer)
+        self._text_index: Optional[DBCTextIndex] = None
+        self._file_encoding = 'utf-8'
+        # id(message dict) -> (message dict, MessageHashes), see message_hash()
+        self._hash_cache = {}
+        # id(message dict) -> (message dict, name of the saved message it was loaded or saved
+        # as), so a save follows a message that was renamed and re-IDed (see dbc_writer)
+        self._origins = {}
+        # Hash tree of the saved messages (aligned with _original_data) and
+        # (mtime_ns, size) of the file they were loaded from / saved to
+        self._saved_hashes: List[MessageHashes] = []
+        self._saved_file_digest = file_digest([])
+        self._saved_file_stat = None
+        # Crash-recovery journal of the edits since the last load/save (see dbc_journal)
+        self._journal: Optional[OperationJournal] = None
+        self._journal_depth = 0
+        # Keep every saved version in the local history next to the file (see dbc_history)
+        self.keep_history = True
+
+    def add_change_listener(self, callback: Callable[[str], None]) -> None:
+        """
+        Register a callback for model changes.
+        The callback receives the event name: 'loaded', 'changed' or 'saved'.
+        """
+        if callback not in self._change_listeners:
+            self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback: Callable[[str], None]) -> None:
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+
+    def _notify_change(self, event: str = 'changed') -> None:
+        """Notify listeners, deferring 'changed' events until the running batch ends."""
+        if self._batch_depth and event == 'changed':
+            self._batch_pending = True
+            return
+        for callback in list(self._change_listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Change listener failed: {e}")
 
     def create_new_dbc(self) -> Dict[str, Any]:
         """
@@ -31,12 +177,22 @@ class DBCEditor:
         Returns a dict with empty messages list.
         """
         try:
+            self._close_journal()
             self.db = cantools.database.Database()
             self.file_path = None
             self._original_data = {'messages': []}
             self._modified_data = {'messages': []}
+            self._occupancy_cache = {}
+            self._text_index = DBCTextIndex(self.db.as_dbc_string())
+            self._file_encoding = 'utf-8'
+            self._hash_cache = {}
+            self._origins = {}
+            self._saved_hashes = []
+            self._saved_file_digest = file_digest([])
+            self._saved_file_stat = None
             
             logger.info("Created new empty DBC file")
+            self._notify_change('loaded')
             return self._original_data
             
         except Exception as e:
@@ -54,8 +210,12 @@ class DBCEditor:
             if not file_path.lower().endswith('.dbc'):
                 raise DBCEditorError("File must have .dbc extension")
             
+            # Edits of the previously loaded file are given up; its on-disk journal goes too
+            self._close_journal()
             self.file_path = file_path
-            self.db = cantools.database.load_file(file_path)
+            text, self._file_encoding = self._read_dbc_text(file_path)
+            self.db = cantools.database.load_string(text, database_format='dbc')
+            self._text_index = DBCTextIndex(text)
             messages_data = []
             
             for msg in self.db.messages:
@@ -90,10 +250,15 @@ class DBCEditor:
                     except:
                         maximum = None
                     
+                    multiplexer_ids = getattr(sig, 'multiplexer_ids', None)
+                    choices = getattr(sig, 'choices', None)
                     signals_data.append({
                         'name': sig.name,
                         'start_bit': getattr(sig, 'start', 0),
                         'length': getattr(sig, 'length', 1),
+                        'byte_order': getattr(sig, 'byte_order', 'little_endian'),
+                        'multiplexer_ids': list(multiplexer_ids) if multiplexer_ids else None,
+                        'is_multiplexer': bool(getattr(sig, 'is_multiplexer', False)),
                         'is_signed': getattr(sig, 'is_signed', False),
                         'scale': scale,
                         'offset': offset,
@@ -101,54 +266,43 @@ class DBCEditor:
                         'maximum': maximum,
                         'unit': getattr(sig, 'unit', '') or '',
                         'receivers': [str(r) for r in getattr(sig, 'receivers', [])],
-                        'comments': self._extract_comment_text(getattr(sig, 'comments', '')) if getattr(sig, 'comments', '') else ''
+                        'comments': self._extract_comment_text(getattr(sig, 'comments', '')) if getattr(sig, 'comments', '') else '',
+                        # Value table (VAL_) and initial value, kept as read; the writer preserves their statements
+                        'choices': {int(k): str(v) for k, v in choices.items()} if choices else None,
+                        'initial': getattr(sig, 'initial', None)
                     })
                 
                 messages_data.append({
                     'name': msg.name,
                     'frame_id': msg.frame_id,
+                    # 'j1939' for VFrameFormat J1939PG messages; decoders match those by PGN
+                    'protocol': getattr(msg, 'protocol', None),
                     'length': msg.length,
                     'senders': [str(s) for s in msg.senders],
                     'signals': signals_data,
-                    'comments': self._extract_comment_text(msg.comment) if msg.comment else ''
+                    'comments': self._extract_comment_text(msg.comment) if msg.comment else '',
+                    # [group name, [signal names]] from SIG_GROUP_ lines
+                    'signal_groups': [[g.name, list(g.signal_names)]
+                                      for g in (getattr(msg, 'signal_groups', None) or [])
+                                      if getattr(g, 'name', None) and getattr(g, 'signal_names', None)]
                 })
             
             self._original_data = {'messages': messages_data}
             # Create a proper deep copy for modified data
-            self._modified_data = {
-                'messages': [
-                    {
-                        'name': msg['name'],
-                        'frame_id': msg['frame_id'],
-                        'length': msg['length'],
-                        'senders': msg['senders'].copy(),
-                        'signals': [
-                            {
-                                'name': sig['name'],
-                                'start_bit': sig['start_bit'],
-                                'length': sig['length'],
-                                'is_signed': sig['is_signed'],
-                                'scale': sig['scale'],
-                                'offset': sig['offset'],
-                                'minimum': sig['minimum'],
-                                'maximum': sig['maximum'],
-                                'unit': sig['unit'],
-                                'receivers': sig['receivers'].copy(),
-                                'comments': sig['comments']
-                            }
-                            for sig in msg['signals']
-                        ],
-                        'comments': msg['comments']
-                    }
-                    for msg in messages_data
-                ]
-            }
+            self._modified_data = copy.deepcopy(self._original_data)
+            self._occupancy_cache = {}
+            self._hash_cache = {}
+            self._origins = {id(m): (m, m['name']) for m in self._modified_data['messages']}
+            self._saved_hashes = [MessageHashes(m) for m in messages_data]
+            self._saved_file_digest = file_digest(self._saved_hashes)
+            self._saved_file_stat = self._file_stat(file_path)
             
             # Verify the copy is independent
             logger.info(f"Original data has {len(self._original_data['messages'])} messages")
             logger.info(f"Modified data has {len(self._modified_data['messages'])} messages")
             
             logger.info(f"Loaded DBC file: {file_path} ({len(messages_data)} messages)")
+            self._notify_change('loaded')
             return self._original_data
             
         except Exception as e:
@@ -158,16 +312,67 @@ class DBCEditor:
     def get_data(self) -> Dict[str, Any]:
         return self._modified_data if self._modified_data else {}
 
+    def get_file_info(self) -> Dict[str, Any]:
+        """Summary of the current file for display: path, node/message/signal counts, size, version, buses."""
+        messages = self._modified_data['messages'] if self._modified_data else []
+        size = 0
+        if self.file_path and os.path.exists(self.file_path):
+            size = os.path.getsize(self.file_path)
+        return {
+            "dbc_file_path": self.file_path,
+            "dbc_node_count": len(getattr(self.db, 'nodes', None) or []),
+            "dbc_message_count": len(messages),
+            "dbc_signal_count": sum(len(m.get('signals', [])) for m in messages),
+            "dbc_file_size": size,
+            "dbc_version": getattr(self.db, 'version', None),
+            "dbc_buses": getattr(self.db, 'buses', None) or [],
+        }
+
+    @_journaled
     def add_message(self, message: Dict[str, Any]) -> None:
         if not self._modified_data:
             self._modified_data = {'messages': []}
         self._modified_data['messages'].append(message)
+        self._notify_change()
 
+    @_journaled
     def update_message(self, idx: int, message: Dict[str, Any]) -> None:
         if not self._modified_data or idx >= len(self._modified_data['messages']):
             raise DBCEditorError("Invalid message index")
+        self._inherit_origin(self._modified_data['messages'][idx], message)
+        self._modified_data['messages'][idx] = message
+        self._notify_change()
+
+    @_journaled
+    def replace_messages(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Replace all messages of the modified data (e.g. with a merge result).
+        The saved state is kept, so the replacement shows up as unsaved changes.
+        """
+        if self._modified_data is None:
+            raise DBCEditorError("No DBC data loaded")
+        self._modified_data['messages'] = messages
+        self._occupancy_cache = {}
+        self._hash_cache = {}
+        self._notify_change()
+
+    @_journaled
+    def set_message_fields(self, idx: int, fields: Dict[str, Any]) -> None:
+        """
+        Update selected properties of the message at idx, keeping the others.
+        Signals are edited through the signal methods, not through fields.
+        """
+        if not self._modified_data or idx < 0 or idx >= len(self._modified_data['messages']):
+            raise DBCEditorError("Invalid message index")
+        if 'signals' in fields:
+            raise DBCEditorError("Signals cannot be replaced through set_message_fields")
+        message = dict(self._modified_data['messages'][idx])
+        message.update(fields)
+        self._inherit_origin(self._modified_data['messages'][idx], message)
         self._modified_data['messages'][idx] = message
+        self._notify_change()
     
+    @_journaled
     def duplicate_message(self, idx: int) -> int:
         """
         Duplicate a message at idx and append it to the list.
@@ -175,27 +380,13 @@ class DBCEditor:
         """
         if not self._modified_data or idx < 0 or idx >= len(self._modified_data['messages']):
             raise DBCEditorError("Invalid message index")
-        original = self._modified_data['messages'][idx]
-        new_message = {
-            'name': original['name'],
-            'frame_id': original['frame_id'],
-            'length': original['length'],
-            'senders': list(original.get('senders', [])),
-            'signals': [dict(sig) for sig in original.get('signals', [])],
-            'comments': original.get('comments', '')
-        }
-        # Ensure unique name by appending "_1", "_2", etc.
-        base_name = original['name']
-        candidate = f"{base_name}_1"
-        suffix = 2
-        existing_names = {m['name'] for m in self._modified_data['messages']}
-        while candidate in existing_names:
-            candidate = f"{base_name}_{suffix}"
-            suffix += 1
-        new_message['name'] = candidate
-        self._modified_data['messages'].append(new_message)
+        self._modified_data['messages'].append(
+            self._copy_message(self._modified_data['messages'][idx],
+                               {m['name'] for m in self._modified_data['messages']}))
+        self._notify_change()
         return len(self._modified_data['messages']) - 1
     
+    @_journaled
     def move_message_up(self, idx: int) -> int:
         """
         Move message at idx up by one position.
@@ -205,8 +396,10 @@ class DBCEditor:
             raise DBCEditorError("Invalid message move operation")
         msgs = self._modified_data['messages']
         msgs[idx - 1], msgs[idx] = msgs[idx], msgs[idx - 1]
+        self._notify_change()
         return idx - 1
     
+    @_journaled
     def move_message_down(self, idx: int) -> int:
         """
         Move message at idx down by one position.
@@ -216,27 +409,59 @@ class DBCEditor:
             raise DBCEditorError("Invalid message move operation")
         msgs = self._modified_data['messages']
         msgs[idx + 1], msgs[idx] = msgs[idx], msgs[idx + 1]
+        self._notify_change()
         return idx + 1
 
+    @_journaled
     def delete_message(self, idx: int) -> None:
         if not self._modified_data or idx >= len(self._modified_data['messages']):
             raise DBCEditorError("Invalid message index")
-        del self._modified_data['messages'][idx]
+        message = self._modified_data['messages'].pop(idx)
+        self._occupancy_cache.pop(id(message), None)
+        self._hash_cache.pop(id(message), None)
+        self._notify_change()
 
+    @_journaled
     def add_signal(self, msg_idx: int, signal: Dict[str, Any]) -> None:
         if not self._modified_data or msg_idx >= len(self._modified_data['messages']):
             raise DBCEditorError("Invalid message index")
-        self._modified_data['messages'][msg_idx]['signals'].append(signal)
+        message = self._modified_data['messages'][msg_idx]
+        message['signals'].append(signal)
+        self._update_occupancy(message, None, signal)
+        self._hash_cache.pop(id(message), None)
         logger.info(f"Added signal '{signal['name']}' to message {msg_idx}")
+        self._notify_change()
 
+    @_journaled
     def update_signal(self, msg_idx: int, sig_idx: int, signal: Dict[str, Any]) -> None:
         if not self._modified_data or msg_idx >= len(self._modified_data['messages']):
             raise DBCEditorError("Invalid message index")
         if sig_idx >= len(self._modified_data['messages'][msg_idx]['signals']):
             raise DBCEditorError("Invalid signal index")
-        self._modified_data['messages'][msg_idx]['signals'][sig_idx] = signal
+        message = self._modified_data['messages'][msg_idx]
+        old_signal = message['signals'][sig_idx]
+        message['signals'][sig_idx] = signal
+        self._update_occupancy(message, old_signal, signal)
+        self._hash_cache.pop(id(message), None)
         logger.info(f"Updated signal '{signal['name']}' in message {msg_idx}")
+        self._notify_change()
+
+    @_journaled
+    def set_signal_fields(self, msg_idx: int, sig_idx: int, fields: Dict[str, Any]) -> None:
+        """
+        Update selected properties of a signal (e.g. scale, name or receivers),
+        keeping the others. Useful for bulk rescaling/renaming in apply_batch().
+        """
+        if not self._modified_data or msg_idx < 0 or msg_idx >= len(self._modified_data['messages']):
+            raise DBCEditorError("Invalid message index")
+        signals = self._modified_data['messages'][msg_idx]['signals']
+        if sig_idx < 0 or sig_idx >= len(signals):
+            raise DBCEditorError("Invalid signal index")
+        signal = dict(signals[sig_idx])
+        signal.update(fields)
+        self.update_signal(msg_idx, sig_idx, signal)
     
+    @_journaled
     def duplicate_signal(self, msg_idx: int, sig_idx: int) -> int:
         """
         Duplicate signal at sig_idx within message msg_idx.
@@ -247,20 +472,12 @@ class DBCEditor:
         signals = self._modified_data['messages'][msg_idx]['signals']
         if sig_idx < 0 or sig_idx >= len(signals):
             raise DBCEditorError("Invalid signal index")
-        original = signals[sig_idx]
-        new_signal = dict(original)
-        # Ensure unique name by appending "_1", "_2", etc.
-        base_name = original['name']
-        candidate = f"{base_name}_1"
-        suffix = 2
-        existing_names = {s['name'] for s in signals}
-        while candidate in existing_names:
-            candidate = f"{base_name}_{suffix}"
-            suffix += 1
-        new_signal['name'] = candidate
-        signals.append(new_signal)
+        message = self._modified_data['messages'][msg_idx]
+        self._append_signal_copy(message, signals[sig_idx], {s['name'] for s in signals})
+        self._notify_change()
         return len(signals) - 1
     
+    @_journaled
     def move_signal_up(self, msg_idx: int, sig_idx: int) -> int:
         """
         Move signal at sig_idx up within message msg_idx.
@@ -273,8 +490,11 @@ class DBCEditor:
         if sig_idx <= 0 or sig_idx >= len(signals):
             raise DBCEditorError("Invalid signal move operation")
         signals[sig_idx - 1], signals[sig_idx] = signals[sig_idx], signals[sig_idx - 1]
+        self._hash_cache.pop(id(self._modified_data['messages'][msg_idx]), None)
+        self._notify_change()
         return sig_idx - 1
     
+    @_journaled
     def move_signal_down(self, msg_idx: int, sig_idx: int) -> int:
         """
         Move signal at sig_idx down within message msg_idx.
@@ -287,202 +507,1008 @@ class DBCEditor:
         if sig_idx < 0 or sig_idx >= len(signals) - 1:
             raise DBCEditorError("Invalid signal move operation")
         signals[sig_idx + 1], signals[sig_idx] = signals[sig_idx], signals[sig_idx + 1]
+        self._hash_cache.pop(id(self._modified_data['messages'][msg_idx]), None)
+        self._notify_change()
         return sig_idx + 1
 
+    @_journaled
     def delete_signal(self, msg_idx: int, sig_idx: int) -> None:
         if not self._modified_data or msg_idx >= len(self._modified_data['messages']):
             raise DBCEditorError("Invalid message index")
         if sig_idx >= len(self._modified_data['messages'][msg_idx]['signals']):
             raise DBCEditorError("Invalid signal index")
-        signal_name = self._modified_data['messages'][msg_idx]['signals'][sig_idx]['name']
-        del self._modified_data['messages'][msg_idx]['signals'][sig_idx]
+        message = self._modified_data['messages'][msg_idx]
+        old_signal = message['signals'].pop(sig_idx)
+        signal_name = old_signal['name']
+        self._update_occupancy(message, old_signal, None)
+        self._hash_cache.pop(id(message), None)
         logger.info(f"Deleted signal '{signal_name}' from message {msg_idx}")
+        self._notify_change()
 
-    def save_dbc_file(self, file_path: Optional[str] = None) -> None:
+    def _origin(self, message: Dict[str, Any]) -> Optional[str]:
+        """Name of the saved message that message was loaded or saved as, None for new messages."""
+        entry = self._origins.get(id(message))
+        return entry[1] if entry is not None and entry[0] is message else None
+
+    def _inherit_origin(self, old: Dict[str, Any], new: Dict[str, Any]) -> None:
+        """new replaces old in the data. old keeps its entry, a rolled back batch may put it back."""
+        origin = self._origin(old)
+        if origin is not None:
+            self._origins[id(new)] = (new, origin)
+
+    @staticmethod
+    def _unique_copy_name(base_name: str, existing_names: set) -> str:
+        """Name for a copy: base_name with "_1", "_2", ... appended; added to existing_names."""
+        candidate = f"{base_name}_1"
+        suffix = 2
+        while candidate in existing_names:
+            candidate = f"{base_name}_{suffix}"
+            suffix += 1
+        existing_names.add(candidate)
+        return candidate
+
+    def _copy_message(self, original: Dict[str, Any], existing_names: set) -> Dict[str, Any]:
+        new_message = dict(original)
+        new_message.update({
+            'senders': list(original.get('senders', [])),
+            'signals': [dict(sig) for sig in original.get('signals', [])],
+            'comments': original.get('comments', '')
+        })
+        new_message['name'] = self._unique_copy_name(original['name'], existing_names)
+        return new_message
+
+    def _append_signal_copy(self, message: Dict[str, Any], original: Dict[str, Any],
+                            existing_names: set) -> None:
+        new_signal = dict(original)
+        new_signal['name'] = self._unique_copy_name(original['name'], existing_names)
+        message['signals'].append(new_signal)
+        self._update_occupancy(message, None, new_signal)
+        self._hash_cache.pop(id(message), None)
+
+    def _message_signals(self, msg_idx: int) -> List[Dict[str, Any]]:
+        if not self._modified_data or msg_idx < 0 or msg_idx >= len(self._modified_data['messages']):
+            raise DBCEditorError("Invalid message index")
+        return self._modified_data['messages'][msg_idx]['signals']
+
+    @_journaled
+    def delete_messages(self, indices: List[int]) -> None:
+        """Delete the messages at the given indices in one change."""
+        if not self._modified_data:
+            raise DBCEditorError("Invalid message index")
+        messages = self._modified_data['messages']
+        rows = set(_checked_rows(indices, len(messages), "message"))
+        if not rows:
+            return
+        kept = []
+        for idx, message in enumerate(messages):
+            if idx in rows:
+                self._occupancy_cache.pop(id(message), None)
+                self._hash_cache.pop(id(message), None)
+            else:
+                kept.append(message)
+        messages[:] = kept
+        logger.info(f"Deleted {len(rows)} messages")
+        self._notify_change()
+
+    @_journaled
+    def move_messages(self, indices: List[int], step: int) -> List[int]:
         """
-        Save the modified DBC data to a file using cantools.
-        Creates a backup of the original file before saving.
+        Move the messages at the given indices up (step -1) or down (step 1) by
+        one position as a block, keeping their order. Returns their new indices.
         """
+        if not self._modified_data or step not in (-1, 1):
+            raise DBCEditorError("Invalid message move operation")
+        messages = self._modified_data['messages']
+        rows = _checked_rows(indices, len(messages), "message")
+        new_rows = _move_rows(messages, rows, step)
+        if new_rows != rows:
+            self._notify_change()
+        return new_rows
+
+    @_journaled
+    def duplicate_messages(self, indices: List[int]) -> List[int]:
+        """
+        Duplicate the messages at the given indices, appending the copies in order.
+        Returns the indices of the copies.
+        """
+        if not self._modified_data:
+            raise DBCEditorError("Invalid message index")
+        messages = self._modified_data['messages']
+        rows = _checked_rows(indices, len(messages), "message")
+        existing_names = {m['name'] for m in messages}
+        copies = [self._copy_message(messages[idx], existing_names) for idx in rows]
+        first = len(messages)
+        messages.extend(copies)
+        if copies:
+            self._notify_change()
+        return list(range(first, len(messages)))
+
+    @_journaled
+    def delete_signals(self, msg_idx: int, indices: List[int]) -> None:
+        """Delete the signals at the given indices of message msg_idx in one change."""
+        signals = self._message_signals(msg_idx)
+        rows = set(_checked_rows(indices, len(signals), "signal"))
+        if not rows:
+            return
+        message = self._modified_data['messages'][msg_idx]
+        kept = []
+        for idx, signal in enumerate(signals):
+            if idx in rows:
+                self._update_occupancy(message, signal, None)
+            else:
+                kept.append(signal)
+        signals[:] = kept
+        self._hash_cache.pop(id(message), None)
+        logger.info(f"Deleted {len(rows)} signals from message {msg_idx}")
+        self._notify_change()
+
+    @_journaled
+    def move_signals(self, msg_idx: int, indices: List[int], step: int) -> List[int]:
+        """
+        Move the signals at the given indices of message msg_idx up (step -1) or
+        down (step 1) by one position as a block. Returns their new indices.
+        """
+        signals = self._message_signals(msg_idx)
+        if step not in (-1, 1):
+            raise DBCEditorError("Invalid signal move operation")
+        rows = _checked_rows(indices, len(signals), "signal")
+        new_rows = _move_rows(signals, rows, step)
+        if new_rows != rows:
+            self._hash_cache.pop(id(self._modified_data['messages'][msg_idx]), None)
+            self._notify_change()
+        return new_rows
+
+    @_journaled
+    def duplicate_signals(self, msg_idx: int, indices: List[int]) -> List[int]:
+        """
+        Duplicate the signals at the given indices within message msg_idx.
+        Returns the indices of the copies.
+        """
+        signals = self._message_signals(msg_idx)
+        rows = _checked_rows(indices, len(signals), "signal")
+        message = self._modified_data['messages'][msg_idx]
+        existing_names = {s['name'] for s in signals}
+        originals = [signals[idx] for idx in rows]
+        first = len(signals)
+        for original in originals:
+            self._append_signal_copy(message, original, existing_names)
+        if originals:
+            self._notify_change()
+        return list(range(first, len(signals)))
+
+    def validate(self, msg_indices: Optional[Iterable[int]] = None) -> List[str]:
+        """
+        Validate the modified data in a single pass.
+        Message names must be unique across the file; the per-message checks
+        (names, lengths, duplicate signal names) run on msg_indices, or on every
+        message when msg_indices is None.
+        Returns a list of human-readable error strings (empty when valid).
+        """
+        if not self._modified_data:
+            return []
+        messages = self._modified_data['messages']
+        errors = self._validate_message_names(messages)
+        
+        if msg_indices is None:
+            msg_indices = range(len(messages))
+        for idx in msg_indices:
+            errors.extend(self._validate_message(messages[idx], self.get_occupancy(idx)))
+        return errors
+
+    @staticmethod
+    def _validate_message_names(messages) -> List[str]:
+        errors = []
+        seen_names = set()
+        for msg in messages:
+            name = msg.get('name')
+            if not name:
+                errors.append("A message has no name")
+            elif name in seen_names:
+                errors.append(f"Duplicate message name '{name}'")
+            seen_names.add(name)
+        return errors
+
+    def _validate_message(self, msg: Dict[str, Any], occupancy: MessageOccupancy) -> List[str]:
+        """Check one message: lengths, duplicate signal names, bit bounds and overlaps."""
+        errors = []
+        msg_name = msg.get('name')
+        length = msg.get('length')
+        if not isinstance(length, int) or length < 0:
+            errors.append(f"Message '{msg_name}' has an invalid length")
+            return errors
+        
+        signal_names = set()
+        for sig in msg.get('signals', []):
+            sig_name = sig.get('name')
+            if not sig_name:
+                errors.append(f"Message '{msg_name}' has a signal without a name")
+            elif sig_name in signal_names:
+                errors.append(f"Duplicate signal name '{sig_name}' in message '{msg_name}'")
+            signal_names.add(sig_name)
+            if not isinstance(sig.get('length'), int) or sig['length'] < 1:
+                errors.append(f"Signal '{msg_name}.{sig_name}' has an invalid length")
+            elif signal_bit_mask(sig.get('start_bit', 0), sig['length'],
+                                 sig.get('byte_order', 'little_endian'), length) is None:
+                errors.append(f"Signal '{msg_name}.{sig_name}' does not fit in {length} bytes")
+        
+        conflicts = occupancy.conflicts()
+        if conflicts:
+            names = [sig['name'] for sig in msg.get('signals', []) if self._signal_mask(sig) & conflicts]
+            errors.append(f"Overlapping signals in message '{msg_name}': {', '.join(names)}")
+        return errors
+
+    @staticmethod
+    def _signal_mask(signal: Dict[str, Any]) -> int:
+        """Bitmap of a signal's payload bits, ignoring the message length."""
+        return signal_bit_mask(signal.get('start_bit', 0), signal.get('length', 1),
+                               signal.get('byte_order', 'little_endian')) or 0
+
+    def _build_occupancy(self, message: Dict[str, Any]) -> MessageOccupancy:
+        occupancy = MessageOccupancy(message.get('length', 8))
+        for sig in message.get('signals', []):
+            occupancy.add(self._signal_mask(sig), sig.get('multiplexer_ids'))
+        return occupancy
+
+    def get_occupancy(self, msg_idx: int) -> MessageOccupancy:
+        """
+        Return the bit occupancy of the message at msg_idx.
+        It is built on first use and then kept up to date by the signal operations.
+        """
+        if not self._modified_data or msg_idx < 0 or msg_idx >= len(self._modified_data['messages']):
+            raise DBCEditorError("Invalid message index")
+        message = self._modified_data['messages'][msg_idx]
+        cached = self._occupancy_cache.get(id(message))
+        if cached and cached[0] is message and cached[1].message_length == message.get('length', 8):
+            return cached[1]
+        occupancy = self._build_occupancy(message)
+        self._occupancy_cache[id(message)] = (message, occupancy)
+        return occupancy
+
+    def _update_occupancy(self, message: Dict[str, Any], old_signal=None, new_signal=None) -> None:
+        """Apply a signal replacement to the cached occupancy of message, if there is one."""
+        cached = self._occupancy_cache.get(id(message))
+        if not cached or cached[0] is not message:
+            return
+        occupancy = cached[1]
+        if old_signal is not None:
+            occupancy.remove(self._signal_mask(old_signal), old_signal.get('multiplexer_ids'))
+        if new_signal is not None:
+            occupancy.add(self._signal_mask(new_signal), new_signal.get('multiplexer_ids'))
+
+    def find_free_start_bit(self, msg_idx: int, length: int, byte_order: str = 'little_endian',
+                            strategy: str = 'first_fit', multiplexer_ids=None,
+                            exclude_sig_idx: Optional[int] = None) -> Optional[int]:
+        """
+        Propose a start bit for a signal of `length` bits in message msg_idx.
+        strategy is 'first_fit' or 'best_fit'. The bits of exclude_sig_idx (the signal
+        being edited) count as free. Returns None if the message has no free
+        contiguous range of that length.
+        """
+        occupancy = self.get_occupancy(msg_idx)
+        message = self._modified_data['messages'][msg_idx]
+        edited = message['signals'][exclude_sig_idx] if exclude_sig_idx is not None else None
+        if edited is not None:
+            occupancy.remove(self._signal_mask(edited), edited.get('multiplexer_ids'))
         try:
-            if file_path is None:
-                file_path = self.file_path
-            if not file_path:
-                raise DBCEditorError("No file path specified for saving")
-            
-            # Create backup of original file
-            if os.path.exists(file_path):
-                backup_path = file_path + '.backup'
-                shutil.copy2(file_path, backup_path)
-                logger.info(f"Created backup: {backup_path}")
-            
-            # Rebuild cantools database from modified data
-            db = cantools.database.Database()
-            
-            for msg in self._modified_data['messages']:
-                signals = []
-                for sig in msg['signals']:
-                    # Create signal with safe property access
-                    signal = cantools.database.can.Signal(
-                        name=sig['name'],
-                        start=sig['start_bit'],
-                        length=sig['length'],
-                        is_signed=sig['is_signed'],
-                        receivers=sig['receivers']
-                    )
-                    
-                    # Set additional properties after creation
-                    signal.scale = sig['scale']
-                    signal.offset = sig['offset']
-                    # Handle None values for minimum and maximum
-                    signal.minimum = sig['minimum'] if sig['minimum'] is not None else None
-                    signal.maximum = sig['maximum'] if sig['maximum'] is not None else None
-                    signal.unit = sig['unit']
-                    
-                    # Set comment if available
-                    if sig.get('comments'):
-                        signal.comment = sig['comments']
-                    
-                    signals.append(signal)
-                
-                # Create message
-                message = cantools.database.can.Message(
-                    frame_id=msg['frame_id'],
-                    name=msg['name'],
-                    length=msg['length'],
-                    senders=msg['senders'],
-                    signals=signals,
-                    is_extended_frame=msg['frame_id'] > 0x7FF  # Use extended frame for IDs > 11 bits
-                )
-                
-                # Set comment if available
-                if msg.get('comments'):
-                    message.comment = msg['comments']
-                
-                db.messages.append(message)
-            
-            # Write to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(db.as_dbc_string())
-            
-            # Update original data to reflect saved state
-            self._original_data = {'messages': [dict(m) for m in self._modified_data['messages']]}
-            
-            # Clean up backup file after successful save
-            self._cleanup_backup_file(file_path)
-            
-            logger.info(f"Saved DBC file: {file_path}")
+            occupied = occupancy.occupied(multiplexer_ids)
+        finally:
+            if edited is not None:
+                occupancy.add(self._signal_mask(edited), edited.get('multiplexer_ids'))
+        return find_free_range(occupied, length, message.get('length', 8), byte_order, strategy)
+
+    @_journaled
+    def pack_signals(self, msg_idx: int, signals: List[Dict[str, Any]],
+                     strategy: str = 'first_fit') -> List[int]:
+        """
+        Allocate free bits for each signal (in the given order) and add them all to
+        message msg_idx as one batch. The signals' own start_bit values are ignored.
+        Raises DBCEditorError, without changing anything, if a signal does not fit.
+        Returns the start bits that were assigned.
+        """
+        if not self._modified_data or msg_idx < 0 or msg_idx >= len(self._modified_data['messages']):
+            raise DBCEditorError("Invalid message index")
+        message = self._modified_data['messages'][msg_idx]
+        occupancy = self.get_occupancy(msg_idx)
+        placed = []  # (mask, multiplexer_ids) of the signals allocated so far
+        operations = []
+        start_bits = []
+        for signal in signals:
+            byte_order = signal.get('byte_order', 'little_endian')
+            multiplexer_ids = signal.get('multiplexer_ids')
+            occupied = occupancy.occupied(multiplexer_ids)
+            for mask, other_ids in placed:
+                if not multiplexer_ids or not other_ids or set(multiplexer_ids) & set(other_ids):
+                    occupied |= mask
+            start_bit = find_free_range(occupied, signal.get('length', 1), message.get('length', 8),
+                                        byte_order, strategy)
+            if start_bit is None:
+                raise DBCEditorError(f"No free range of {signal.get('length', 1)} bits for "
+                                     f"signal '{signal.get('name')}' in message '{message['name']}'")
+            new_signal = dict(signal, start_bit=start_bit)
+            placed.append((self._signal_mask(new_signal), multiplexer_ids))
+            operations.append({'op': 'add_signal', 'msg_idx': msg_idx, 'signal': new_signal})
+            start_bits.append(start_bit)
+        self.apply_batch(operations)
+        return start_bits
+
+    def check_signal_layout(self, msg_idx: int, signal: Dict[str, Any],
+                            sig_idx: Optional[int] = None) -> List[str]:
+        """
+        Check where a signal would sit in message msg_idx without changing anything.
+        sig_idx is the signal being edited (it is ignored for the overlap test).
+        Returns a list of problems: out of bounds and/or the overlapped signal names.
+        """
+        message = self._modified_data['messages'][msg_idx]
+        problems = []
+        length = message.get('length', 8)
+        start_bit = signal.get('start_bit', 0)
+        bit_length = signal.get('length', 1)
+        byte_order = signal.get('byte_order', 'little_endian')
+        if signal_bit_mask(start_bit, bit_length, byte_order, length) is None:
+            problems.append(f"Bits {start_bit}|{bit_length} do not fit in {length} bytes")
+        
+        mask = self._signal_mask(signal)
+        multiplexer_ids = signal.get('multiplexer_ids')
+        occupancy = self.get_occupancy(msg_idx)
+        edited = message['signals'][sig_idx] if sig_idx is not None else None
+        if edited is not None:
+            occupancy.remove(self._signal_mask(edited), edited.get('multiplexer_ids'))
+        try:
+            collides = mask & occupancy.occupied(multiplexer_ids)
+        finally:
+            if edited is not None:
+                occupancy.add(self._signal_mask(edited), edited.get('multiplexer_ids'))
+        
+        if collides:
+            names = []
+            for idx, other in enumerate(message['signals']):
+                if idx == sig_idx or not mask & self._signal_mask(other):
+                    continue
+                other_ids = other.get('multiplexer_ids')
+                if multiplexer_ids and other_ids and not set(multiplexer_ids) & set(other_ids):
+                    continue
+                names.append(other['name'])
+            problems.append(f"Overlaps {', '.join(names)}")
+        return problems
+
+    @_journaled
+    def apply_batch(self, operations: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Apply a list of edit operations atomically.
+        Each operation is a dict naming one of BATCH_OPERATIONS in 'op' plus that
+        method's keyword arguments, e.g.
+            {'op': 'set_signal_fields', 'msg_idx': 0, 'sig_idx': 2, 'fields': {'scale': 0.1}}
+        The touched messages are validated once after all operations. If an operation
+        or the validation fails, the data is rolled back and DBCEditorError is raised.
+        Listeners receive one 'changed' notification for the whole batch.
+        Returns the list of return values of the individual operations.
+        """
+        if self._modified_data is None:
+            raise DBCEditorError("No DBC data loaded")
+        messages = self._modified_data['messages']
+        saved_order = list(messages)
+        # Messages mutated in place by signal operations, saved on first touch: id -> (message, copy)
+        saved_messages = {}
+        results = []
+        
+        self._batch_depth += 1
+        try:
+            for i, operation in enumerate(operations):
+                op_name = operation.get('op')
+                if op_name not in self.BATCH_OPERATIONS:
+                    raise DBCEditorError(f"Operation {i}: unsupported operation '{op_name}'")
+                kwargs = {k: v for k, v in operation.items() if k != 'op'}
+                msg_idx = kwargs.get('msg_idx')
+                if isinstance(msg_idx, int) and 0 <= msg_idx < len(messages):
+                    message = messages[msg_idx]
+                    if id(message) not in saved_messages:
+                        saved_messages[id(message)] = (message, copy.deepcopy(message))
+                try:
+                    results.append(getattr(self, op_name)(**kwargs))
+                except (DBCEditorError, TypeError, KeyError) as e:
+                    raise DBCEditorError(f"Operation {i} ({op_name}) failed: {e}")
             
+            original_ids = {id(m) for m in saved_order}
+            touched = [idx for idx, m in enumerate(messages)
+                       if id(m) in saved_messages or id(m) not in original_ids]
+            errors = self.validate(touched)
+            if errors:
+                # Problems that were already there before the batch do not block it
+                current_ids = {id(m) for m in messages}
+                previous = set(self._validate_message_names(saved_order))
+                for saved in [saved for _, saved in saved_messages.values()] + \
+                             [m for m in saved_order if id(m) not in current_ids]:
+                    previous.update(self._validate_message(saved, self._build_occupancy(saved)))
+                errors = [e for e in errors if e not in previous]
+            if errors:
+                more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+                raise DBCEditorError(f"Batch validation failed: {'; '.join(errors[:5])}{more}")
+        except Exception:
+            for message, saved in saved_messages.values():
+                message.clear()
+                message.update(saved)
+                self._occupancy_cache.pop(id(message), None)
+                self._hash_cache.pop(id(message), None)
+            messages[:] = saved_order
+            if self._batch_depth == 1:
+                self._batch_pending = False
+            raise
+        finally:
+            self._batch_depth -= 1
+        
+        logger.info(f"Applied batch of {len(operations)} operations")
+        if self._batch_depth == 0 and self._batch_pending:
+            self._batch_pending = False
+            self._notify_change()
+        return results
+
+    def _record_operation(self, op_name: str, arguments: Dict[str, Any]) -> None:
+        if self._journal is None:
+            # Unsaved new files have no place for a journal yet
+            if not self.file_path or not os.path.exists(self.file_path):
+                return
+            self._journal = OperationJournal(self.file_path)
+        self._journal.append({'op': op_name, **arguments})
+
+    def _close_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.discard()
+            self._journal = None
+
+    def discard_journal(self) -> None:
+        """Delete the journal of the current file, e.g. when its unsaved edits are given up."""
+        self._close_journal()
+        if self.file_path and os.path.exists(journal_path(self.file_path)):
+            try:
+                os.remove(journal_path(self.file_path))
+            except OSError as e:
+                logger.warning(f"Could not delete journal of {self.file_path}: {e}")
+
+    def sync_journal(self) -> None:
+        """fsync the journaled operations that are not synced yet (e.g. when the app goes idle)."""
+        if self._journal is not None:
+            try:
+                self._journal.sync()
+            except OSError as e:
+                logger.warning(f"Could not sync journal: {e}")
+
+    def recoverable_operations(self) -> int:
+        """
+        Number of unsaved operations left in the journal of the loaded file by a
+        session that did not end normally, 0 if there are none or the file has
+        changed since they were recorded.
+        """
+        if not self.file_path or self._journal is not None:
+            return 0
+        journal = read_journal(self.file_path)
+        if not journal or not journal[1]:
+            return 0
+        try:
+            if journal[0] != file_content_digest(self.file_path):
+                logger.warning(f"Journal of {self.file_path} does not match the file, ignoring it")
+                return 0
+        except OSError:
+            return 0
+        return len(journal[1])
+
+    def recover_from_journal(self) -> int:
+        """
+        Replay the journal of the loaded file on top of it (see recoverable_operations()).
+        The replayed operations become unsaved changes and start the new journal.
+        Listeners get one 'changed' notification. Returns the number of replayed operations.
+        """
+        if not self.recoverable_operations():
+            raise DBCEditorError("No recoverable changes for this file")
+        operations = read_journal(self.file_path)[1]
+        replayed = 0
+        self._batch_depth += 1
+        try:
+            for operation in operations:
+                op_name = operation.get('op')
+                if op_name not in self.BATCH_OPERATIONS + ('apply_batch', 'replace_messages'):
+                    raise DBCEditorError(f"Journal operation {replayed}: unsupported operation '{op_name}'")
+                kwargs = {k: v for k, v in operation.items() if k != 'op'}
+                try:
+                    getattr(self, op_name)(**kwargs)
+                except (DBCEditorError, TypeError, KeyError) as e:
+                    raise DBCEditorError(f"Journal operation {replayed} ({op_name}) failed: {e}")
+                replayed += 1
+        finally:
+            self._batch_depth -= 1
+            logger.info(f"Replayed {replayed} of {len(operations)} journaled operations")
+            if self._batch_depth == 0 and self._batch_pending:
+                self._batch_pending = False
+                self._notify_change()
+        return replayed
+
+    def save_dbc_file(self, file_path: Optional[str] = None) -> None:
+        """
+        Save the modified DBC data to a file.
+        Unchanged messages, signals and statements are written back exactly as
+        they were read; only edited parts are re-formatted (see dbc_writer).
+        The text is streamed to a temporary file next to the target, which then
+        replaces the target in one step, so a failed save never leaves a partial file.
+        """
+        if not self.needs_save(file_path):
+            logger.info(f"No changes to save: {file_path or self.file_path}")
+            return
+        snapshot = self.prepare_save(file_path)
+        index = self.write_snapshot(snapshot)
+        self.commit_save(snapshot, index)
+
+    def message_hashes(self, message: Dict[str, Any]) -> MessageHashes:
+        """
+        Hashes of one of the messages in get_data(), cached until one of the
+        mutators touches it (see diff_models' hash arguments).
+        """
+        cached = self._hash_cache.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        hashes = MessageHashes(message)
+        self._hash_cache[id(message)] = (message, hashes)
+        return hashes
+
+    def message_hash(self, msg_idx: int) -> bytes:
+        """Content digest of the message at msg_idx (see dbc_hashing)."""
+        if not self._modified_data or msg_idx < 0 or msg_idx >= len(self._modified_data['messages']):
+            raise DBCEditorError("Invalid message index")
+        return self.message_hashes(self._modified_data['messages'][msg_idx]).digest
+
+    def file_hash(self) -> bytes:
+        """Root digest over all message digests of the modified data."""
+        if not self._modified_data:
+            return file_digest([])
+        return file_digest(self.message_hashes(m) for m in self._modified_data['messages'])
+
+    @staticmethod
+    def _file_stat(file_path: str):
+        try:
+            st = os.stat(file_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def needs_save(self, file_path: Optional[str] = None) -> bool:
+        """
+        False when saving to file_path would write what is already there: same
+        file as loaded/last saved, untouched on disk since (mtime and size), and
+        every message hash equal to the saved one.
+        """
+        if file_path is None:
+            file_path = self.file_path
+        if not file_path or self._modified_data is None or self._original_data is None:
+            return True
+        if self.file_path is None or os.path.abspath(file_path) != os.path.abspath(self.file_path):
+            return True
+        if self._saved_file_stat is None or self._file_stat(file_path) != self._saved_file_stat:
+            return True
+        return self.file_hash() != self._saved_file_digest
+
+    def prepare_save(self, file_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        First step of a save: take an immutable snapshot of the current data.
+        write_snapshot() only reads the snapshot, so it can run on a worker thread
+        while the model keeps being edited; commit_save() then marks the snapshot
+        as the saved state, leaving later edits as unsaved changes.
+        """
+        if file_path is None:
+            file_path = self.file_path
+        if not file_path:
+            raise DBCEditorError("No file path specified for saving")
+        if self._modified_data is None:
+            raise DBCEditorError("No DBC data to save")
+        if self._text_index is None:
+            self._text_index = DBCTextIndex(cantools.database.Database().as_dbc_string())
+        original_messages = self._original_data['messages'] if self._original_data else []
+        saved_by_name = {m['name']: (m, hashes.digest) for m, hashes in zip(original_messages, self._saved_hashes)}
+        # Messages whose hash equals the saved one are shared with the (never mutated)
+        # saved state instead of copied, and the writer reuses their text without comparing
+        messages, hashes, unchanged = [], [], {}
+        for message in self._modified_data['messages']:
+            message_hashes = self.message_hashes(message)
+            saved = saved_by_name.get(message['name'])
+            if saved is not None and saved[1] == message_hashes.digest:
+                message = saved[0]
+                unchanged[id(message)] = True
+            else:
+                message = copy.deepcopy(message)
+                # Hashes must refer to the copy, the edited dict may change during the save
+                message_hashes = MessageHashes(message)
+            messages.append(message)
+            hashes.append(message_hashes)
+        sources = list(self._modified_data['messages'])
+        return {
+            'file_path': file_path,
+            'messages': messages,
+            'hashes': hashes,
+            'unchanged': unchanged,
+            # The edited message dicts, and the saved message each one came from
+            'sources': sources,
+            'origins': [self._origin(message) for message in sources],
+            # _original_data and the text index are replaced, never modified, on commit
+            'original_messages': original_messages,
+            'text_index': self._text_index,
+            'encoding': self._file_encoding,
+            # Journaled operations included in this snapshot
+            'journal_position': len(self._journal) if self._journal is not None else 0,
+            'keep_history': self.keep_history,
+        }
+
+    def write_snapshot(self, snapshot: Dict[str, Any],
+                       progress: Optional[Callable[[int, int], None]] = None) -> DBCTextIndex:
+        """
+        Second step of a save: render the snapshot and write it to its file.
+        Does not touch the editor state. progress(done, total) is called as
+        message blocks are written. Returns the text index of the written file.
+        The previous and the written contents are added to the file's history.
+        """
+        file_path = snapshot['file_path']
+        history = DBCHistory(file_path) if snapshot.get('keep_history') else None
+        previous = None
+        try:
+            if history is not None:
+                previous = self._record_history(history)
+            # Re-render only the messages/statements that changed since the last load/save
+            index = snapshot['text_index'].render(snapshot['original_messages'], snapshot['messages'],
+                                                  snapshot.get('unchanged'), snapshot.get('origins'))
+            # Write to file, keeping the original encoding and line endings
+            self._write_atomic(file_path, index.iter_chunks(progress), snapshot['encoding'])
         except Exception as e:
             logger.error(f"Failed to save DBC: {e}")
             raise DBCEditorError(f"Failed to save DBC: {e}")
+        if history is not None:
+            self._record_history(history, previous)
+        return index
+
+    @staticmethod
+    def _record_history(history: DBCHistory, previous: Optional[bytes] = None) -> Optional[bytes]:
+        """Add the file as it is on disk to its history; a failing history never fails a save."""
+        try:
+            if previous is None:
+                return history.record_current_file()
+            with open(history.file_path, 'rb') as f:
+                data = f.read()
+            history.add_version(data, previous)
+            return data
+        except (OSError, DBCHistoryError) as e:
+            logger.warning(f"Could not update the history of {history.file_path}: {e}")
+            return None
+
+    def get_history(self) -> DBCHistory:
+        """History of the saved versions of the current file."""
+        if not self.file_path:
+            raise DBCEditorError("The file has not been saved yet")
+        return DBCHistory(self.file_path)
+
+    def restore_version(self, version: int) -> Dict[str, Any]:
+        """
+        Replace the file with a version from its history and reload it; unsaved
+        changes are discarded. The file as it was is kept in the history, and
+        the restored contents become its newest version.
+        """
+        history = self.get_history()
+        try:
+            data = history.read_version(version)
+        except DBCHistoryError as e:
+            raise DBCEditorError(f"Failed to restore version {version}: {e}")
+        file_path = self.file_path
+        try:
+            history.record_current_file()
+            # latin-1 maps every byte to one character, so the bytes are written unchanged
+            self._write_atomic(file_path, [data.decode('latin-1')], 'latin-1')
+            history.add_version(data)
+        except (OSError, DBCHistoryError) as e:
+            raise DBCEditorError(f"Failed to restore version {version}: {e}")
+        self.discard_journal()
+        logger.info(f"Restored version {version} of {file_path}")
+        return self.load_dbc_file(file_path)
+
+    def commit_save(self, snapshot: Dict[str, Any], index: DBCTextIndex) -> None:
+        """Last step of a save: make the written snapshot the saved state."""
+        file_path = snapshot['file_path']
+        self.file_path = file_path
+        self._text_index = index
+        self._original_data = {'messages': snapshot['messages']}
+        self._saved_hashes = snapshot['hashes']
+        self._saved_file_digest = file_digest(self._saved_hashes)
+        self._saved_file_stat = self._file_stat(file_path)
+        # Drop cache entries of messages that are no longer part of the data
+        current = {id(m) for m in self._modified_data['messages']} if self._modified_data else set()
+        self._hash_cache = {k: v for k, v in self._hash_cache.items() if k in current}
+        self._rebase_origins(snapshot)
+        # The saved file contains the journaled edits up to the snapshot
+        if self._journal is not None:
+            self._journal.rebase(file_path, snapshot.get('journal_position', 0))
+            if not len(self._journal):
+                self._journal = None
+        # Remove a .backup left behind by saves of older versions
+        self._cleanup_backup_file(file_path)
+        logger.info(f"Saved DBC file: {file_path}")
+        self._notify_change('saved')
+
+    def _rebase_origins(self, snapshot: Dict[str, Any]) -> None:
+        """
+        After a save, each edited message comes from the message it was saved
+        as; messages replaced while the save ran follow the message their
+        predecessor came from.
+        """
+        names = [message['name'] for message in snapshot['messages']]
+        saved_as = {id(source): name for source, name in zip(snapshot['sources'], names)}
+        renamed = {origin: name for origin, name in zip(snapshot['origins'], names) if origin is not None}
+        origins = {}
+        for message in self._modified_data['messages'] if self._modified_data else []:
+            name = saved_as.get(id(message), renamed.get(self._origin(message)))
+            if name is not None:
+                origins[id(message)] = (message, name)
+        self._origins = origins
+
+    @staticmethod
+    def _write_atomic(file_path: str, chunks: Iterable[str], encoding: str = 'utf-8') -> None:
+        """
+        Stream chunks to a temporary file in the target's directory, fsync it and
+        rename it over file_path. The target is either left untouched or fully replaced.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path) + '.',
+                                         suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding=encoding, newline='', buffering=SAVE_BUFFER_SIZE) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_path)
+            else:
+                # mkstemp creates 0600 files, use the permissions a plain open() would give
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        if hasattr(os, 'O_DIRECTORY'):
+            # Persist the rename itself (not supported on Windows)
+            try:
+                dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _read_dbc_text(file_path: str):
+        """Return (text, encoding) of a DBC file: UTF-8 if it decodes, else cp1252 like cantools."""
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        for encoding in ('utf-8', 'cp1252'):
+            try:
+                return raw.decode(encoding), encoding
+            except UnicodeDecodeError:
+                continue
+        return raw.decode('latin-1'), 'latin-1'
 
     def has_changes(self) -> bool:
-        """Improved change detection using deep comparison."""
+        """
+        Change detection through the hash tree: the file digest is compared with
+        the saved one, using cached message digests (only edited messages are re-hashed).
+        """
         if not self._original_data or not self._modified_data:
             return False
-        
-        try:
-            # Compare message counts first
-            orig_msg_count = len(self._original_data['messages'])
-            mod_msg_count = len(self._modified_data['messages'])
-            
-            if orig_msg_count != mod_msg_count:
-                logger.info(f"Message count changed: {orig_msg_count} -> {mod_msg_count}")
-                return True
-            
-            # Compare each message and its signals
-            for i, (orig_msg, mod_msg) in enumerate(zip(self._original_data['messages'], self._modified_data['messages'])):
-                # Compare message properties
-                if orig_msg['name'] != mod_msg['name'] or orig_msg['frame_id'] != mod_msg['frame_id']:
-                    logger.info(f"Message {i} properties changed")
-                    return True
-                
-                # Compare signal counts
-                orig_sig_count = len(orig_msg['signals'])
-                mod_sig_count = len(mod_msg['signals'])
-                
-                if orig_sig_count != mod_sig_count:
-                    logger.info(f"Message {i} signal count changed: {orig_sig_count} -> {mod_sig_count}")
-                    return True
-                
-                # Compare each signal
-                for j, (orig_sig, mod_sig) in enumerate(zip(orig_msg['signals'], mod_msg['signals'])):
-                    if orig_sig != mod_sig:
-                        logger.info(f"Signal {j} in message {i} changed")
-                        return True
-            
-            logger.info("No changes detected in DBC data")
-            return False
-            
-        except Exception as e:
-            logger.warning(f"Change detection failed: {e}")
-            # Fallback to JSON comparison
-            try:
-                orig_json = json.dumps(self._original_data, sort_keys=True, default=str)
-                mod_json = json.dumps(self._modified_data, sort_keys=True, default=str)
-                return orig_json != mod_json
-            except:
-                # Final fallback to simple comparison
-                return self._original_data != self._modified_data
+        changed = self.file_hash() != self._saved_file_digest
+        logger.info("Changes detected in DBC data" if changed else "No changes detected in DBC data")
+        return changed
 
     def get_changes_summary(self) -> Dict[str, Any]:
-        """Get a detailed summary of changes made to the DBC file."""
+        """
+        Get a detailed summary of changes made to the DBC file.
+        Only messages whose digest differs from the saved one are compared signal by signal.
+        """
         if not self.has_changes():
             return {"has_changes": False}
         
         try:
-            orig = {m['name']: m for m in self._original_data['messages']}
-            mod = {m['name']: m for m in self._modified_data['messages']}
-            
-            added_messages = [n for n in mod if n not in orig]
-            deleted_messages = [n for n in orig if n not in mod]
-            modified_messages = []
-            added_signals = []
-            deleted_signals = []
-            modified_signals = []
-            
-            # Check for modified messages and signal changes
-            for msg_name in mod:
-                if msg_name in orig:
-                    orig_msg = orig[msg_name]
-                    mod_msg = mod[msg_name]
-                    
-                    # Check if message itself is modified
-                    if mod_msg != orig_msg:
-                        modified_messages.append(msg_name)
-                        
-                        # Check signal changes within this message
-                        orig_signals = {s['name']: s for s in orig_msg.get('signals', [])}
-                        mod_signals = {s['name']: s for s in mod_msg.get('signals', [])}
-                        
-                        # Added signals
-                        for sig_name in mod_signals:
-                            if sig_name not in orig_signals:
-                                added_signals.append(f"{msg_name}.{sig_name}")
-                        
-                        # Deleted signals
-                        for sig_name in orig_signals:
-                            if sig_name not in mod_signals:
-                                deleted_signals.append(f"{msg_name}.{sig_name}")
-                        
-                        # Modified signals
-                        for sig_name in mod_signals:
-                            if sig_name in orig_signals and mod_signals[sig_name] != orig_signals[sig_name]:
-                                modified_signals.append(f"{msg_name}.{sig_name}")
-            
-            return {
-                "has_changes": True,
-                "added_messages": added_messages,
-                "deleted_messages": deleted_messages,
-                "modified_messages": modified_messages,
-                "added_signals": added_signals,
-                "deleted_signals": deleted_signals,
-                "modified_signals": modified_signals
-            }
+            current = [self.message_hashes(m) for m in self._modified_data['messages']]
+            summary = diff_hashes(self._saved_hashes, current)
+            summary['has_changes'] = True
+            return summary
         except Exception as e:
             logger.warning(f"Changes summary failed: {e}")
             return {"has_changes": True, "error": str(e)}
 
+    def import_signals_csv(self, file_path: str, delimiter: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Import signal definitions from a CSV/TSV file with one signal per row.
+        Required columns: message, signal, start_bit, length. Optional columns:
+        frame_id, message_length, senders, byte_order, is_signed, scale, offset,
+        minimum, maximum, unit, receivers, comments. Rows naming an unknown message
+        create it when frame_id is given.
+
+        Rows are streamed and validated in one pass (values, bit bounds against the
+        message length, duplicate names, bit overlaps) using one occupancy bitmap per
+        message. Valid rows are merged with a single apply_batch(); invalid rows are
+        skipped and reported.
+        Returns {'rows', 'imported', 'messages_created', 'errors': [(line, text), ...]}.
+        """
+        if self._modified_data is None:
+            raise DBCEditorError("No DBC data loaded")
+        if delimiter is None:
+            delimiter = '\t' if file_path.lower().endswith(('.tsv', '.tab')) else None
+        
+        messages = self._modified_data['messages']
+        message_index = {m['name']: idx for idx, m in enumerate(messages)}
+        # message name -> {'length', 'names', 'occupied', 'new_message' or 'msg_idx', 'signals'}
+        pending = {}
+        errors = []
+        rows = 0
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+                if delimiter is None:
+                    sample = f.readline()
+                    try:
+                        delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t').delimiter
+                    except csv.Error:
+                        delimiter = ','
+                    f.seek(0)
+                reader = csv.reader(f, delimiter=delimiter)
+                header = next(reader, None)
+                if not header:
+                    raise DBCEditorError("Import file is empty")
+                columns = [_IMPORT_COLUMN_ALIASES.get(re.sub(r'[\s\-]+', '_', h.strip().lower())) for h in header]
+                missing = {'message', 'signal', 'start_bit', 'length'} - set(columns)
+                if missing:
+                    raise DBCEditorError(f"Missing required columns: {', '.join(sorted(missing))}")
+                
+                for row in reader:
+                    if not any(cell.strip() for cell in row):
+                        continue
+                    rows += 1
+                    line = reader.line_num
+                    values = {col: cell.strip() for col, cell in zip(columns, row) if col}
+                    try:
+                        entry = self._import_message_entry(values, messages, message_index, pending)
+                        signal = self._import_signal_row(values)
+                        if signal['name'] in entry['names']:
+                            raise ValueError(f"duplicate signal name '{signal['name']}'")
+                        mask = signal_bit_mask(signal['start_bit'], signal['length'],
+                                               signal['byte_order'], entry['length'])
+                        if mask is None:
+                            raise ValueError(f"bits {signal['start_bit']}|{signal['length']} exceed "
+                                             f"message length of {entry['length']} bytes")
+                        if mask & entry['occupied']:
+                            raise ValueError(f"signal '{signal['name']}' overlaps another signal")
+                    except ValueError as e:
+                        errors.append((line, str(e)))
+                        continue
+                    entry['names'].add(signal['name'])
+                    entry['occupied'] |= mask
+                    entry['signals'].append(signal)
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
+            raise DBCEditorError(f"Failed to read import file: {e}")
+        
+        operations = []
+        imported = 0
+        created = 0
+        for entry in pending.values():
+            if not entry['signals']:
+                continue
+            imported += len(entry['signals'])
+            if 'new_message' in entry:
+                message = entry['new_message']
+                message['signals'] = entry['signals']
+                operations.append({'op': 'add_message', 'message': message})
+                created += 1
+            else:
+                operations.extend({'op': 'add_signal', 'msg_idx': entry['msg_idx'], 'signal': sig}
+                                  for sig in entry['signals'])
+        if operations:
+            self.apply_batch(operations)
+        
+        logger.info(f"Imported {imported} of {rows} signal rows from {file_path} ({len(errors)} errors)")
+        return {'rows': rows, 'imported': imported, 'messages_created': created, 'errors': errors}
+
+    def _import_message_entry(self, values, messages, message_index, pending) -> Dict[str, Any]:
+        """Return the import bookkeeping for the message named in a row, creating it on first use."""
+        name = values.get('message', '')
+        if not name:
+            raise ValueError("message name is required")
+        entry = pending.get(name)
+        if entry is not None:
+            return entry
+        
+        if name in message_index:
+            msg_idx = message_index[name]
+            message = messages[msg_idx]
+            entry = {'msg_idx': msg_idx, 'length': message['length'],
+                     'occupied': self.get_occupancy(msg_idx).occupied(),
+                     'names': {s['name'] for s in message['signals']}, 'signals': []}
+        else:
+            if not values.get('frame_id'):
+                raise ValueError(f"unknown message '{name}' and no frame_id to create it")
+            frame_id = self._import_int(values, 'frame_id', 0)
+            length = self._import_int(values, 'message_length', 8)
+            if not 0 <= frame_id <= 0x1FFFFFFF:
+                raise ValueError(f"frame_id {frame_id:#x} out of range")
+            if not 0 <= length <= 64:
+                raise ValueError(f"message length {length} out of range (0-64)")
+            entry = {'length': length, 'occupied': 0, 'names': set(), 'signals': [],
+                     'new_message': {
+                         'name': name,
+                         'frame_id': frame_id,
+                         'length': length,
+                         'senders': [s for s in re.split(r'[,;\s]+', values.get('senders', '')) if s],
+                         'signals': [],
+                         'comments': ''
+                     }}
+        pending[name] = entry
+        return entry
+
+    def _import_signal_row(self, values) -> Dict[str, Any]:
+        """Convert one import row into a signal dict, raising ValueError on bad values."""
+        name = values.get('signal', '')
+        if not name:
+            raise ValueError("signal name is required")
+        start_bit = self._import_int(values, 'start_bit', None)
+        length = self._import_int(values, 'length', None)
+        if not 1 <= length <= 64:
+            raise ValueError(f"signal length {length} out of range (1-64)")
+        scale = self._import_float(values, 'scale', 1.0)
+        if scale == 0:
+            raise ValueError("scale must not be zero")
+        minimum = self._import_float(values, 'minimum', None)
+        maximum = self._import_float(values, 'maximum', None)
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise ValueError(f"minimum {minimum} is greater than maximum {maximum}")
+        
+        return {
+            'name': name,
+            'start_bit': start_bit,
+            'length': length,
+            'byte_order': 'big_endian' if values.get('byte_order', '').lower() in _BIG_ENDIAN_TEXT else 'little_endian',
+            'is_signed': values.get('is_signed', '').lower() in _TRUE_TEXT,
+            'scale': scale,
+            'offset': self._import_float(values, 'offset', 0.0),
+            'minimum': minimum,
+            'maximum': maximum,
+            'unit': values.get('unit', ''),
+            'receivers': [r for r in re.split(r'[,;\s]+', values.get('receivers', '')) if r],
+            'comments': values.get('comments', '')
+        }
+
+    @staticmethod
+    def _import_int(values, column, default):
+        text = values.get(column, '')
+        if not text:
+            if default is None:
+                raise ValueError(f"{column} is required")
+            return default
+        try:
+            if text.lower().startswith('0x'):
+                return int(text, 16)
+            number = float(text)
+            if not number.is_integer():
+                raise ValueError
+            return int(number)
+        except ValueError:
+            raise ValueError(f"{column} '{text}' is not an integer")
+
+    @staticmethod
+    def _import_float(values, column, default):
+        text = values.get(column, '')
+        if not text:
+            return default
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"{column} '{text}' is not a number")
+
     def _extract_comment_text(self, comment_obj, max_depth=5):
         """Extract clean comment text from potentially malformed comment objects."""
         if not comment_obj:
@@ -526,7 +1552,12 @@ class DBCEditor:
     def reset_changes(self) -> None:
         """Reset all changes back to the original state."""
         if self._original_data:
-            self._modified_data = {'messages': [dict(m) for m in self._original_data['messages']]}
+            self._modified_data = copy.deepcopy(self._original_data)
+            self._occupancy_cache = {}
+            self._hash_cache = {}
+            self._origins = {id(m): (m, m['name']) for m in self._modified_data['messages']}
+            self._close_journal()
+            self._notify_change()
 
     def _cleanup_backup_file(self, file_path: str) -> None:
         """Delete the backup file for the given DBC file."""
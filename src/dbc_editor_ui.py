@@ -13,6 +13,9 @@ import json
 
 from dbc_editor import DBCEditor, DBCEditorError
 from search_module import UnifiedSearchWidget
+from dbc_diff_ui import DBCDiffDialog
+from dbc_merge_ui import DBCMergeDialog
+from dbc_history_ui import DBCHistoryDialog
 
 from resource_utils import get_resource_path
 
@@ -52,8 +55,8 @@ class MessageEditDialog(QtWidgets.QDialog):
         self.frame_id_edit.setToolTip("CAN frame ID (0x000 to 0x1FFFFFFF)")
         
         self.length_edit = QtWidgets.QSpinBox()
-        self.length_edit.setRange(0, 8)
-        self.length_edit.setToolTip("Message length in bytes (0-8)")
+        self.length_edit.setRange(0, 64)
+        self.length_edit.setToolTip("Message length in bytes (0-8, up to 64 for CAN FD)")
         
         basic_layout.addRow("Name:", self.name_edit)
         basic_layout.addRow("Frame ID:", self.frame_id_edit)
@@ -177,7 +180,9 @@ class MessageEditDialog(QtWidgets.QDialog):
             if frame_id <= 0x7FF:
                 frame_id = 0x800  # Minimum extended frame ID
         
-        return {
+        # Keep properties the dialog does not edit (e.g. signal groups)
+        data = dict(self.message_data or {})
+        data.update({
             'name': name,
             'frame_id': frame_id,
             'length': self.length_edit.value(),
@@ -186,20 +191,39 @@ class MessageEditDialog(QtWidgets.QDialog):
             'cycle_time': self.cycle_time_edit.value() if self.cycle_time_edit.value() > 0 else None,
             'message_type': self.message_type_combo.currentText(),
             'signals': self.message_data.get('signals', [])
-        }
+        })
+        return data
 
 class SignalEditDialog(QtWidgets.QDialog):
     """Enhanced dialog for editing signal properties."""
     
-    def __init__(self, parent=None, signal_data=None):
+    def __init__(self, parent=None, signal_data=None, message_length=8, layout_checker=None,
+                 allocator=None):
+        """
+        Args:
+            message_length: Length in bytes of the message the signal belongs to
+            layout_checker: Optional callable taking a signal dict and returning a list
+                of layout problems (bounds/overlaps), used for live feedback
+            allocator: Optional callable (length, byte_order, strategy) -> start bit or
+                None, used to propose free bits for the signal
+        """
         super().__init__(parent)
         self.setWindowTitle("Edit Signal")
         self.setModal(True)
         self.resize(600, 700)
         
         self.signal_data = signal_data or {}
+        self.message_length = message_length
+        self.layout_checker = layout_checker
+        self.allocator = allocator
+        # New signals follow the proposed free range until the start bit is edited by hand
+        self._auto_start_bit = allocator is not None and not self.signal_data
+        self._setting_start_bit = False
         self.setup_ui()
         self.load_data()
+        if self._auto_start_bit:
+            self.propose_start_bit()
+        self.update_layout_feedback()
         
     def setup_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
@@ -216,17 +240,38 @@ class SignalEditDialog(QtWidgets.QDialog):
         self.name_edit = QtWidgets.QLineEdit()
         self.name_edit.setPlaceholderText("Enter signal name")
         
+        max_bit = max(self.message_length * 8, 8) - 1
         self.start_bit_edit = QtWidgets.QSpinBox()
-        self.start_bit_edit.setRange(0, 63)
-        self.start_bit_edit.setToolTip("Starting bit position (0-63)")
+        self.start_bit_edit.setRange(0, max_bit)
+        self.start_bit_edit.setToolTip(f"Starting bit position (0-{max_bit})")
         
         self.length_edit = QtWidgets.QSpinBox()
         self.length_edit.setRange(1, 64)
         self.length_edit.setToolTip("Number of bits (1-64)")
         
+        # Live bit layout feedback (bounds and overlaps with other signals)
+        self.layout_label = QtWidgets.QLabel()
+        self.layout_label.setWordWrap(True)
+        
+        # Free-range allocation next to the start bit
+        start_bit_layout = QtWidgets.QHBoxLayout()
+        start_bit_layout.addWidget(self.start_bit_edit)
+        self.fit_strategy_combo = QtWidgets.QComboBox()
+        self.fit_strategy_combo.addItems(['First fit', 'Best fit'])
+        self.fit_strategy_combo.setToolTip("First fit: lowest free range. Best fit: smallest free range that fits")
+        self.find_free_button = QtWidgets.QPushButton("Find Free Bits")
+        self.find_free_button.setToolTip("Move the signal to a free range of its length")
+        self.find_free_button.clicked.connect(self.propose_start_bit)
+        start_bit_layout.addWidget(self.fit_strategy_combo)
+        start_bit_layout.addWidget(self.find_free_button)
+        if self.allocator is None:
+            self.fit_strategy_combo.hide()
+            self.find_free_button.hide()
+        
         basic_layout.addRow("Name:", self.name_edit)
-        basic_layout.addRow("Start Bit:", self.start_bit_edit)
+        basic_layout.addRow("Start Bit:", start_bit_layout)
         basic_layout.addRow("Length (bits):", self.length_edit)
+        basic_layout.addRow("", self.layout_label)
         basic_group.setLayout(basic_layout)
         scroll_layout.addWidget(basic_group)
         
@@ -251,6 +296,10 @@ class SignalEditDialog(QtWidgets.QDialog):
         data_group.setLayout(data_layout)
         scroll_layout.addWidget(data_group)
         
+        self.start_bit_edit.valueChanged.connect(self._on_start_bit_edited)
+        self.length_edit.valueChanged.connect(self._on_size_changed)
+        self.byte_order_combo.currentIndexChanged.connect(self._on_size_changed)
+        
         # Scaling Properties Group
         scaling_group = QtWidgets.QGroupBox("Scaling Properties")
         scaling_layout = QtWidgets.QFormLayout()
@@ -395,6 +444,71 @@ class SignalEditDialog(QtWidgets.QDialog):
             self.receivers_edit.setText(', '.join(self.signal_data.get('receivers', [])))
             self.comments_edit.setPlainText(self.signal_data.get('comments', ''))
     
+    def _layout_problems(self) -> List[str]:
+        if not self.layout_checker:
+            return []
+        signal = dict(self.signal_data)
+        signal.update({
+            'start_bit': self.start_bit_edit.value(),
+            'length': self.length_edit.value(),
+            'byte_order': self.byte_order_combo.currentText(),
+        })
+        return self.layout_checker(signal)
+
+    def _on_start_bit_edited(self):
+        if not self._setting_start_bit:
+            self._auto_start_bit = False
+        self.update_layout_feedback()
+
+    def _on_size_changed(self):
+        if self._auto_start_bit:
+            self.propose_start_bit()
+        self.update_layout_feedback()
+
+    def propose_start_bit(self):
+        """Fill in the start bit of a free range for the current length and byte order."""
+        if not self.allocator:
+            return
+        strategy = 'best_fit' if self.fit_strategy_combo.currentIndex() == 1 else 'first_fit'
+        start_bit = self.allocator(self.length_edit.value(), self.byte_order_combo.currentText(), strategy)
+        if start_bit is None:
+            self.layout_label.setText(f"No free range of {self.length_edit.value()} bits")
+            self.layout_label.setStyleSheet("color: #c0392b;")
+            return
+        self._setting_start_bit = True
+        try:
+            self.start_bit_edit.setValue(start_bit)
+        finally:
+            self._setting_start_bit = False
+        self.update_layout_feedback()
+
+    def update_layout_feedback(self):
+        """Show whether the current start bit/length fit and are free."""
+        if not self.layout_checker:
+            self.layout_label.hide()
+            return
+        problems = self._layout_problems()
+        if problems:
+            self.layout_label.setText("; ".join(problems))
+            self.layout_label.setStyleSheet("color: #c0392b;")
+        else:
+            self.layout_label.setText("Bits are free")
+            self.layout_label.setStyleSheet("color: green;")
+
+    def accept(self):
+        """Ask for confirmation before accepting a signal layout with problems."""
+        problems = self._layout_problems()
+        if problems:
+            reply = QtWidgets.QMessageBox.question(
+                self, "Signal Layout",
+                "The signal layout has problems:\n" + "\n".join(problems) + "\n\nUse it anyway?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.No
+            )
+            if reply == QtWidgets.QMessageBox.No:
+                return
+        super().accept()
+
     def reset_to_defaults(self):
         """Reset all fields to default values."""
         self.name_edit.clear()
@@ -424,7 +538,9 @@ class SignalEditDialog(QtWidgets.QDialog):
         # If you need to distinguish between "not set" and "explicitly set to 0",
         # you would need to add additional UI elements (like checkboxes) to track this
         
-        return {
+        # Keep properties the form does not edit (e.g. multiplexer ids)
+        data = dict(self.signal_data)
+        data.update({
             'name': name,
             'start_bit': self.start_bit_edit.value(),
             'length': self.length_edit.value(),
@@ -437,17 +553,73 @@ class SignalEditDialog(QtWidgets.QDialog):
             'unit': self.unit_edit.text().strip(),
             'receivers': [r.strip() for r in self.receivers_edit.text().split(',') if r.strip()],
             'comments': self.comments_edit.toPlainText().strip()
-        }
+        })
+        return data
+
+def offer_journal_recovery(parent: QtWidgets.QWidget, dbc_editor: DBCEditor) -> bool:
+    """
+    Ask whether to restore the unsaved edits that a crashed session left in the
+    journal of the file just loaded (see DBCEditor.recover_from_journal).
+    Returns True if edits were restored.
+    """
+    count = dbc_editor.recoverable_operations()
+    if not count:
+        return False
+    reply = QtWidgets.QMessageBox.question(
+        parent, "Recover Unsaved Changes",
+        f"{os.path.basename(dbc_editor.file_path)} has {count} unsaved edit(s) from a session "
+        "that did not close normally.\nDo you want to restore them?",
+        QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+        QtWidgets.QMessageBox.Yes
+    )
+    if reply != QtWidgets.QMessageBox.Yes:
+        dbc_editor.discard_journal()
+        return False
+    try:
+        dbc_editor.recover_from_journal()
+    except DBCEditorError as e:
+        QtWidgets.QMessageBox.warning(parent, "Recover Unsaved Changes",
+                                      f"Some edits could not be restored:\n{e}")
+    return True
+
+
+class SaveWorker(QtCore.QThread):
+    """Writes a save snapshot (see DBCEditor.prepare_save) off the GUI thread."""
+    progress = QtCore.pyqtSignal(int, int)
+    saved = QtCore.pyqtSignal(object, object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, dbc_editor: DBCEditor, snapshot: Dict[str, Any], parent=None):
+        super().__init__(parent)
+        self.dbc_editor = dbc_editor
+        self.snapshot = snapshot
+
+    def run(self):
+        try:
+            index = self.dbc_editor.write_snapshot(self.snapshot, self.progress.emit)
+            self.saved.emit(self.snapshot, index)
+        except Exception as e:
+            self.failed.emit(str(e))
+
 
 class DBCEditorWidget(QtWidgets.QWidget):
     """Main DBC editor widget with error handling and improved readability."""
     dbcFileLoaded = QtCore.pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, dbc_editor=None):
         super().__init__(parent)
-        self.dbc_editor = DBCEditor()
+        # The editor (and its model) may be shared with other tabs
+        self.dbc_editor = dbc_editor if dbc_editor is not None else DBCEditor()
         self.current_file_path = None
+        self._save_worker = None
+        self._loading_file = False
         self.setup_ui()
+        self.dbc_editor.add_change_listener(self._on_model_event)
+        # Journaled edits are fsynced in batches; make sure the last ones get synced too
+        self._journal_timer = QtCore.QTimer(self)
+        self._journal_timer.setInterval(1000)
+        self._journal_timer.timeout.connect(self.dbc_editor.sync_journal)
+        self._journal_timer.start()
         
     def setup_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
@@ -513,12 +685,24 @@ class DBCEditorWidget(QtWidgets.QWidget):
         self.load_button = QtWidgets.QPushButton("Load DBC File")
         self.save_button = QtWidgets.QPushButton("Save Changes")
         self.save_as_button = QtWidgets.QPushButton("Save As...")
+        self.import_button = QtWidgets.QPushButton("Import Signals...")
+        self.import_button.setToolTip("Import signal definitions from a CSV/TSV file")
+        self.compare_button = QtWidgets.QPushButton("Compare...")
+        self.compare_button.setToolTip("Compare two DBC files, or the current data with a DBC file")
+        self.merge_button = QtWidgets.QPushButton("Merge...")
+        self.merge_button.setToolTip("Three-way merge of another DBC file into the current data")
+        self.history_button = QtWidgets.QPushButton("History...")
+        self.history_button.setToolTip("Saved versions of this file: compare or restore")
         
         # Set button icons
         self._set_button_icon(self.new_button, "icons/add.ico")
         self._set_button_icon(self.load_button, "icons/load.ico")
         self._set_button_icon(self.save_button, "icons/save.ico")
         self._set_button_icon(self.save_as_button, "icons/save_as.ico")
+        self._set_button_icon(self.import_button, "icons/convert.ico")
+        self._set_button_icon(self.compare_button, "icons/view.ico")
+        self._set_button_icon(self.merge_button, "icons/convert.ico")
+        self._set_button_icon(self.history_button, "icons/refresh.ico")
         
         # Style the new button to match the load button (green, enabled)
         self.new_button.setStyleSheet("background-color: #4CAF50; color: white; border: none; padding: 8px 16px; border-radius: 4px; font-weight: bold;")
@@ -527,6 +711,10 @@ class DBCEditorWidget(QtWidgets.QWidget):
         self.load_button.clicked.connect(self.load_dbc_file)
         self.save_button.clicked.connect(self.save_changes)
         self.save_as_button.clicked.connect(self.save_as)
+        self.import_button.clicked.connect(self.import_signals)
+        self.compare_button.clicked.connect(self.compare_files)
+        self.merge_button.clicked.connect(self.merge_files)
+        self.history_button.clicked.connect(self.show_history)
         
         file_layout.addWidget(self.file_label)
         file_layout.addStretch()
@@ -534,6 +722,10 @@ class DBCEditorWidget(QtWidgets.QWidget):
         file_layout.addWidget(self.load_button)
         file_layout.addWidget(self.save_button)
         file_layout.addWidget(self.save_as_button)
+        file_layout.addWidget(self.import_button)
+        file_layout.addWidget(self.compare_button)
+        file_layout.addWidget(self.merge_button)
+        file_layout.addWidget(self.history_button)
         
         file_group.setLayout(file_layout)
         layout.addWidget(file_group)
@@ -584,7 +776,9 @@ class DBCEditorWidget(QtWidgets.QWidget):
         message_move_col.addWidget(self.move_message_down_button)
         message_move_col.addStretch()
         self.message_list = QtWidgets.QListWidget()
+        self.message_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.message_list.itemClicked.connect(self.on_message_selected)
+        self.message_list.itemSelectionChanged.connect(self._update_selection_buttons)
         self.message_list.itemDoubleClicked.connect(self.edit_message)
         message_list_row.addLayout(message_move_col)
         message_list_row.addWidget(self.message_list)
@@ -642,7 +836,9 @@ class DBCEditorWidget(QtWidgets.QWidget):
         signal_move_col.addWidget(self.move_signal_down_button)
         signal_move_col.addStretch()
         self.signal_list = QtWidgets.QListWidget()
+        self.signal_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.signal_list.itemClicked.connect(self.on_signal_selected)
+        self.signal_list.itemSelectionChanged.connect(self._update_selection_buttons)
         self.signal_list.itemDoubleClicked.connect(self.edit_signal)
         signal_list_row.addLayout(signal_move_col)
         signal_list_row.addWidget(self.signal_list)
@@ -658,9 +854,14 @@ class DBCEditorWidget(QtWidgets.QWidget):
         status_layout = QtWidgets.QHBoxLayout()
         self.status_label = QtWidgets.QLabel("Ready")
         self.changes_label = QtWidgets.QLabel("No changes")
+        self.save_progress = QtWidgets.QProgressBar()
+        self.save_progress.setMaximumWidth(200)
+        self.save_progress.setMaximumHeight(16)
+        self.save_progress.setVisible(False)
         
         status_layout.addWidget(self.status_label)
         status_layout.addStretch()
+        status_layout.addWidget(self.save_progress)
         status_layout.addWidget(self.changes_label)
         
         layout.addLayout(status_layout)
@@ -685,15 +886,6 @@ class DBCEditorWidget(QtWidgets.QWidget):
         has_file = self.current_file_path is not None
         # Check if we have a DBC structure initialized (either loaded or newly created)
         has_data = self.dbc_editor._modified_data is not None
-        has_messages = self.message_list.count() > 0
-        has_selected_message = self.message_list.currentRow() >= 0
-        has_signals = self.signal_list.count() > 0
-        has_selected_signal = self.signal_list.currentRow() >= 0
-        selected_message_row = self.message_list.currentRow()
-        selected_signal_row = self.signal_list.currentRow()
-        msg_count = self.message_list.count()
-        sig_count = self.signal_list.count() if has_selected_message else 0
-        
         # Force refresh of change detection
         has_changes = self.dbc_editor.has_changes()
         
@@ -705,21 +897,12 @@ class DBCEditorWidget(QtWidgets.QWidget):
         
         # Enable save button if we have data (file loaded or new file created)
         # This allows users to save the file as-is or make changes
-        self.save_button.setEnabled(has_data)
-        self.save_as_button.setEnabled(has_data)
-        self.add_message_button.setEnabled(has_data)
-        self.edit_message_button.setEnabled(has_data and has_selected_message)
-        self.delete_message_button.setEnabled(has_data and has_selected_message)
-        self.duplicate_message_button.setEnabled(has_data and has_selected_message)
-        self.add_signal_button.setEnabled(has_data and has_selected_message)
-        self.edit_signal_button.setEnabled(has_data and has_selected_signal)
-        self.delete_signal_button.setEnabled(has_data and has_selected_signal)
-        self.duplicate_signal_button.setEnabled(has_data and has_selected_signal)
-        # Move buttons
-        self.move_message_up_button.setEnabled(has_data and has_messages and has_selected_message and selected_message_row > 0)
-        self.move_message_down_button.setEnabled(has_data and has_messages and has_selected_message and selected_message_row < (msg_count - 1))
-        self.move_signal_up_button.setEnabled(has_data and has_selected_message and has_signals and has_selected_signal and selected_signal_row > 0)
-        self.move_signal_down_button.setEnabled(has_data and has_selected_message and has_signals and has_selected_signal and selected_signal_row < (sig_count - 1))
+        self.save_button.setEnabled(has_data and not self.is_saving())
+        self.save_as_button.setEnabled(has_data and not self.is_saving())
+        self.import_button.setEnabled(has_data)
+        self.merge_button.setEnabled(has_data)
+        self.history_button.setEnabled(has_file and not self.is_saving())
+        self._update_selection_buttons()
         
         # Update changes label and button styling
         if has_changes:
@@ -755,8 +938,36 @@ class DBCEditorWidget(QtWidgets.QWidget):
             # Reset save button style
             self.save_button.setStyleSheet("")
     
+    def _update_selection_buttons(self):
+        """Enable the message/signal buttons that apply to the current selection."""
+        has_data = self.dbc_editor._modified_data is not None
+        has_selected_message = self.message_list.currentRow() >= 0
+        message_rows = self._selected_rows(self.message_list)
+        signal_rows = self._selected_rows(self.signal_list) if has_selected_message else []
+        msg_count = self.message_list.count()
+        sig_count = self.signal_list.count()
+        
+        self.add_message_button.setEnabled(has_data)
+        self.edit_message_button.setEnabled(has_data and len(message_rows) == 1)
+        self.delete_message_button.setEnabled(has_data and bool(message_rows))
+        self.duplicate_message_button.setEnabled(has_data and bool(message_rows))
+        self.add_signal_button.setEnabled(has_data and has_selected_message)
+        self.edit_signal_button.setEnabled(has_data and len(signal_rows) == 1)
+        self.delete_signal_button.setEnabled(has_data and bool(signal_rows))
+        self.duplicate_signal_button.setEnabled(has_data and bool(signal_rows))
+        # Move buttons: enabled unless every selected row is already packed against the edge
+        self.move_message_up_button.setEnabled(
+            has_data and bool(message_rows) and message_rows != list(range(len(message_rows))))
+        self.move_message_down_button.setEnabled(
+            has_data and bool(message_rows) and message_rows != list(range(msg_count - len(message_rows), msg_count)))
+        self.move_signal_up_button.setEnabled(
+            has_data and bool(signal_rows) and signal_rows != list(range(len(signal_rows))))
+        self.move_signal_down_button.setEnabled(
+            has_data and bool(signal_rows) and signal_rows != list(range(sig_count - len(signal_rows), sig_count)))
+
     def new_dbc_file(self):
         """Create a new empty DBC file with error handling."""
+        self.wait_for_save()
         # Check if there are unsaved changes
         if self.dbc_editor.has_changes() and self.current_file_path:
             reply = QtWidgets.QMessageBox.question(
@@ -770,7 +981,11 @@ class DBCEditorWidget(QtWidgets.QWidget):
         
         try:
             self.status_label.setText("Creating new DBC file...")
-            data = self.dbc_editor.create_new_dbc()
+            self._loading_file = True
+            try:
+                data = self.dbc_editor.create_new_dbc()
+            finally:
+                self._loading_file = False
             self.current_file_path = None
             self.file_label.setText("New DBC file (not saved)")
             self.populate_message_list()
@@ -809,6 +1024,7 @@ class DBCEditorWidget(QtWidgets.QWidget):
         Load a DBC file directly (no file dialog). Intended for the Home screen.
         Returns True on success, False on failure.
         """
+        self.wait_for_save()
         try:
             if not file_path:
                 self._show_error("No file path provided.")
@@ -823,11 +1039,17 @@ class DBCEditorWidget(QtWidgets.QWidget):
             self.status_label.setText("Loading DBC file...")
             QtWidgets.QApplication.processEvents()
 
-            self.dbc_editor.load_dbc_file(file_path)
+            self._loading_file = True
+            try:
+                self.dbc_editor.load_dbc_file(file_path)
+            finally:
+                self._loading_file = False
+            recovered = offer_journal_recovery(self, self.dbc_editor)
             self.current_file_path = file_path
             self.file_label.setText(f"File: {file_path}")
             self.populate_message_list()
-            self.status_label.setText("DBC file loaded successfully")
+            self.status_label.setText("DBC file loaded, unsaved changes restored" if recovered
+                                      else "DBC file loaded successfully")
             QtWidgets.QApplication.processEvents()
             self.update_button_states()
 
@@ -843,6 +1065,21 @@ class DBCEditorWidget(QtWidgets.QWidget):
             self._show_error(f"Unexpected error: {str(e)}")
             return False
 
+    def _on_model_event(self, event: str) -> None:
+        """Pick up a file that another tab loaded into the shared editor."""
+        if event == 'loaded' and not self._loading_file:
+            QtCore.QTimer.singleShot(0, self._sync_with_model)
+
+    def _sync_with_model(self) -> None:
+        self.current_file_path = self.dbc_editor.file_path
+        if self.current_file_path:
+            self.file_label.setText(f"File: {self.current_file_path}")
+        else:
+            self.file_label.setText("New DBC file (not saved)")
+        self.populate_message_list()
+        self.status_label.setText("DBC file loaded in the View tab")
+        self.update_button_states()
+
     def filter_messages(self, search_query="", filter_type="All"):
         """Filter messages based on search text and filter selection."""
         search_text = search_query.lower()
@@ -920,6 +1157,60 @@ class DBCEditorWidget(QtWidgets.QWidget):
             item.setData(QtCore.Qt.UserRole, sig)
             self.signal_list.addItem(item)
     
+    def _selected_rows(self, list_widget):
+        """Sorted rows of the selected, visible items; the current row if none is selected."""
+        rows = sorted(index.row() for index in list_widget.selectionModel().selectedRows()
+                      if not list_widget.isRowHidden(index.row()))
+        if not rows:
+            row = list_widget.currentRow()
+            item = list_widget.item(row) if row >= 0 else None
+            if item is not None and item.flags() & QtCore.Qt.ItemIsSelectable and not item.isHidden():
+                rows = [row]
+        return rows
+
+    def _select_rows(self, list_widget, rows):
+        """Select the given rows, making the first one current."""
+        list_widget.clearSelection()
+        if not rows:
+            return
+        list_widget.setCurrentRow(rows[0], QtCore.QItemSelectionModel.ClearAndSelect)
+        model = list_widget.model()
+        selection = QtCore.QItemSelection()
+        for row in rows[1:]:
+            index = model.index(row, 0)
+            selection.select(index, index)
+        list_widget.selectionModel().select(selection, QtCore.QItemSelectionModel.Select)
+
+    def _show_rows(self, message_rows, signal_rows=(), status=None):
+        """Repopulate both lists once after an edit and select the given rows."""
+        self.setUpdatesEnabled(False)
+        try:
+            self.populate_message_list()
+            self._select_rows(self.message_list, list(message_rows))
+            current_row = self.message_list.currentRow()
+            if current_row >= 0:
+                self.populate_signal_list(self.message_list.item(current_row).data(QtCore.Qt.UserRole))
+                self._select_rows(self.signal_list, list(signal_rows))
+            if status:
+                self.status_label.setText(status)
+            self.update_button_states()
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _confirm_delete(self, kind, names):
+        """Ask once before deleting the named messages or signals."""
+        if len(names) == 1:
+            text = f"Are you sure you want to delete {kind} '{names[0]}'?"
+        else:
+            listed = "\n".join(names[:10])
+            more = f"\n... and {len(names) - 10} more" if len(names) > 10 else ""
+            text = f"Are you sure you want to delete {len(names)} {kind}s?\n\n{listed}{more}"
+        reply = QtWidgets.QMessageBox.question(
+            self, "Confirm Delete", text,
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+        )
+        return reply == QtWidgets.QMessageBox.Yes
+
     def add_message(self):
         """Add a new message with error handling."""
         dialog = MessageEditDialog(self)
@@ -967,23 +1258,17 @@ class DBCEditorWidget(QtWidgets.QWidget):
         self.update_button_states()
 
     def delete_message(self):
-        """Delete the selected message with error handling."""
-        current_row = self.message_list.currentRow()
-        if current_row < 0:
+        """Delete the selected messages with error handling."""
+        rows = self._selected_rows(self.message_list)
+        if not rows:
             return
-        message_name = self.message_list.item(current_row).data(QtCore.Qt.UserRole)['name']
-        reply = QtWidgets.QMessageBox.question(
-            self, "Confirm Delete", 
-            f"Are you sure you want to delete message '{message_name}'?",
-            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
-        )
-        if reply == QtWidgets.QMessageBox.Yes:
+        names = [self.message_list.item(row).data(QtCore.Qt.UserRole)['name'] for row in rows]
+        if self._confirm_delete("message", names):
             try:
-                self.dbc_editor.delete_message(current_row)
-                self.populate_message_list()
-                self.signal_list.clear()
-                self.status_label.setText("Message deleted successfully")
-                self.update_button_states()
+                self.dbc_editor.delete_messages(rows)
+                remaining = self.dbc_editor.get_data()['messages']
+                self._show_rows([min(rows[0], len(remaining) - 1)] if remaining else [],
+                                status=f"{len(rows)} message(s) deleted successfully")
             except DBCEditorError as e:
                 self._show_error(f"Failed to delete message: {str(e)}")
                 self.status_label.setText("Failed to delete message")
@@ -996,7 +1281,13 @@ class DBCEditorWidget(QtWidgets.QWidget):
         current_row = self.message_list.currentRow()
         if current_row < 0:
             return
-        dialog = SignalEditDialog(self)
+        dialog = SignalEditDialog(
+            self,
+            message_length=self.dbc_editor.get_data()['messages'][current_row]['length'],
+            layout_checker=lambda sig: self.dbc_editor.check_signal_layout(current_row, sig),
+            allocator=lambda length, byte_order, strategy: self.dbc_editor.find_free_start_bit(
+                current_row, length, byte_order, strategy)
+        )
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             try:
                 signal_data = dialog.get_data()
@@ -1025,7 +1316,14 @@ class DBCEditorWidget(QtWidgets.QWidget):
         if message_row < 0 or signal_row < 0:
             return
         signal_data = self.signal_list.item(signal_row).data(QtCore.Qt.UserRole)
-        dialog = SignalEditDialog(self, signal_data)
+        dialog = SignalEditDialog(
+            self, signal_data,
+            message_length=self.dbc_editor.get_data()['messages'][message_row]['length'],
+            layout_checker=lambda sig: self.dbc_editor.check_signal_layout(message_row, sig, signal_row),
+            allocator=lambda length, byte_order, strategy: self.dbc_editor.find_free_start_bit(
+                message_row, length, byte_order, strategy,
+                signal_data.get('multiplexer_ids'), exclude_sig_idx=signal_row)
+        )
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             try:
                 new_data = dialog.get_data()
@@ -1048,26 +1346,18 @@ class DBCEditorWidget(QtWidgets.QWidget):
         self.update_button_states()
 
     def delete_signal(self):
-        """Delete the selected signal with error handling."""
+        """Delete the selected signals with error handling."""
         message_row = self.message_list.currentRow()
-        signal_row = self.signal_list.currentRow()
-        if message_row < 0 or signal_row < 0:
+        rows = self._selected_rows(self.signal_list)
+        if message_row < 0 or not rows:
             return
-        signal_name = self.signal_list.item(signal_row).data(QtCore.Qt.UserRole)['name']
-        reply = QtWidgets.QMessageBox.question(
-            self, "Confirm Delete", 
-            f"Are you sure you want to delete signal '{signal_name}'?",
-            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
-        )
-        if reply == QtWidgets.QMessageBox.Yes:
+        names = [self.signal_list.item(row).data(QtCore.Qt.UserRole)['name'] for row in rows]
+        if self._confirm_delete("signal", names):
             try:
-                self.dbc_editor.delete_signal(message_row, signal_row)
-                self.populate_message_list()
-                self.message_list.setCurrentRow(message_row)
-                current_message = self.message_list.item(message_row).data(QtCore.Qt.UserRole)
-                self.populate_signal_list(current_message)
-                self.status_label.setText("Signal deleted successfully")
-                self.update_button_states()
+                self.dbc_editor.delete_signals(message_row, rows)
+                remaining = self.dbc_editor.get_data()['messages'][message_row]['signals']
+                self._show_rows([message_row], [min(rows[0], len(remaining) - 1)] if remaining else [],
+                                status=f"{len(rows)} signal(s) deleted successfully")
             except DBCEditorError as e:
                 self._show_error(f"Failed to delete signal: {str(e)}")
                 self.status_label.setText("Failed to delete signal")
@@ -1076,21 +1366,15 @@ class DBCEditorWidget(QtWidgets.QWidget):
                 self.status_label.setText("Unexpected error")
     
     def duplicate_signal(self):
-        """Duplicate the selected signal."""
+        """Duplicate the selected signals."""
         message_row = self.message_list.currentRow()
-        signal_row = self.signal_list.currentRow()
-        if message_row < 0 or signal_row < 0:
+        rows = self._selected_rows(self.signal_list)
+        if message_row < 0 or not rows:
             return
         try:
-            new_sig_idx = self.dbc_editor.duplicate_signal(message_row, signal_row)
-            self.populate_message_list()
-            self.message_list.setCurrentRow(message_row)
-            current_message = self.message_list.item(message_row).data(QtCore.Qt.UserRole)
-            self.populate_signal_list(current_message)
-            # Select the newly created signal
-            self.signal_list.setCurrentRow(new_sig_idx)
-            self.status_label.setText("Signal duplicated successfully")
-            self.update_button_states()
+            new_rows = self.dbc_editor.duplicate_signals(message_row, rows)
+            # Select the newly created signals
+            self._show_rows([message_row], new_rows, status=f"{len(rows)} signal(s) duplicated successfully")
         except DBCEditorError as e:
             self._show_error(f"Failed to duplicate signal: {str(e)}")
             self.status_label.setText("Failed to duplicate signal")
@@ -1099,19 +1383,14 @@ class DBCEditorWidget(QtWidgets.QWidget):
             self.status_label.setText("Unexpected error")
     
     def duplicate_message(self):
-        """Duplicate the selected message."""
-        current_row = self.message_list.currentRow()
-        if current_row < 0:
+        """Duplicate the selected messages."""
+        rows = self._selected_rows(self.message_list)
+        if not rows:
             return
         try:
-            new_idx = self.dbc_editor.duplicate_message(current_row)
-            self.populate_message_list()
-            # Select the newly created message
-            self.message_list.setCurrentRow(new_idx)
-            new_msg = self.message_list.item(new_idx).data(QtCore.Qt.UserRole)
-            self.populate_signal_list(new_msg)
-            self.status_label.setText("Message duplicated successfully")
-            self.update_button_states()
+            new_rows = self.dbc_editor.duplicate_messages(rows)
+            # Select the newly created messages
+            self._show_rows(new_rows, status=f"{len(rows)} message(s) duplicated successfully")
         except DBCEditorError as e:
             self._show_error(f"Failed to duplicate message: {str(e)}")
             self.status_label.setText("Failed to duplicate message")
@@ -1119,104 +1398,155 @@ class DBCEditorWidget(QtWidgets.QWidget):
             self._show_error(f"Unexpected error: {str(e)}")
             self.status_label.setText("Unexpected error")
     
-    def move_selected_message_up(self):
-        """Move the selected message up."""
-        row = self.message_list.currentRow()
-        if row <= 0:
+    def _move_selected_messages(self, step):
+        rows = self._selected_rows(self.message_list)
+        if not rows:
             return
         try:
-            new_idx = self.dbc_editor.move_message_up(row)
-            self.populate_message_list()
-            self.message_list.setCurrentRow(new_idx)
-            current_message = self.message_list.item(new_idx).data(QtCore.Qt.UserRole)
-            self.populate_signal_list(current_message)
-            self.status_label.setText("Message moved up")
-            self.update_button_states()
+            new_rows = self.dbc_editor.move_messages(rows, step)
+            self._show_rows(new_rows, status="Message(s) moved " + ("up" if step < 0 else "down"))
         except DBCEditorError as e:
             self._show_error(f"Failed to move message: {str(e)}")
         except Exception as e:
             self._show_error(f"Unexpected error: {str(e)}")
+
+    def move_selected_message_up(self):
+        """Move the selected messages up."""
+        self._move_selected_messages(-1)
     
     def move_selected_message_down(self):
-        """Move the selected message down."""
-        row = self.message_list.currentRow()
-        if row < 0 or row >= self.message_list.count() - 1:
+        """Move the selected messages down."""
+        self._move_selected_messages(1)
+
+    def _move_selected_signals(self, step):
+        msg_row = self.message_list.currentRow()
+        rows = self._selected_rows(self.signal_list)
+        if msg_row < 0 or not rows:
             return
         try:
-            new_idx = self.dbc_editor.move_message_down(row)
-            self.populate_message_list()
-            self.message_list.setCurrentRow(new_idx)
-            current_message = self.message_list.item(new_idx).data(QtCore.Qt.UserRole)
-            self.populate_signal_list(current_message)
-            self.status_label.setText("Message moved down")
-            self.update_button_states()
+            new_rows = self.dbc_editor.move_signals(msg_row, rows, step)
+            self._show_rows([msg_row], new_rows, status="Signal(s) moved " + ("up" if step < 0 else "down"))
         except DBCEditorError as e:
-            self._show_error(f"Failed to move message: {str(e)}")
+            self._show_error(f"Failed to move signal: {str(e)}")
         except Exception as e:
             self._show_error(f"Unexpected error: {str(e)}")
     
     def move_selected_signal_up(self):
-        """Move the selected signal up within the current message."""
-        msg_row = self.message_list.currentRow()
-        sig_row = self.signal_list.currentRow()
-        if msg_row < 0 or sig_row <= 0:
+        """Move the selected signals up within the current message."""
+        self._move_selected_signals(-1)
+    
+    def move_selected_signal_down(self):
+        """Move the selected signals down within the current message."""
+        self._move_selected_signals(1)
+
+    def import_signals(self):
+        """Import signals from a CSV/TSV file and report rejected rows."""
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Import Signals", "",
+            "Spreadsheet Files (*.csv *.tsv *.txt);;All Files (*)"
+        )
+        if not file_path:
             return
+        message_row = self.message_list.currentRow()
         try:
-            new_sig_idx = self.dbc_editor.move_signal_up(msg_row, sig_row)
-            # Refresh lists and selection
-            self.populate_message_list()
-            self.message_list.setCurrentRow(msg_row)
-            current_message = self.message_list.item(msg_row).data(QtCore.Qt.UserRole)
-            self.populate_signal_list(current_message)
-            self.signal_list.setCurrentRow(new_sig_idx)
-            self.status_label.setText("Signal moved up")
-            self.update_button_states()
+            self.status_label.setText("Importing signals...")
+            QtWidgets.QApplication.processEvents()
+            report = self.dbc_editor.import_signals_csv(file_path)
         except DBCEditorError as e:
-            self._show_error(f"Failed to move signal: {str(e)}")
+            self._show_error(f"Failed to import signals: {str(e)}")
+            return
         except Exception as e:
             self._show_error(f"Unexpected error: {str(e)}")
-    
-    def move_selected_signal_down(self):
-        """Move the selected signal down within the current message."""
-        msg_row = self.message_list.currentRow()
-        sig_row = self.signal_list.currentRow()
-        if msg_row < 0 or sig_row < 0 or sig_row >= self.signal_list.count() - 1:
+            return
+
+        summary = (f"Imported {report['imported']} of {report['rows']} signals"
+                   f" ({report['messages_created']} new messages).")
+        self._show_rows([message_row] if message_row >= 0 else [], status=summary)
+        errors = report['errors']
+        if errors:
+            details = "\n".join(f"Line {line}: {text}" for line, text in errors[:20])
+            if len(errors) > 20:
+                details += f"\n... and {len(errors) - 20} more"
+            QtWidgets.QMessageBox.warning(self, "Import Signals",
+                                          f"{summary}\n{len(errors)} rows were rejected:\n\n{details}")
+        else:
+            QtWidgets.QMessageBox.information(self, "Import Signals", summary)
+
+    def compare_files(self):
+        """Open the compare dialog; with data loaded it compares the file on disk with the current data."""
+        data = self.dbc_editor.get_data()
+        current_messages = data.get('messages') if data else None
+        dialog = DBCDiffDialog(self, current_messages=current_messages, current_path=self.current_file_path,
+                               current_hashes=self.dbc_editor.message_hashes)
+        dialog.exec_()
+
+    def merge_files(self):
+        """Three-way merge into the current data; the result becomes unsaved changes."""
+        data = self.dbc_editor.get_data()
+        dialog = DBCMergeDialog(self, current_messages=data.get('messages') if data else None,
+                                current_path=self.current_file_path)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
             return
         try:
-            new_sig_idx = self.dbc_editor.move_signal_down(msg_row, sig_row)
+            self.dbc_editor.replace_messages(dialog.merged_messages())
             self.populate_message_list()
-            self.message_list.setCurrentRow(msg_row)
-            current_message = self.message_list.item(msg_row).data(QtCore.Qt.UserRole)
-            self.populate_signal_list(current_message)
-            self.signal_list.setCurrentRow(new_sig_idx)
-            self.status_label.setText("Signal moved down")
+            self.signal_list.clear()
+            self.status_label.setText("Merge applied - review and save the changes")
             self.update_button_states()
         except DBCEditorError as e:
-            self._show_error(f"Failed to move signal: {str(e)}")
-        except Exception as e:
-            self._show_error(f"Unexpected error: {str(e)}")
+            self._show_error(f"Failed to apply merge: {str(e)}")
+
+    def show_history(self):
+        """Saved versions of the current file; restoring one reloads the file."""
+        if not self.current_file_path:
+            return
+        self.wait_for_save()
+        data = self.dbc_editor.get_data()
+        try:
+            dialog = DBCHistoryDialog(self, self.dbc_editor, current_messages=data.get('messages') if data else None)
+        except DBCEditorError as e:
+            self._show_error(str(e))
+            return
+        self._loading_file = True
+        try:
+            restored = dialog.exec_() == QtWidgets.QDialog.Accepted
+        finally:
+            self._loading_file = False
+        if restored:
+            self.populate_message_list()
+            self.status_label.setText(f"Restored version {dialog.restored_version}")
+            self.update_button_states()
+
+    def _confirm_valid_for_save(self) -> bool:
+        """Validate the whole file (one linear pass) and ask before saving a file with problems."""
+        errors = self.dbc_editor.validate()
+        if not errors:
+            return True
+        details = "\n".join(errors[:15])
+        if len(errors) > 15:
+            details += f"\n... and {len(errors) - 15} more"
+        reply = QtWidgets.QMessageBox.question(
+            self, "Validation Problems",
+            f"The DBC data has {len(errors)} problems:\n\n{details}\n\nSave anyway?",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+            QtWidgets.QMessageBox.No
+        )
+        return reply == QtWidgets.QMessageBox.Yes
 
     def save_changes(self):
-        """Save changes to the current file with error handling."""
+        """Save changes to the current file in the background."""
         if not self.current_file_path:
             # If no file path, prompt for save as
             self.save_as()
             return
-        try:
-            self.status_label.setText("Saving changes...")
-            QtWidgets.QApplication.processEvents()
-            self.dbc_editor.save_dbc_file(self.current_file_path)
-            self.file_label.setText(f"File: {self.current_file_path}")
-            self.status_label.setText("Changes saved successfully")
-            self.update_button_states()
-            QtWidgets.QMessageBox.information(self, "Success", f"Changes saved successfully to:\n{self.current_file_path}")
-        except DBCEditorError as e:
-            self._show_error(f"Failed to save changes: {str(e)}")
-        except Exception as e:
-            self._show_error(f"Unexpected error: {str(e)}")
+        if not self._confirm_valid_for_save():
+            return
+        self._start_save(self.current_file_path)
 
     def save_as(self):
-        """Save changes to a new file with error handling."""
+        """Save changes to a new file in the background."""
+        if not self._confirm_valid_for_save():
+            return
         try:
             file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
                 self, "Save DBC File As", "", "DBC Files (*.dbc);;All Files (*)"
@@ -1225,20 +1555,67 @@ class DBCEditorWidget(QtWidgets.QWidget):
                 # Ensure .dbc extension
                 if not file_path.lower().endswith('.dbc'):
                     file_path += '.dbc'
-                
-                self.status_label.setText("Saving file...")
-                QtWidgets.QApplication.processEvents()
-                self.dbc_editor.save_dbc_file(file_path)
-                self.current_file_path = file_path
-                self.file_label.setText(f"File: {file_path}")
-                self.status_label.setText("File saved successfully")
-                self.update_button_states()
-                QtWidgets.QMessageBox.information(self, "Success", f"File saved successfully to:\n{file_path}")
-        except DBCEditorError as e:
-            self._show_error(f"Failed to save file: {str(e)}")
+                self._start_save(file_path)
         except Exception as e:
             self._show_error(f"Unexpected error: {str(e)}")
 
+    def is_saving(self) -> bool:
+        return self._save_worker is not None
+
+    def wait_for_save(self) -> None:
+        """Block until a running background save has finished (e.g. before closing)."""
+        if self._save_worker is not None:
+            self._save_worker.wait()
+            # Deliver the worker's queued signals so the save gets committed
+            QtWidgets.QApplication.processEvents()
+
+    def _start_save(self, file_path: str) -> None:
+        """
+        Snapshot the data on the GUI thread and write it on a SaveWorker.
+        Editing stays possible meanwhile; edits made during the save remain unsaved changes.
+        """
+        if self.is_saving():
+            return
+        if not self.dbc_editor.needs_save(file_path):
+            self.status_label.setText("No changes to save")
+            return
+        try:
+            snapshot = self.dbc_editor.prepare_save(file_path)
+        except DBCEditorError as e:
+            self._show_error(f"Failed to save file: {str(e)}")
+            return
+        self.status_label.setText(f"Saving {os.path.basename(file_path)}...")
+        self.save_progress.setRange(0, 0)
+        self.save_progress.setVisible(True)
+        self._save_worker = SaveWorker(self.dbc_editor, snapshot, self)
+        self._save_worker.progress.connect(self._on_save_progress)
+        self._save_worker.saved.connect(self._on_save_finished)
+        self._save_worker.failed.connect(self._on_save_failed)
+        self._save_worker.finished.connect(self._on_save_worker_done)
+        self._save_worker.start()
+        self.update_button_states()
+
+    def _on_save_progress(self, done: int, total: int):
+        self.save_progress.setRange(0, total)
+        self.save_progress.setValue(done)
+
+    def _on_save_finished(self, snapshot, index):
+        self.dbc_editor.commit_save(snapshot, index)
+        file_path = snapshot['file_path']
+        self.current_file_path = file_path
+        self.file_label.setText(f"File: {file_path}")
+        self.status_label.setText("File saved successfully")
+        self.update_button_states()
+
+    def _on_save_failed(self, message: str):
+        self._show_error(f"Failed to save file: {message}")
+
+    def _on_save_worker_done(self):
+        self._save_worker.deleteLater()
+        self._save_worker = None
+        self.save_progress.setVisible(False)
+        self.update_button_states()
+
     def _show_error(self, message):
         QtWidgets.QMessageBox.critical(self, "Error", message)
         self.status_label.setText(f"<font color='red'>{message}</font>") 
\ No newline at end of file
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Content hashes of the DBC editor model.
+
+The hashes form a tree: every signal dict has a digest, a message digest covers
+the message's own fields (name, frame id, protocol, length, senders, comments,
+signal groups) and its signals in order, and a file digest covers the message
+digests.
+Two versions of the model are compared top-down and only descend into subtrees
+whose digests differ, so comparing costs O(number of messages) digest
+comparisons plus work proportional to what actually changed.
+
+Digests are short BLAKE2b hashes of a canonical encoding. A signal is
+encoded as the values of its fields in key order, fetched with one
+itemgetter per set of keys, plus a digest of the key names; dict values
+(value tables) are put in key order. The values are serialized with marshal
+format 2, which writes equal values as equal bytes whatever objects they are
+made of (format 3 and later add back-references that depend on object
+identity) and is several times cheaper than JSON. Values marshal does not
+know are encoded with repr(). Digests are the same in every process
+(decode_cache keeps them on disk) but may change with the Python version.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import marshal
+import operator
+import threading
+from itertools import chain, repeat
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+DIGEST_SIZE = 16
+
+MESSAGE_HASH_FIELDS = ('name', 'frame_id', 'protocol', 'length', 'senders', 'comments', 'signal_groups')
+
+_MARSHAL_VERSION = 2
+
+# Signal key tuple (in dict order) -> (digest of the sorted keys, getter of the values in sorted key order)
+_layouts: Dict[Tuple[str, ...], Tuple[bytes, Callable[[Dict[str, Any]], Tuple[Any, ...]]]] = {}
+_layout_lock = threading.Lock()
+
+
+def _layout(keys: Tuple[str, ...]) -> Tuple[bytes, Callable[[Dict[str, Any]], Tuple[Any, ...]]]:
+    with _layout_lock:
+        layout = _layouts.get(keys)
+        if layout is None:
+            ordered = tuple(sorted(keys))
+            digest = hashlib.blake2b(_encode(ordered), digest_size=8).digest()
+            getter = operator.itemgetter(*ordered) if len(ordered) > 1 else lambda d: tuple(d[k] for k in ordered)
+            layout = _layouts[keys] = (digest, getter)
+        return layout
+
+
+def _ordered(values: Iterable[Any]) -> List[Any]:
+    """values with the dicts among them replaced by their items in key order."""
+    return [_items(value) if type(value) is dict else value for value in values]
+
+
+def _items(value: Dict[Any, Any]) -> List[Tuple[Any, Any]]:
+    try:
+        items = sorted(value.items())
+    except TypeError:
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+    if dict in map(type, value.values()):
+        items = [(k, *_ordered([v])) for k, v in items]
+    return items
+
+
+def _signal_values(signal: Dict[str, Any]) -> Tuple[bytes, Any]:
+    keys = tuple(signal)
+    layout = _layouts.get(keys) or _layout(keys)
+    values = layout[1](signal)
+    if dict in map(type, values):
+        values = _ordered(values)
+    return layout[0], values
+
+
+def _signals_values(signals: List[Dict[str, Any]]) -> List[Tuple[bytes, Any]]:
+    """[_signal_values(s) for s in signals], in bulk when all signals have the same keys (the usual case)."""
+    keys = list(map(tuple, signals))
+    if not keys or keys.count(keys[0]) != len(keys):
+        return [_signal_values(s) for s in signals]
+    layout, getter = _layouts.get(keys[0]) or _layout(keys[0])
+    rows = list(map(getter, signals))
+    if dict in map(type, chain.from_iterable(rows)):
+        rows = [_ordered(row) if dict in map(type, row) else row for row in rows]
+    return list(zip(repeat(layout), rows))
+
+
+def _encode(value: Any) -> bytes:
+    try:
+        return b'm' + marshal.dumps(value, _MARSHAL_VERSION)
+    except ValueError:
+        return b'r' + repr(value).encode('utf-8', 'surrogatepass')
+
+
+def signal_digest(signal: Dict[str, Any]) -> bytes:
+    return hashlib.blake2b(_encode(_signal_values(signal)), digest_size=DIGEST_SIZE).digest()
+
+
+class MessageHashes:
+    """
+    Digests of one message: its header fields, the whole message, and (computed
+    on first access, as only changed messages are descended into) each signal.
+    The message dict must not be mutated while its MessageHashes is in use.
+    """
+    __slots__ = ('name', 'header', 'digest', '_message', '_signals')
+
+    def __init__(self, message: Dict[str, Any]):
+        self.name = message.get('name')
+        header = [message.get(field) for field in MESSAGE_HASH_FIELDS]
+        if dict in map(type, header):
+            header = _ordered(header)
+        self.header = hashlib.blake2b(_encode(header), digest_size=DIGEST_SIZE).digest()
+        # One encoding of all signals is much cheaper than one per signal
+        h = hashlib.blake2b(self.header, digest_size=DIGEST_SIZE)
+        h.update(_encode(_signals_values(message.get('signals', []))))
+        self.digest = h.digest()
+        self._message = message
+        self._signals = None
+
+    @property
+    def signals(self) -> Dict[str, bytes]:
+        """Signal name -> digest, in signal order."""
+        if self._signals is None:
+            self._signals = {s.get('name'): signal_digest(s) for s in self._message.get('signals', [])}
+        return self._signals
+
+
+def message_digest(message: Dict[str, Any]) -> bytes:
+    """Return the digest of a message dict including its signals."""
+    return MessageHashes(message).digest
+
+
+def file_digest(message_hashes: Iterable[MessageHashes]) -> bytes:
+    """Root of the tree: digest over the message digests in file order."""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for hashes in message_hashes:
+        h.update(hashes.digest)
+    return h.digest()
+
+
+def diff_hashes(old: List[MessageHashes], new: List[MessageHashes]) -> Dict[str, List[str]]:
+    """
+    Compare two versions given as lists of MessageHashes, matching messages and
+    signals by name. Messages with equal digests are skipped without looking at
+    their signals. Returns the lists of added/deleted/modified messages and of
+    added/deleted/modified signals (as "Message.Signal").
+    """
+    result = {
+        'added_messages': [], 'deleted_messages': [], 'modified_messages': [],
+        'added_signals': [], 'deleted_signals': [], 'modified_signals': [],
+    }
+    old_by_name = {h.name: h for h in old}
+    new_by_name = {h.name: h for h in new}
+    for name, new_hashes in new_by_name.items():
+        old_hashes = old_by_name.get(name)
+        if old_hashes is None:
+            result['added_messages'].append(name)
+            continue
+        if old_hashes.digest == new_hashes.digest:
+            continue
+        result['modified_messages'].append(name)
+        old_signals, new_signals = old_hashes.signals, new_hashes.signals
+        for sig_name, digest in new_signals.items():
+            old_digest = old_signals.get(sig_name)
+            if old_digest is None:
+                result['added_signals'].append(f"{name}.{sig_name}")
+            elif old_digest != digest:
+                result['modified_signals'].append(f"{name}.{sig_name}")
+        for sig_name in old_signals:
+            if sig_name not in new_signals:
+                result['deleted_signals'].append(f"{name}.{sig_name}")
+    result['deleted_messages'] = [name for name in old_by_name if name not in new_by_name]
+    return result
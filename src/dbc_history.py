@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Local history of the saved versions of a DBC file.
+
+Versions live in "<file>.dbc.history/" next to the file. Most versions are
+stored as a zlib-compressed line delta against the previous version; every
+KEYFRAME_INTERVAL-th version is stored in full (compressed), so restoring any
+version decompresses one full version and applies at most
+KEYFRAME_INTERVAL - 1 deltas.
+
+A delta is a list of records that rebuild the new version from the previous one:
+    b'C' + offset + length    copy bytes of the previous version
+    b'I' + length + bytes     insert new bytes
+with numbers as little-endian uint64. Copies always cover whole lines of the
+previous version.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SUFFIX = '.history'
+INDEX_FILE = 'index.json'
+INDEX_VERSION = 1
+KEYFRAME_INTERVAL = 20
+MAX_VERSIONS = 500
+COMPRESSION_LEVEL = 6
+# Lines of the previous version searched for a changed line before using the full line index
+LOOKAHEAD_LINES = 64
+
+_COPY = b'C'
+_INSERT = b'I'
+_U64 = struct.Struct('<Q')
+_U64_PAIR = struct.Struct('<QQ')
+
+
+class DBCHistoryError(Exception):
+    pass
+
+
+def history_directory(file_path: str) -> str:
+    return file_path + HISTORY_SUFFIX
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _common_run(a: List[bytes], i: int, b: List[bytes], j: int, limit: int) -> int:
+    """Number of equal lines of a from i and b from j (at most limit), compared in growing slices."""
+    n = 0
+    step = 1
+    while n < limit:
+        k = min(step, limit - n)
+        if a[i + n:i + n + k] == b[j + n:j + n + k]:
+            n += k
+            step *= 2
+        elif k == 1:
+            break
+        else:
+            step = 1
+    return n
+
+
+def _common_suffix(a: List[bytes], b: List[bytes], limit: int) -> int:
+    n = 0
+    step = 1
+    while n < limit:
+        k = min(step, limit - n)
+        if a[len(a) - n - k:len(a) - n] == b[len(b) - n - k:len(b) - n]:
+            n += k
+            step *= 2
+        elif k == 1:
+            break
+        else:
+            step = 1
+    return n
+
+
+def make_delta(old: bytes, new: bytes) -> bytes:
+    """
+    Encode new as copies of line ranges of old plus inserted bytes.
+    Runs of equal lines are compared as list slices of growing size, so an
+    unchanged stretch costs a few comparisons instead of one per line. After
+    a difference, the next line of new is searched in the following
+    LOOKAHEAD_LINES lines of old (changed or deleted lines) and only then in an
+    index of the lines of old (moved lines), built on first use. The cost
+    stays linear in the file size.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_offsets = [0]
+    old_offsets.extend(itertools.accumulate(map(len, old_lines)))
+    limit = min(len(old_lines), len(new_lines))
+    prefix = _common_run(old_lines, 0, new_lines, 0, limit)
+    suffix = _common_suffix(old_lines, new_lines, limit - prefix)
+    middle_end = len(old_lines) - suffix
+    new_end = len(new_lines) - suffix
+
+    out = []
+    pending_insert = []
+    copy_start = copy_end = None  # line range of old being copied
+
+    def flush():
+        nonlocal copy_start, copy_end
+        if copy_start is not None:
+            start = old_offsets[copy_start]
+            out.append(_COPY + _U64_PAIR.pack(start, old_offsets[copy_end] - start))
+            copy_start = copy_end = None
+        if pending_insert:
+            data = b''.join(pending_insert)
+            out.append(_INSERT + _U64.pack(len(data)) + data)
+            pending_insert.clear()
+
+    def copy(start, count):
+        nonlocal copy_start, copy_end
+        if copy_end != start or pending_insert:
+            flush()
+            copy_start = start
+        copy_end = start + count
+
+    if prefix:
+        copy(0, prefix)
+    cursor = prefix  # line of old expected next
+    positions = None  # line -> number of its last occurrence in old, see above
+    j = prefix
+    while j < new_end:
+        line = new_lines[j]
+        if cursor < middle_end and old_lines[cursor] == line:
+            number = cursor
+        else:
+            number = None
+            for candidate in range(cursor + 1, min(cursor + LOOKAHEAD_LINES, middle_end)):
+                if old_lines[candidate] == line:
+                    number = candidate
+                    break
+            if number is None:
+                if positions is None:
+                    positions = dict(zip(old_lines[prefix:middle_end], range(prefix, middle_end)))
+                number = positions.get(line)
+        if number is None:
+            if copy_start is not None:
+                flush()
+            pending_insert.append(line)
+            j += 1
+            continue
+        count = _common_run(old_lines, number, new_lines, j, min(middle_end - number, new_end - j))
+        copy(number, count)
+        cursor = number + count
+        j += count
+    if suffix:
+        copy(middle_end, suffix)
+    flush()
+    return b''.join(out)
+
+
+def apply_delta(old: bytes, delta: bytes) -> bytes:
+    parts = []
+    position = 0
+    view = memoryview(delta)
+    while position < len(delta):
+        kind = delta[position:position + 1]
+        position += 1
+        if kind == _COPY:
+            start, length = _U64_PAIR.unpack_from(delta, position)
+            position += _U64_PAIR.size
+            parts.append(old[start:start + length])
+        elif kind == _INSERT:
+            (length,) = _U64.unpack_from(delta, position)
+            position += _U64.size
+            parts.append(bytes(view[position:position + length]))
+            position += length
+        else:
+            raise DBCHistoryError(f"Corrupt delta record at byte {position - 1}")
+    return b''.join(parts)
+
+
+class DBCHistory:
+    """
+    The saved versions of one DBC file. Each version is described by a dict
+    with 'version' (number, increasing), 'timestamp', 'size', 'digest',
+    'kind' ('full' or 'delta') and 'stored_size' (bytes on disk).
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.directory = history_directory(file_path)
+        self._versions: Optional[List[Dict[str, Any]]] = None
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """All stored versions, oldest first."""
+        if self._versions is None:
+            self._versions = []
+            index_path = os.path.join(self.directory, INDEX_FILE)
+            if os.path.exists(index_path):
+                try:
+                    with open(index_path, 'r', encoding='utf-8') as f:
+                        index = json.load(f)
+                    if index.get('format') == INDEX_VERSION:
+                        self._versions = list(index.get('versions', []))
+                    else:
+                        logger.warning(f"Unsupported history format in {self.directory}")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read history index {index_path}: {e}")
+        return list(self._versions)
+
+    def _entry(self, version: int) -> int:
+        for i, entry in enumerate(self.versions()):
+            if entry['version'] == version:
+                return i
+        raise DBCHistoryError(f"Version {version} not found in the history of {self.file_path}")
+
+    def _blob_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.directory, f"{entry['version']:06d}.{entry['kind']}")
+
+    def _read_blob(self, entry: Dict[str, Any]) -> bytes:
+        try:
+            with open(self._blob_path(entry), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise DBCHistoryError(f"Could not read version {entry['version']}: {e}")
+
+    def _write_index(self) -> None:
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': INDEX_VERSION, 'versions': self._versions}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, index_path)
+
+    def read_version(self, version: int) -> bytes:
+        """Contents of a stored version: its keyframe plus the deltas up to it."""
+        versions = self.versions()
+        target = self._entry(version)
+        base = target
+        while versions[base]['kind'] != 'full':
+            base -= 1
+            if base < 0:
+                raise DBCHistoryError(f"No full version before version {version}")
+        data = self._read_blob(versions[base])
+        for entry in versions[base + 1:target + 1]:
+            data = apply_delta(data, self._read_blob(entry))
+        if _digest(data) != versions[target]['digest']:
+            raise DBCHistoryError(f"Version {version} is corrupt (digest mismatch)")
+        return data
+
+    def add_version(self, data: bytes, previous: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+        """
+        Store data as the newest version, unless it equals the newest one.
+        previous may pass the contents of the newest version when the caller
+        already has them, which saves rebuilding them from the history.
+        Returns the new version entry, or None if nothing was stored.
+        """
+        versions = self.versions()
+        digest = _digest(data)
+        if versions and versions[-1]['digest'] == digest:
+            return None
+        since_keyframe = 0
+        for entry in reversed(versions):
+            if entry['kind'] == 'full':
+                break
+            since_keyframe += 1
+        if versions and since_keyframe + 1 < KEYFRAME_INTERVAL:
+            if previous is None or _digest(previous) != versions[-1]['digest']:
+                previous = self.read_version(versions[-1]['version'])
+            kind, payload = 'delta', make_delta(previous, data)
+        else:
+            kind, payload = 'full', data
+        entry = {
+            'version': versions[-1]['version'] + 1 if versions else 1,
+            'timestamp': time.time(),
+            'size': len(data),
+            'digest': digest,
+            'kind': kind,
+        }
+        blob = zlib.compress(payload, COMPRESSION_LEVEL)
+        entry['stored_size'] = len(blob)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._blob_path(entry), 'wb') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        self._versions.append(entry)
+        self._prune()
+        self._write_index()
+        logger.info(f"Stored version {entry['version']} of {self.file_path} ({kind}, {len(blob)} bytes)")
+        return entry
+
+    def _prune(self) -> None:
+        """Drop the oldest keyframe groups while more than MAX_VERSIONS versions are kept."""
+        while len(self._versions) > MAX_VERSIONS:
+            next_keyframe = next((i for i, entry in enumerate(self._versions) if i and entry['kind'] == 'full'), None)
+            if next_keyframe is None or len(self._versions) - next_keyframe < MAX_VERSIONS // 2:
+                break
+            for entry in self._versions[:next_keyframe]:
+                try:
+                    os.remove(self._blob_path(entry))
+                except OSError:
+                    pass
+            del self._versions[:next_keyframe]
+
+    def record_current_file(self) -> Optional[bytes]:
+        """
+        Make sure the file as it is on disk is the newest version (it may be the
+        originally loaded file or have been changed by another program) and
+        return its contents, or None if the file does not exist.
+        """
+        if not os.path.exists(self.file_path):
+            return None
+        with open(self.file_path, 'rb') as f:
+            data = f.read()
+        self.add_version(data)
+        return data
+
+    def export_version(self, version: int, target_path: str) -> None:
+        with open(target_path, 'wb') as f:
+            f.write(self.read_version(version))
+
+    def total_stored_size(self) -> int:
+        return sum(entry.get('stored_size', 0) for entry in self.versions())
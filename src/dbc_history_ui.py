@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+History dialog for DBC Utility: lists the saved versions of the current file
+and compares a version with the current data or restores it.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from PyQt5 import QtCore, QtWidgets
+
+from dbc_editor import DBCEditor, DBCEditorError
+from dbc_history import DBCHistoryError
+from dbc_diff_ui import DBCDiffDialog
+
+
+def _format_size(size_bytes: int) -> str:
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    return f"{size_bytes / (1024 * 1024):.2f} MB"
+
+
+class DBCHistoryDialog(QtWidgets.QDialog):
+    """Saved versions of a file, newest first; restoring a version closes the dialog with Accepted."""
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget], dbc_editor: DBCEditor,
+                 current_messages: Optional[List[Dict[str, Any]]] = None) -> None:
+        super().__init__(parent)
+        self.dbc_editor = dbc_editor
+        self.current_messages = current_messages
+        self.history = dbc_editor.get_history()
+        self.restored_version: Optional[int] = None
+        self.setWindowTitle(f"History - {os.path.basename(dbc_editor.file_path)}")
+        self.resize(640, 420)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.summary_label = QtWidgets.QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QtWidgets.QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Version", "Saved", "Size", "Stored"])
+        self.table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.itemSelectionChanged.connect(self._update_buttons)
+        layout.addWidget(self.table)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.compare_button = QtWidgets.QPushButton("Compare with Current")
+        self.compare_button.clicked.connect(self.compare_selected)
+        self.restore_button = QtWidgets.QPushButton("Restore")
+        self.restore_button.clicked.connect(self.restore_selected)
+        buttons.addWidget(self.compare_button)
+        buttons.addWidget(self.restore_button)
+        buttons.addStretch()
+        close_button = QtWidgets.QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.populate()
+
+    def populate(self) -> None:
+        versions = list(reversed(self.history.versions()))
+        self.table.setRowCount(len(versions))
+        for row, entry in enumerate(versions):
+            saved = datetime.datetime.fromtimestamp(entry['timestamp']).strftime("%Y-%m-%d %H:%M:%S")
+            cells = [str(entry['version']), saved, _format_size(entry['size']),
+                     f"{_format_size(entry['stored_size'])} ({entry['kind']})"]
+            for col, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                item.setData(QtCore.Qt.UserRole, entry['version'])
+                self.table.setItem(row, col, item)
+        total = sum(entry['size'] for entry in versions)
+        self.summary_label.setText(
+            f"{len(versions)} saved versions, {_format_size(self.history.total_stored_size())} on disk "
+            f"({_format_size(total)} uncompressed)" if versions else "No saved versions yet."
+        )
+        self._update_buttons()
+
+    def _selected_version(self) -> Optional[int]:
+        items = self.table.selectedItems()
+        return items[0].data(QtCore.Qt.UserRole) if items else None
+
+    def _update_buttons(self) -> None:
+        selected = self._selected_version() is not None
+        self.compare_button.setEnabled(selected and self.current_messages is not None)
+        self.restore_button.setEnabled(selected)
+
+    def compare_selected(self) -> None:
+        version = self._selected_version()
+        if version is None:
+            return
+        directory = tempfile.mkdtemp(prefix="dbc_history_")
+        try:
+            name, ext = os.path.splitext(os.path.basename(self.history.file_path))
+            version_path = os.path.join(directory, f"{name} (version {version}){ext}")
+            try:
+                self.history.export_version(version, version_path)
+            except (OSError, DBCHistoryError) as e:
+                QtWidgets.QMessageBox.critical(self, "History", str(e))
+                return
+            dialog = DBCDiffDialog(self, current_messages=self.current_messages, current_path=version_path,
+                                   current_hashes=self.dbc_editor.message_hashes)
+            dialog.compare()
+            dialog.exec_()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def restore_selected(self) -> None:
+        version = self._selected_version()
+        if version is None:
+            return
+        message = f"Replace {os.path.basename(self.history.file_path)} with version {version}?"
+        if self.dbc_editor.has_changes():
+            message += "\nUnsaved changes will be lost."
+        reply = QtWidgets.QMessageBox.question(
+            self, "Restore Version", message,
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, QtWidgets.QMessageBox.No
+        )
+        if reply != QtWidgets.QMessageBox.Yes:
+            return
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            self.dbc_editor.restore_version(version)
+        except DBCEditorError as e:
+            QtWidgets.QMessageBox.critical(self, "Restore Version", str(e))
+            return
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.restored_version = version
+        self.accept()
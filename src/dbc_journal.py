@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Operation journal of the DBC editor, used to recover unsaved edits after a crash.
+
+Every editing operation is appended to "<file>.dbc.journal" as one JSON line
+in the format of DBCEditor.apply_batch() operations ('op' plus the method's
+arguments). The first line is a header with a digest of the DBC file contents
+the operations apply to, so a journal is only replayed on top of the file
+version it was written against.
+
+Lines are handed to the OS after every operation, which survives a crash of the
+application; fsync (which also survives a crash of the machine) is batched and
+runs every JOURNAL_SYNC_OPERATIONS operations or JOURNAL_SYNC_INTERVAL seconds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_VERSION = 1
+JOURNAL_SYNC_OPERATIONS = 64
+JOURNAL_SYNC_INTERVAL = 1.0
+
+
+def journal_path(file_path: str) -> str:
+    return file_path + JOURNAL_SUFFIX
+
+
+def file_content_digest(file_path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def _restore_choices(value: Any) -> Any:
+    """JSON turns the int keys of value tables into strings; turn them back."""
+    if isinstance(value, list):
+        return [_restore_choices(v) for v in value]
+    if isinstance(value, dict):
+        restored = {k: _restore_choices(v) for k, v in value.items()}
+        choices = restored.get('choices')
+        if isinstance(choices, dict):
+            restored['choices'] = {int(k): v for k, v in choices.items()}
+        return restored
+    return value
+
+
+class OperationJournal:
+    """
+    Append-only journal of the operations made since the last load or save of one file.
+    The journal file is created with the first operation.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.path = journal_path(file_path)
+        # Encoded operations since the last load/save, kept to carry edits over a background save
+        self._lines: List[str] = []
+        self._file = None
+        self._failed = False
+        self._unsynced = 0
+        self._last_sync = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def _open(self) -> None:
+        header = {'version': JOURNAL_VERSION, 'file': os.path.basename(self.file_path),
+                  'base_digest': file_content_digest(self.file_path)}
+        self._file = open(self.path, 'w', encoding='utf-8', newline='\n')
+        self._file.write(_encode(header) + '\n')
+        for line in self._lines:
+            self._file.write(line + '\n')
+        self._fsync()
+
+    def append(self, operation: Dict[str, Any]) -> None:
+        line = _encode(operation)
+        self._lines.append(line)
+        if self._failed:
+            return
+        try:
+            if self._file is None:
+                self._open()
+                return
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= JOURNAL_SYNC_OPERATIONS or \
+                    time.monotonic() - self._last_sync >= JOURNAL_SYNC_INTERVAL:
+                self._fsync()
+        except OSError as e:
+            # Journaling is best effort; editing must keep working without it
+            logger.warning(f"Could not write journal {self.path}: {e}")
+            self._failed = True
+
+    def sync(self) -> None:
+        """fsync the operations appended since the last sync, if any."""
+        if self._file is not None and self._unsynced:
+            self._fsync()
+
+    def _fsync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def rebase(self, file_path: str, position: int) -> None:
+        """
+        Start over from the file just saved to file_path, which contains the first
+        `position` operations; the later ones (made while the save was running) are kept.
+        """
+        remaining = self._lines[position:]
+        self.discard()
+        self.file_path = file_path
+        self.path = journal_path(file_path)
+        self._lines = remaining
+        self._failed = False
+        if remaining:
+            try:
+                self._open()
+            except OSError as e:
+                logger.warning(f"Could not write journal {self.path}: {e}")
+                self._failed = True
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self.sync()
+            except OSError:
+                pass
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close the journal and delete its file."""
+        self.close()
+        self._lines = []
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Could not delete journal {self.path}: {e}")
+
+
+def read_journal(file_path: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Read the journal of file_path. Returns (base_digest, operations), or None
+    when there is no readable journal. A torn last line (the crash happened
+    while it was written) is ignored.
+    """
+    path = journal_path(file_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != JOURNAL_VERSION:
+                logger.warning(f"Unsupported journal version in {path}")
+                return None
+            operations = []
+            for line in f:
+                try:
+                    operations.append(_restore_choices(json.loads(line)))
+                except ValueError:
+                    break
+        return header['base_digest'], operations
+    except (OSError, ValueError, KeyError, AttributeError) as e:
+        logger.warning(f"Could not read journal {path}: {e}")
+        return None
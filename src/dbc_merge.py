@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+DBC Merge Module
+Three-way merge (base, ours, theirs) of DBC editor models at message/signal granularity.
+
+Messages and signals of each side are matched against the base the same way
+dbc_diff matches them (by name, then by frame id / bit position). A message
+changed on one side only is taken from that side; messages changed on both
+sides are merged field by field and signal by signal. Messages whose content
+hash equals the base are never looked into, so merging costs O(messages) hash
+comparisons plus work proportional to the changes.
+
+Conflicts (the same field or signal changed differently on both sides, deleted
+on one side and modified on the other, added twice with different content, or
+two messages ending up with the same frame id) are returned with a stable id.
+Unresolved conflicts keep "ours"; passing {conflict id: 'ours' | 'theirs'} as
+resolutions to a new merge run applies the choices. A frame id collision can
+also be resolved by keeping only one side's messages or by moving messages to
+a free frame id; while messages still share a frame id its conflict stays
+unresolved, and the result should not be applied:
+
+>>> def message(name, frame_id):
+...     return {'name': name, 'frame_id': frame_id, 'length': 8, 'senders': [], 'signals': []}
+>>> base, ours, theirs = [], [message('C', 5)], [message('D', 5)]
+>>> result = merge_models(base, ours, theirs, {'frame_id:5': THEIRS})
+>>> [(m['name'], m['frame_id']) for m in result['messages']], result['conflicts'][0]['resolution']
+([('C', 5), ('D', 5)], None)
+>>> result = merge_models(base, ours, theirs, {'frame_id:5': KEEP_THEIRS})
+>>> [(m['name'], m['frame_id']) for m in result['messages']], result['conflicts'][0]['resolution']
+([('D', 5)], 'keep_theirs')
+>>> result = merge_models(base, ours, theirs, {'frame_id:5': NEW_ID})
+>>> [(m['name'], m['frame_id']) for m in result['messages']], result['conflicts'][0]['resolution']
+([('C', 5), ('D', 6)], 'new_id')
+"""
+
+import copy
+import itertools
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dbc_editor import DBCEditor
+from dbc_hashing import MessageHashes
+from dbc_diff import match_items, signal_position
+
+OURS = 'ours'
+THEIRS = 'theirs'
+# Further resolutions of frame id collisions, see _check_frame_ids
+KEEP_OURS = 'keep_ours'
+KEEP_THEIRS = 'keep_theirs'
+NEW_ID = 'new_id'
+
+
+class _MergeState:
+    def __init__(self, resolutions: Optional[Dict[str, str]]):
+        self.resolutions = resolutions or {}
+        self.conflicts: List[Dict[str, Any]] = []
+        self.stats = {'unchanged': 0, 'from_ours': 0, 'from_theirs': 0, 'merged': 0}
+
+    def conflict(self, conflict_id: str, kind: str, description: str,
+                 base: Any, ours: Any, theirs: Any, **location) -> str:
+        """Record a conflict and return the side to use for it."""
+        choice = self.resolutions.get(conflict_id)
+        self.conflicts.append({
+            'id': conflict_id,
+            'kind': kind,
+            'description': description,
+            'base': base,
+            'ours': ours,
+            'theirs': theirs,
+            'resolution': choice,
+            'message': location.get('message'),
+            'signal': location.get('signal'),
+            'field': location.get('field'),
+        })
+        return choice or OURS
+
+
+def _copy_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a message deep enough for editing (the editor replaces signal dicts, never mutates them)."""
+    result = dict(message)
+    result['senders'] = list(message.get('senders', []))
+    result['signals'] = [dict(sig) for sig in message.get('signals', [])]
+    return result
+
+
+def _merge_value(base: Any, ours: Any, theirs: Any) -> Tuple[Any, bool]:
+    """Three-way merge of one value. Returns (value, conflicting)."""
+    if ours == theirs or theirs == base:
+        return ours, False
+    if ours == base:
+        return theirs, False
+    return ours, True
+
+
+def _merge_fields(base: Dict[str, Any], ours: Dict[str, Any], theirs: Dict[str, Any],
+                  skip, state: _MergeState, id_prefix: str, **location) -> Dict[str, Any]:
+    merged = {}
+    for field in list(ours) + [f for f in theirs if f not in ours]:
+        if field in skip:
+            continue
+        value, conflicting = _merge_value(base.get(field), ours.get(field), theirs.get(field))
+        if conflicting:
+            choice = state.conflict(f"{id_prefix}.{field}", 'field',
+                                    f"{field} changed on both sides",
+                                    base.get(field), ours.get(field), theirs.get(field),
+                                    field=field, **location)
+            value = theirs.get(field) if choice == THEIRS else ours.get(field)
+        merged[field] = copy.deepcopy(value)
+    return merged
+
+
+def _pair_with_base(base_items, other_items, key):
+    """Map id(base item) -> matching item of the other side (None if deleted), plus the added items."""
+    pairs, added, _ = match_items(base_items, other_items, key)
+    matched = {id(b): o for b, o in pairs}
+    return {id(b): matched.get(id(b)) for b in base_items}, added
+
+
+def _merge_added(ours_added, theirs_added, state: _MergeState, kind: str, id_prefix: str,
+                 **location) -> List[Tuple[Dict[str, Any], str]]:
+    """Union of items added on both sides; the same name added twice differently is a conflict."""
+    result = [(item, OURS) for item in ours_added]
+    index = {item['name']: i for i, item in enumerate(ours_added)}
+    for item in theirs_added:
+        i = index.get(item['name'])
+        if i is None:
+            result.append((item, THEIRS))
+        elif ours_added[i] != item:
+            name = item['name']
+            choice = state.conflict(f"{id_prefix}{name}", kind, f"{name} added differently on both sides",
+                                    None, ours_added[i], item, **dict(location, **{kind: name}))
+            if choice == THEIRS:
+                result[i] = (item, THEIRS)
+    return result
+
+
+def _merge_signals(base_msg, ours_msg, theirs_msg, state: _MergeState) -> List[Dict[str, Any]]:
+    msg_name = base_msg['name']
+    base_signals = base_msg.get('signals', [])
+    ours_map, ours_added = _pair_with_base(base_signals, ours_msg.get('signals', []), signal_position)
+    theirs_map, theirs_added = _pair_with_base(base_signals, theirs_msg.get('signals', []), signal_position)
+
+    # id(ours signal) -> merged signal; signals kept only by theirs are appended in base order
+    merged_for_ours = {}
+    extra = []
+    for base_sig in base_signals:
+        ours_sig, theirs_sig = ours_map[id(base_sig)], theirs_map[id(base_sig)]
+        conflict_id = f"signal:{msg_name}.{base_sig['name']}"
+        if ours_sig is None and theirs_sig is None:
+            continue
+        if ours_sig is None or theirs_sig is None:
+            remaining = ours_sig if ours_sig is not None else theirs_sig
+            if remaining == base_sig:
+                continue  # deleted on one side, untouched on the other
+            choice = state.conflict(conflict_id, 'signal',
+                                    f"{base_sig['name']} deleted on one side and modified on the other",
+                                    base_sig, ours_sig, theirs_sig, message=msg_name, signal=base_sig['name'])
+            chosen = theirs_sig if choice == THEIRS else ours_sig
+            if chosen is not None:
+                if chosen is ours_sig:
+                    merged_for_ours[id(ours_sig)] = copy.deepcopy(chosen)
+                else:
+                    extra.append(copy.deepcopy(chosen))
+            continue
+        merged_for_ours[id(ours_sig)] = _merge_fields(
+            base_sig, ours_sig, theirs_sig, (), state, f"field:{msg_name}.{base_sig['name']}",
+            message=msg_name, signal=base_sig['name'])
+
+    added = _merge_added(ours_added, theirs_added, state, 'signal', f"signal:{msg_name}.", message=msg_name)
+    added_ours = {id(item): item for item, side in added if side == OURS}
+    added_theirs = [item for item, side in added if side == THEIRS]
+
+    signals = []
+    for sig in ours_msg.get('signals', []):
+        if id(sig) in merged_for_ours:
+            signals.append(merged_for_ours[id(sig)])
+        elif id(sig) in added_ours:
+            signals.append(copy.deepcopy(sig))
+    signals.extend(extra)
+    signals.extend(copy.deepcopy(sig) for sig in added_theirs)
+    return signals
+
+
+def _merge_message(base_msg, ours_msg, theirs_msg, state: _MergeState) -> Dict[str, Any]:
+    name = base_msg['name']
+    merged = _merge_fields(base_msg, ours_msg, theirs_msg, ('signals',), state, f"field:{name}", message=name)
+    merged['signals'] = _merge_signals(base_msg, ours_msg, theirs_msg, state)
+    return merged
+
+
+def _free_frame_id(frame_id: int, used) -> Optional[int]:
+    """Lowest unused frame id above frame_id in its range (standard or extended), wrapping around."""
+    last = 0x7FF if frame_id <= 0x7FF else 0x1FFFFFFF
+    first = 0 if frame_id <= 0x7FF else 0x800
+    for candidate in itertools.chain(range(frame_id + 1, last + 1), range(first, frame_id)):
+        if candidate not in used:
+            return candidate
+    return None
+
+
+def _resolve_frame_id(merged: List[Tuple[Dict[str, Any], str]], indices: List[int], frame_id: Any,
+                      choice: str, sides: Dict[int, Dict[str, Dict[str, Any]]], dropped: set) -> None:
+    """Apply the resolution of one frame id collision to the merged messages at indices."""
+    if choice == NEW_ID:
+        # The messages holding the frame id in ours keep it (else the first one does); the others move
+        holders = [i for i in indices
+                   if (sides.get(id(merged[i][0]), {}).get(OURS) or {}).get('frame_id') == frame_id] or indices[:1]
+        used = {msg.get('frame_id') for i, (msg, _) in enumerate(merged) if i not in dropped}
+        for i in indices:
+            if i == holders[0] or not isinstance(frame_id, int):
+                continue
+            new_id = _free_frame_id(frame_id, used)
+            if new_id is not None:
+                merged[i][0]['frame_id'] = new_id
+                used.add(new_id)
+        return
+    side = {KEEP_OURS: OURS, KEEP_THEIRS: THEIRS}.get(choice, choice)
+    for i in indices:
+        chosen = sides.get(id(merged[i][0]), {}).get(side)
+        if chosen is not None:
+            merged[i][0]['frame_id'] = chosen.get('frame_id')
+        elif choice in (KEEP_OURS, KEEP_THEIRS):
+            dropped.add(i)
+
+
+def _check_frame_ids(merged: List[Tuple[Dict[str, Any], str]], sides: Dict[int, Dict[str, Dict[str, Any]]],
+                     state: _MergeState) -> List[Dict[str, Any]]:
+    """
+    Report messages sharing a frame id and apply the resolutions (sides maps
+    id(merged message) to its version on each side):
+        ours / theirs            each message takes its frame id on that side;
+                                 messages that side does not have keep theirs
+        keep_ours / keep_theirs  the same, but messages that side does not
+                                 have are dropped
+        new_id                   the messages without the frame id in ours
+                                 get the next free frame id
+    Moved messages can collide again, so collisions are looked for until no
+    resolution applies; a conflict whose messages still share a frame id is
+    left unresolved (resolution None).
+    """
+    conflicts = {}
+    applied = set()
+    dropped = set()
+    while True:
+        by_frame_id = defaultdict(list)
+        for i, (msg, _) in enumerate(merged):
+            if i not in dropped:
+                by_frame_id[msg.get('frame_id')].append(i)
+        collisions = [(frame_id, indices) for frame_id, indices in by_frame_id.items() if len(indices) > 1]
+        changed = False
+        for frame_id, indices in collisions:
+            conflict_id = f"frame_id:{frame_id}"
+            if conflict_id not in conflicts:
+                names = [merged[i][0]['name'] for i in indices]
+                state.conflict(conflict_id, 'frame_id',
+                               f"Frame ID 0x{frame_id:X} used by {', '.join(names)}" if isinstance(frame_id, int)
+                               else f"Frame ID {frame_id} used by {', '.join(names)}",
+                               None,
+                               [merged[i][0]['name'] for i in indices if merged[i][1] != THEIRS],
+                               [merged[i][0]['name'] for i in indices if merged[i][1] != OURS],
+                               field='frame_id')
+                conflicts[conflict_id] = state.conflicts[-1]
+            choice = state.resolutions.get(conflict_id)
+            if choice is not None and conflict_id not in applied:
+                applied.add(conflict_id)
+                _resolve_frame_id(merged, indices, frame_id, choice, sides, dropped)
+                changed = True
+        if not changed:
+            break
+    for frame_id, _ in collisions:
+        conflicts[f"frame_id:{frame_id}"]['resolution'] = None
+    return [msg for i, (msg, _) in enumerate(merged) if i not in dropped]
+
+
+def merge_models(base: List[Dict[str, Any]], ours: List[Dict[str, Any]], theirs: List[Dict[str, Any]],
+                 resolutions: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Three-way merge of editor message lists (DBCEditor.get_data()['messages']).
+
+    Returns a dict with:
+        messages: the merged message list (ours' order, then messages only theirs added)
+        conflicts: list of {'id', 'kind', 'description', 'base', 'ours', 'theirs',
+            'resolution', 'message', 'signal', 'field'}; 'frame_id' conflicts
+            with resolution None leave messages sharing a frame id
+        stats: counts of messages unchanged, taken from ours, taken from theirs and merged
+    The inputs are not modified.
+    """
+    state = _MergeState(resolutions)
+    frame_id_key = lambda m: m.get('frame_id')
+    ours_map, ours_added = _pair_with_base(base, ours, frame_id_key)
+    theirs_map, theirs_added = _pair_with_base(base, theirs, frame_id_key)
+
+    # id(ours message) -> (merged message, origin); messages only theirs kept are appended
+    merged_for_ours = {}
+    extra = []
+    # id(merged message) -> {'base' / OURS / THEIRS: the message it was merged from on that side}
+    sides = {}
+    for base_msg in base:
+        ours_msg, theirs_msg = ours_map[id(base_msg)], theirs_map[id(base_msg)]
+        versions = {'base': base_msg, OURS: ours_msg, THEIRS: theirs_msg}
+        base_hash = MessageHashes(base_msg).digest
+        ours_hash = MessageHashes(ours_msg).digest if ours_msg is not None else None
+        theirs_hash = MessageHashes(theirs_msg).digest if theirs_msg is not None else None
+
+        if ours_msg is None or theirs_msg is None:
+            remaining, remaining_hash = (ours_msg, ours_hash) if ours_msg is not None else (theirs_msg, theirs_hash)
+            if remaining is None or remaining_hash == base_hash:
+                continue  # deleted on one side, untouched (or deleted) on the other
+            choice = state.conflict(f"message:{base_msg['name']}", 'message',
+                                    f"{base_msg['name']} deleted on one side and modified on the other",
+                                    base_msg['name'], ours_msg and ours_msg['name'], theirs_msg and theirs_msg['name'],
+                                    message=base_msg['name'])
+            chosen = theirs_msg if choice == THEIRS else ours_msg
+            if chosen is ours_msg and chosen is not None:
+                merged_for_ours[id(ours_msg)] = (_copy_message(ours_msg), OURS)
+                sides[id(merged_for_ours[id(ours_msg)][0])] = versions
+            elif chosen is not None:
+                extra.append((_copy_message(theirs_msg), THEIRS))
+                sides[id(extra[-1][0])] = versions
+            continue
+
+        if ours_hash == theirs_hash:
+            origin = 'base' if ours_hash == base_hash else 'both'
+            merged_for_ours[id(ours_msg)] = (_copy_message(ours_msg), origin)
+            state.stats['unchanged' if origin == 'base' else 'from_ours'] += 1
+        elif theirs_hash == base_hash:
+            merged_for_ours[id(ours_msg)] = (_copy_message(ours_msg), OURS)
+            state.stats['from_ours'] += 1
+        elif ours_hash == base_hash:
+            merged_for_ours[id(ours_msg)] = (_copy_message(theirs_msg), THEIRS)
+            state.stats['from_theirs'] += 1
+        else:
+            merged_for_ours[id(ours_msg)] = (_merge_message(base_msg, ours_msg, theirs_msg, state), 'both')
+            state.stats['merged'] += 1
+        sides[id(merged_for_ours[id(ours_msg)][0])] = versions
+
+    added = _merge_added(ours_added, theirs_added, state, 'message', "message:")
+    added_ours = {id(item) for item, side in added if side == OURS}
+
+    merged = []
+    for msg in ours:
+        if id(msg) in merged_for_ours:
+            merged.append(merged_for_ours[id(msg)])
+        elif id(msg) in added_ours:
+            merged.append((_copy_message(msg), OURS))
+            sides[id(merged[-1][0])] = {OURS: msg}
+            state.stats['from_ours'] += 1
+    merged.extend(extra)
+    for item, side in added:
+        if side == THEIRS:
+            merged.append((_copy_message(item), THEIRS))
+            sides[id(merged[-1][0])] = {THEIRS: item}
+            state.stats['from_theirs'] += 1
+
+    messages = _check_frame_ids(merged, sides, state)
+    return {'messages': messages, 'conflicts': state.conflicts, 'stats': state.stats}
+
+
+def merge_dbc_files(base_path: str, ours_path: str, theirs_path: str,
+                    resolutions: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Load three DBC files through DBCEditor and merge them with merge_models()."""
+    models = []
+    for path in (base_path, ours_path, theirs_path):
+        editor = DBCEditor()
+        editor.load_dbc_file(path)
+        models.append(editor.get_data()['messages'])
+    return merge_models(*models, resolutions=resolutions)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Three-way merge dialog for DBC Utility: merges "theirs" into "ours" relative to
+a common base and lists the conflicts for resolution.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from PyQt5 import QtCore, QtWidgets
+
+from dbc_editor import DBCEditor, DBCEditorError
+from dbc_merge import merge_models, OURS, THEIRS, KEEP_OURS, KEEP_THEIRS, NEW_ID
+from dbc_diff_ui import CURRENT_DATA_LABEL
+
+
+# Choices offered per conflict kind (frame id collisions can also drop or move messages)
+_CHOICES = [("Ours", OURS), ("Theirs", THEIRS)]
+_FRAME_ID_CHOICES = [("Ours' frame IDs", OURS), ("Theirs' frame IDs", THEIRS),
+                     ("Keep ours' messages", KEEP_OURS), ("Keep theirs' messages", KEEP_THEIRS),
+                     ("New frame ID", NEW_ID)]
+
+
+def _short(value: Any, limit: int = 60) -> str:
+    if value is None:
+        return "(none)"
+    if isinstance(value, dict) and 'name' in value:
+        return value['name']
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class DBCMergeDialog(QtWidgets.QDialog):
+    """
+    Base/ours/theirs pickers, the conflict list with an ours/theirs choice per
+    conflict. Every choice merges again, so the list always shows the result
+    of the current choices; "Apply to Editor" stays disabled while messages
+    still share a frame ID.
+    """
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None,
+                 current_messages: Optional[List[Dict[str, Any]]] = None,
+                 current_path: Optional[str] = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Merge DBC Files")
+        self.resize(820, 560)
+        self.current_messages = current_messages
+        self._models = None
+        self._choices: Dict[str, str] = {}
+        self.result: Optional[Dict[str, Any]] = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        form = QtWidgets.QFormLayout()
+        self.base_edit = self._file_row(form, "Base (common ancestor):", "")
+        self.ours_edit = self._file_row(form, "Ours:", CURRENT_DATA_LABEL if current_messages is not None
+                                        else (current_path or ""))
+        self.theirs_edit = self._file_row(form, "Theirs:", "")
+        layout.addLayout(form)
+
+        merge_row = QtWidgets.QHBoxLayout()
+        self.merge_button = QtWidgets.QPushButton("Merge")
+        self.merge_button.clicked.connect(self.merge)
+        merge_row.addWidget(self.merge_button)
+        merge_row.addStretch()
+        layout.addLayout(merge_row)
+
+        self.summary_label = QtWidgets.QLabel("Select the base, ours and theirs files and press Merge.")
+        layout.addWidget(self.summary_label)
+
+        self.conflict_table = QtWidgets.QTableWidget(0, 5)
+        self.conflict_table.setHorizontalHeaderLabels(["Conflict", "Base", "Ours", "Theirs", "Use"])
+        self.conflict_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.conflict_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.conflict_table)
+
+        self.button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Cancel)
+        self.apply_button = self.button_box.addButton("Apply to Editor", QtWidgets.QDialogButtonBox.AcceptRole)
+        self.apply_button.setEnabled(False)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
+
+    def _file_row(self, form: QtWidgets.QFormLayout, label: str, text: str) -> QtWidgets.QLineEdit:
+        edit = QtWidgets.QLineEdit(text)
+        browse = QtWidgets.QPushButton("Browse...")
+        browse.clicked.connect(lambda: self._browse(edit))
+        row = QtWidgets.QHBoxLayout()
+        row.addWidget(edit)
+        row.addWidget(browse)
+        form.addRow(label, row)
+        return edit
+
+    def _browse(self, edit: QtWidgets.QLineEdit) -> None:
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Select DBC File", "", "DBC Files (*.dbc);;All Files (*)"
+        )
+        if file_path:
+            edit.setText(file_path)
+
+    def _load_messages(self, source: str) -> List[Dict[str, Any]]:
+        if source == CURRENT_DATA_LABEL and self.current_messages is not None:
+            return self.current_messages
+        editor = DBCEditor()
+        editor.load_dbc_file(source)
+        return editor.get_data()['messages']
+
+    def merge(self) -> None:
+        sources = [e.text().strip() for e in (self.base_edit, self.ours_edit, self.theirs_edit)]
+        if not all(sources):
+            QtWidgets.QMessageBox.warning(self, "Merge", "Please select all three files.")
+            return
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            self._models = [self._load_messages(source) for source in sources]
+            self._choices = {}
+            self._merge_with_choices()
+        except DBCEditorError as e:
+            QtWidgets.QMessageBox.critical(self, "Merge", str(e))
+            return
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+    def _merge_with_choices(self) -> None:
+        """Merge with the current choices; conflicts that show up get "ours" until one is picked."""
+        while True:
+            self.result = merge_models(*self._models, resolutions=dict(self._choices))
+            new = [c['id'] for c in self.result['conflicts'] if c['id'] not in self._choices]
+            if not new:
+                break
+            self._choices.update((conflict_id, OURS) for conflict_id in new)
+        self.show_conflicts()
+
+    def _choose(self, conflict_id: str, choice: str) -> None:
+        self._choices[conflict_id] = choice
+        # The table is rebuilt, combo box sending the signal included, so merge once the signal returns
+        QtCore.QTimer.singleShot(0, self._merge_with_choices)
+
+    def open_collisions(self) -> List[Dict[str, Any]]:
+        """Frame ID conflicts the current choices do not resolve."""
+        conflicts = self.result['conflicts'] if self.result else []
+        return [c for c in conflicts if c['kind'] == 'frame_id' and c['resolution'] is None]
+
+    def show_conflicts(self) -> None:
+        stats = self.result['stats']
+        conflicts = self.result['conflicts']
+        open_collisions = self.open_collisions()
+        summary = (f"Unchanged: {stats['unchanged']}, from ours: {stats['from_ours']}, "
+                   f"from theirs: {stats['from_theirs']}, merged: {stats['merged']}, conflicts: {len(conflicts)}")
+        if open_collisions:
+            summary += (f"\n{len(open_collisions)} frame ID collision(s) left: keep one side's messages "
+                        f"or move them to a new frame ID to apply the merge")
+        self.summary_label.setText(summary)
+        self.conflict_table.setUpdatesEnabled(False)
+        self.conflict_table.setRowCount(len(conflicts))
+        for row, conflict in enumerate(conflicts):
+            label = conflict['description']
+            if conflict['message'] and conflict['kind'] != 'message':
+                target = conflict['message'] + (f".{conflict['signal']}" if conflict['signal'] else "")
+                label = f"{target}: {label}"
+            item = QtWidgets.QTableWidgetItem(label)
+            item.setData(QtCore.Qt.UserRole, conflict['id'])
+            item.setToolTip(conflict['id'])
+            self.conflict_table.setItem(row, 0, item)
+            for col, key in ((1, 'base'), (2, 'ours'), (3, 'theirs')):
+                self.conflict_table.setItem(row, col, QtWidgets.QTableWidgetItem(_short(conflict[key])))
+            choice = QtWidgets.QComboBox()
+            for text, value in _FRAME_ID_CHOICES if conflict['kind'] == 'frame_id' else _CHOICES:
+                choice.addItem(text, value)
+            choice.setCurrentIndex(max(0, choice.findData(self._choices.get(conflict['id'], OURS))))
+            choice.currentIndexChanged.connect(
+                lambda _, conflict_id=conflict['id'], combo=choice: self._choose(conflict_id, combo.currentData()))
+            self.conflict_table.setCellWidget(row, 4, choice)
+        self.conflict_table.setUpdatesEnabled(True)
+        self.apply_button.setEnabled(not open_collisions)
+
+    def resolutions(self) -> Dict[str, str]:
+        conflicts = self.result['conflicts'] if self.result else []
+        return {c['id']: self._choices.get(c['id'], OURS) for c in conflicts}
+
+    def merged_messages(self) -> List[Dict[str, Any]]:
+        """The merged message list for the chosen resolutions."""
+        return self.result['messages']
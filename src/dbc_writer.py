@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Text-preserving DBC writer.
+
+Instead of rebuilding a cantools Database and serializing every message on each
+save, the original file is split once into text spans:
+
+    head        everything before the first BO_ line (VERSION, NS_, BS_, BU_, ...)
+    blocks      one span per message: the BO_ line, its SG_ lines and the text after them
+    statements  the ';'-terminated statements after the messages (CM_, BA_, VAL_, ...)
+
+Rendering the editor model against this index reuses the spans of unchanged
+messages, signals and statements as-is and only formats the BO_/SG_/CM_ text of
+what actually changed. Everything the editor model does not carry (attributes,
+value tables, signal groups, multiplexing, formatting) is kept from the original.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Extended frames have bit 31 set in the frame ids written in DBC files
+EXTENDED_FRAME_FLAG = 0x80000000
+UNSPECIFIED_NODE = 'Vector__XXX'
+
+# Model fields written on the BO_ line and on an SG_ line
+MESSAGE_HEADER_FIELDS = ('name', 'frame_id', 'length', 'senders')
+SIGNAL_LINE_FIELDS = ('name', 'start_bit', 'length', 'byte_order', 'is_signed', 'scale',
+                      'offset', 'minimum', 'maximum', 'unit', 'receivers', 'multiplexer_ids',
+                      'is_multiplexer')
+
+_BO_RE = re.compile(r'BO_\s+(\d+)\s+(\w+)\s*:')
+_SG_RE = re.compile(r'\s*SG_\s+(\w+)\s*((?:m\d+)?M?)\s*:')
+_BU_RE = re.compile(r'BU_\s*:(.*?)(\r?\n)?$', re.S)
+_STATEMENT_END_RE = re.compile(r'"(?:[^"\\]|\\.)*"|;', re.S)
+
+# Statements referring to a message ('message') or to one of its signals ('signal')
+_STATEMENT_PATTERNS = [
+    ('CM_BO', 'message', re.compile(r'\s*CM_\s+BO_\s+(\d+)')),
+    ('CM_SG', 'signal', re.compile(r'\s*CM_\s+SG_\s+(\d+)\s+(\w+)')),
+    ('BA_BO', 'message', re.compile(r'\s*BA_\s+"[^"]*"\s+BO_\s+(\d+)')),
+    ('BA_SG', 'signal', re.compile(r'\s*BA_\s+"[^"]*"\s+SG_\s+(\d+)\s+(\w+)')),
+    ('VAL', 'signal', re.compile(r'\s*VAL_\s+(\d+)\s+(\w+)')),
+    ('SG_MUL_VAL', 'signal', re.compile(r'\s*SG_MUL_VAL_\s+(\d+)\s+(\w+)')),
+    ('SIG_VALTYPE', 'signal', re.compile(r'\s*SIG_VALTYPE_\s+(\d+)\s+(\w+)')),
+    ('BO_TX_BU', 'message', re.compile(r'\s*BO_TX_BU_\s+(\d+)')),
+    ('SIG_GROUP', 'message', re.compile(r'\s*SIG_GROUP_\s+(\d+)')),
+]
+
+
+class _MessageBlock:
+    """Text span of one BO_ block."""
+    __slots__ = ('name', 'raw_id', 'header', 'signals', 'trailer')
+
+    def __init__(self, name: str, raw_id: int, header: str):
+        self.name = name
+        self.raw_id = raw_id
+        self.header = header
+        self.signals: List[Tuple[str, str, str]] = []  # (name, mux token, line)
+        self.trailer = ''
+
+    def iter_chunks(self) -> Iterator[str]:
+        yield self.header
+        for _, _, line in self.signals:
+            yield line
+        yield self.trailer
+
+
+class _Statement:
+    """Text span of one ';'-terminated statement, with the message/signal it refers to."""
+    __slots__ = ('text', 'kind', 'scope', 'raw_id', 'signal', 'id_span', 'signal_span')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.kind = None
+        self.scope = None
+        self.raw_id = None
+        self.signal = None
+        self.id_span = None
+        self.signal_span = None
+        for kind, scope, pattern in _STATEMENT_PATTERNS:
+            match = pattern.match(text)
+            if match:
+                self.kind, self.scope = kind, scope
+                self.raw_id = int(match.group(1))
+                self.id_span = match.span(1)
+                if scope == 'signal':
+                    self.signal = match.group(2)
+                    self.signal_span = match.span(2)
+                break
+
+    def with_references(self, raw_id: int, signal: Optional[str]) -> '_Statement':
+        """Return a copy of the statement pointing at another frame id/signal name."""
+        text = self.text
+        if signal is not None and self.signal_span and signal != self.signal:
+            text = text[:self.signal_span[0]] + signal + text[self.signal_span[1]:]
+        if raw_id != self.raw_id:
+            text = text[:self.id_span[0]] + str(raw_id) + text[self.id_span[1]:]
+        return _Statement(text)
+
+    def with_group_members(self, renames: Dict[str, Optional[str]]) -> '_Statement':
+        """Return a copy of a SIG_GROUP_ statement with renamed/deleted member signals."""
+        colon = self.text.rfind(':')
+        members = self.text[colon + 1:].rstrip(';').split()
+        members = [renames.get(name, name) for name in members]
+        text = self.text[:colon + 1] + ' ' + ' '.join(m for m in members if m) + ';'
+        return _Statement(text)
+
+
+def _format_number(value: Any) -> str:
+    if value is None:
+        return '0'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _mux_token(sig: Dict[str, Any], previous: str = '') -> str:
+    """
+    Multiplexing token of an SG_ line: "m<id>" for a multiplexed signal, "M"
+    for the multiplexer (both for a nested multiplexer). Signals without
+    'is_multiplexer' keep the "M" of their previous line.
+    """
+    ids = sig.get('multiplexer_ids')
+    is_multiplexer = sig.get('is_multiplexer', previous.endswith('M'))
+    return (f"m{ids[0]}" if ids else '') + ('M' if is_multiplexer else '')
+
+
+def _fields_equal(a: Dict[str, Any], b: Dict[str, Any], fields) -> bool:
+    return all(a.get(f) == b.get(f) for f in fields)
+
+
+class DBCTextIndex:
+    """
+    Span index over the text of a DBC file, see the module docstring.
+    Build it once from the file text with DBCTextIndex(text); render() then
+    produces the index of the text for an edited model, and iter_chunks()
+    streams that text.
+    """
+
+    def __init__(self, text: Optional[str] = None):
+        self.newline = '\n'
+        self.head: List[str] = []
+        self.bu_line: Optional[int] = None
+        self.blocks: List[_MessageBlock] = []
+        self.statements: List[_Statement] = []
+        self.tail_rest = ''
+        if text is not None:
+            self._parse(text)
+
+    def _parse(self, text: str) -> None:
+        if '\r\n' in text[:4096]:
+            self.newline = '\r\n'
+        lines = text.splitlines(keepends=True)
+        bo_lines = [i for i, line in enumerate(lines) if _BO_RE.match(line)]
+
+        if bo_lines:
+            first_bo, last_bo = bo_lines[0], bo_lines[-1]
+        else:
+            # No messages yet: they go after the BU_ line and the blank lines following it
+            first_bo = len(lines)
+            for i, line in enumerate(lines):
+                if line.startswith('BU_'):
+                    first_bo = i + 1
+                    if first_bo < len(lines) and not lines[first_bo].strip():
+                        first_bo += 1
+                    break
+            last_bo = None
+
+        self.head = lines[:first_bo]
+        for i, line in enumerate(self.head):
+            if line.startswith('BU_'):
+                self.bu_line = i
+                break
+
+        end = first_bo
+        if last_bo is not None:
+            # The last block ends after its SG_ lines and the blank lines following them
+            end = last_bo + 1
+            while end < len(lines) and (_SG_RE.match(lines[end]) or not lines[end].strip()):
+                end += 1
+            block = None
+            for line in lines[first_bo:end]:
+                match = _BO_RE.match(line)
+                if match:
+                    block = _MessageBlock(match.group(2), int(match.group(1)), line)
+                    self.blocks.append(block)
+                    continue
+                match = _SG_RE.match(line)
+                if match and not block.trailer:
+                    block.signals.append((match.group(1), match.group(2), line))
+                else:
+                    block.trailer += line
+
+        tail = ''.join(lines[end:])
+        pos = 0
+        for match in _STATEMENT_END_RE.finditer(tail):
+            if match.group(0) == ';':
+                self.statements.append(_Statement(tail[pos:match.end()]))
+                pos = match.end()
+        self.tail_rest = tail[pos:]
+
+    def iter_chunks(self, progress: Optional[Callable[[int, int], None]] = None) -> Iterator[str]:
+        """
+        Yield the file text piece by piece. progress(done, total), if given, is
+        called about every 1% of the message blocks.
+        """
+        yield from self.head
+        total = len(self.blocks)
+        step = max(1, total // 100)
+        for done, block in enumerate(self.blocks, 1):
+            yield from block.iter_chunks()
+            if progress is not None and (done % step == 0 or done == total):
+                progress(done, total)
+        for statement in self.statements:
+            yield statement.text
+        yield self.tail_rest
+
+    def message_count(self) -> int:
+        return len(self.blocks)
+
+    # ------------------------------------------------------------------
+    # Rendering an edited model
+    # ------------------------------------------------------------------
+
+
+    def render(self, original_messages: List[Dict[str, Any]],
+               messages: List[Dict[str, Any]],
+               unchanged: Optional[Dict[int, bool]] = None,
+               origins: Optional[List[Optional[str]]] = None) -> 'DBCTextIndex':
+        """
+        Return the index of the text for `messages`.
+
+        original_messages is the model this index was built from. unchanged
+        optionally maps id(message) to True for messages known to equal their
+        original, which skips comparing them field by field. origins
+        optionally gives, per message, the name of the original message it was
+        edited from (None for new messages), so a message renamed and re-IDed
+        at once keeps its attributes, value tables and comments.
+        """
+        nl = self.newline
+        blocks_by_name = {b.name: b for b in self.blocks}
+        originals = {m['name']: m for m in original_messages if m['name'] in blocks_by_name}
+        matches = self._match_messages(originals, messages, origins)
+
+        result = DBCTextIndex()
+        result.newline = nl
+        result.head = list(self.head)
+        result.bu_line = self.bu_line
+        result.tail_rest = self.tail_rest
+
+        # old raw id -> (new raw id, {old signal name: new name or None} or None if unchanged,
+        #                message, original message)
+        references = {}
+        new_comments: List[str] = []
+        for msg, original in zip(messages, matches):
+            if original is None:
+                raw_id = self._raw_frame_id(msg)
+                result.blocks.append(self._format_block(msg, raw_id))
+                new_comments.extend(self._format_comments(msg, raw_id))
+                continue
+            block = blocks_by_name[original['name']]
+            if (unchanged and unchanged.get(id(msg))) or msg == original:
+                result.blocks.append(block)
+                references[block.raw_id] = (block.raw_id, None, msg, original)
+                continue
+
+            if _fields_equal(msg, original, MESSAGE_HEADER_FIELDS):
+                raw_id, header = block.raw_id, block.header
+            else:
+                raw_id = block.raw_id if msg.get('frame_id') == original.get('frame_id') \
+                    else self._raw_frame_id(msg, block.raw_id)
+                header = self._format_header(msg, raw_id)
+            new_block = _MessageBlock(msg['name'], raw_id, header)
+            renames = self._render_signals(msg, original, block, new_block)
+            new_block.trailer = block.trailer or nl
+            result.blocks.append(new_block)
+            references[block.raw_id] = (raw_id, renames, msg, original)
+
+        matched = {original['name'] for original in matches if original is not None}
+        deleted_ids = {blocks_by_name[name].raw_id for name in originals if name not in matched}
+        # Blocks the model does not know about (e.g. VECTOR__INDEPENDENT_SIG_MSG) are kept
+        result.blocks.extend(b for b in self.blocks if b.name not in originals)
+
+        # Carry the statements over, following renamed signals and changed frame ids.
+        # Comments the model changed are dropped here and re-emitted below.
+        kept_comments = set()
+        last_comment = None
+        for statement in self.statements:
+            if statement.raw_id in deleted_ids:
+                continue
+            ref = references.get(statement.raw_id)
+            if ref is None or ref[1] is None:
+                result.statements.append(statement)
+            else:
+                raw_id, renames, msg, original = ref
+                signal_name = None
+                if statement.scope == 'signal':
+                    signal_name = renames.get(statement.signal, statement.signal)
+                    if signal_name is None:
+                        continue  # the signal was deleted
+                if statement.kind == 'CM_BO':
+                    if msg.get('comments', '') != original.get('comments', ''):
+                        continue
+                    kept_comments.add((statement.raw_id, None))
+                elif statement.kind == 'CM_SG':
+                    old_sig = _find_signal(original, statement.signal)
+                    new_sig = _find_signal(msg, signal_name)
+                    if old_sig is not None:
+                        if new_sig is None or new_sig.get('comments', '') != old_sig.get('comments', ''):
+                            continue
+                        kept_comments.add((statement.raw_id, statement.signal))
+                if statement.kind == 'SIG_GROUP' and renames:
+                    statement = statement.with_group_members(renames)
+                if raw_id != statement.raw_id or signal_name != statement.signal:
+                    statement = statement.with_references(raw_id, signal_name)
+                result.statements.append(statement)
+            if statement.kind in ('CM_BO', 'CM_SG'):
+                last_comment = len(result.statements)
+
+        for old_raw_id, (raw_id, renames, msg, original) in references.items():
+            if renames is None:
+                continue
+            if msg.get('comments') and (old_raw_id, None) not in kept_comments:
+                new_comments.append(self._format_comment(raw_id, None, msg['comments']))
+            old_names = {new: old for old, new in renames.items() if new is not None}
+            for sig in msg.get('signals', []):
+                old_name = old_names.get(sig['name'], sig['name'])
+                if sig.get('comments') and (old_raw_id, old_name) not in kept_comments:
+                    new_comments.append(self._format_comment(raw_id, sig['name'], sig['comments']))
+
+        # New comments go after the last existing comment, or before the other statements
+        if new_comments:
+            if last_comment is None:
+                inserted = [new_comments[0]] + [nl + c for c in new_comments[1:]]
+                inserted[-1] += nl
+                last_comment = 0
+            else:
+                inserted = [nl + c for c in new_comments]
+            result.statements[last_comment:last_comment] = [_Statement(c) for c in inserted]
+
+        self._update_nodes(result, messages)
+        return result
+
+    @staticmethod
+    def _match_messages(originals: Dict[str, Dict[str, Any]], messages: List[Dict[str, Any]],
+                        origins: Optional[List[Optional[str]]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Match edited messages to original ones by origin, then by name, then
+        by frame id (renames).
+        """
+        matches: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        claimed = set()
+        for i, origin in enumerate(origins or []):
+            if origin in originals and origin not in claimed:
+                matches[i] = originals[origin]
+                claimed.add(origin)
+        for i, msg in enumerate(messages):
+            if matches[i] is not None:
+                continue
+            name = msg.get('name')
+            if name in originals and name not in claimed:
+                matches[i] = originals[name]
+                claimed.add(name)
+        by_frame_id = {}
+        for name, original in originals.items():
+            if name not in claimed:
+                by_frame_id.setdefault(original.get('frame_id'), original)
+        for i, msg in enumerate(messages):
+            if matches[i] is None:
+                matches[i] = by_frame_id.pop(msg.get('frame_id'), None)
+        return matches
+
+    def _render_signals(self, msg: Dict[str, Any], original: Dict[str, Any],
+                        block: _MessageBlock, new_block: _MessageBlock) -> Dict[str, Optional[str]]:
+        """
+        Fill new_block with the SG_ lines of msg, reusing the lines of unchanged
+        signals. Returns {old signal name: new name, or None if deleted} for the
+        signals that were renamed or deleted.
+        """
+        block_lines = {name: (mux, line) for name, mux, line in block.signals}
+        old_signals = original.get('signals', [])
+        old_by_name = {s['name']: s for s in old_signals}
+        new_names = {s['name'] for s in msg.get('signals', [])}
+        indent = ' '
+        if block.signals:
+            line = block.signals[0][2]
+            indent = line[:len(line) - len(line.lstrip())]
+
+        renames: Dict[str, Optional[str]] = {}
+        for i, sig in enumerate(msg.get('signals', [])):
+            old = old_by_name.get(sig['name'])
+            if old is None and i < len(old_signals) and old_signals[i]['name'] not in new_names \
+                    and old_signals[i]['name'] not in renames:
+                # A signal replaced in place under a new name is a rename
+                old = old_signals[i]
+                renames[old['name']] = sig['name']
+            mux, line = block_lines.get(old['name'], ('', None)) if old is not None else ('', None)
+            if line is None or not _fields_equal(sig, old, SIGNAL_LINE_FIELDS):
+                mux = _mux_token(sig, mux)
+                line = indent + self._format_signal(sig, mux) + self.newline
+            new_block.signals.append((sig['name'], mux, line))
+        for old in old_signals:
+            if old['name'] not in new_names and old['name'] not in renames:
+                renames[old['name']] = None
+        return renames
+
+    def _update_nodes(self, result: 'DBCTextIndex', messages: List[Dict[str, Any]]) -> None:
+        """Add senders/receivers missing from the BU_ line."""
+        if result.bu_line is None:
+            return
+        match = _BU_RE.match(result.head[result.bu_line])
+        if not match:
+            return
+        nodes = match.group(1).split()
+        known = set(nodes) | {UNSPECIFIED_NODE}
+        for msg in messages:
+            for node in list(msg.get('senders', [])) + [r for s in msg.get('signals', [])
+                                                        for r in s.get('receivers', [])]:
+                if node and node not in known:
+                    nodes.append(node)
+                    known.add(node)
+        if len(nodes) > len(match.group(1).split()):
+            result.head[result.bu_line] = 'BU_: ' + ' '.join(nodes) + (match.group(2) or '')
+
+    # ------------------------------------------------------------------
+    # Formatting of changed/new text
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _raw_frame_id(msg: Dict[str, Any], previous_raw_id: Optional[int] = None) -> int:
+        frame_id = int(msg.get('frame_id', 0))
+        extended = frame_id > 0x7FF or (previous_raw_id is not None and previous_raw_id & EXTENDED_FRAME_FLAG)
+        return frame_id | EXTENDED_FRAME_FLAG if extended else frame_id
+
+    def _format_header(self, msg: Dict[str, Any], raw_id: int) -> str:
+        senders = msg.get('senders') or [UNSPECIFIED_NODE]
+        return f"BO_ {raw_id} {msg['name']}: {msg.get('length', 8)} {senders[0]}{self.newline}"
+
+    @staticmethod
+    def _format_signal(sig: Dict[str, Any], mux: str = '') -> str:
+        byte_order = '0' if sig.get('byte_order') == 'big_endian' else '1'
+        sign = '-' if sig.get('is_signed') else '+'
+        receivers = ','.join(sig.get('receivers') or [UNSPECIFIED_NODE])
+        name = f"{sig['name']} {mux}" if mux else sig['name']
+        return (f"SG_ {name} : {sig.get('start_bit', 0)}|{sig.get('length', 1)}@{byte_order}{sign}"
+                f" ({_format_number(sig.get('scale', 1))},{_format_number(sig.get('offset', 0))})"
+                f" [{_format_number(sig.get('minimum'))}|{_format_number(sig.get('maximum'))}]"
+                f" \"{_escape(sig.get('unit') or '')}\" {receivers}")
+
+    def _format_block(self, msg: Dict[str, Any], raw_id: int) -> _MessageBlock:
+        block = _MessageBlock(msg['name'], raw_id, self._format_header(msg, raw_id))
+        for sig in msg.get('signals', []):
+            mux = _mux_token(sig)
+            block.signals.append((sig['name'], mux, ' ' + self._format_signal(sig, mux) + self.newline))
+        block.trailer = self.newline
+        return block
+
+    @staticmethod
+    def _format_comment(raw_id: int, signal: Optional[str], text: str) -> str:
+        if signal is None:
+            return f'CM_ BO_ {raw_id} "{_escape(text)}";'
+        return f'CM_ SG_ {raw_id} {signal} "{_escape(text)}";'
+
+    def _format_comments(self, msg: Dict[str, Any], raw_id: int) -> List[str]:
+        comments = []
+        if msg.get('comments'):
+            comments.append(self._format_comment(raw_id, None, msg['comments']))
+        for sig in msg.get('signals', []):
+            if sig.get('comments'):
+                comments.append(self._format_comment(raw_id, sig['name'], sig['comments']))
+        return comments
+
+
+def _find_signal(message: Dict[str, Any], name: Optional[str]) -> Optional[Dict[str, Any]]:
+    for sig in message.get('signals', []):
+        if sig['name'] == name:
+            return sig
+    return None
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of decoded CAN logs, so a log that was decoded once reopens
+without reading it again.
+
+Entries live in "<log>.decoded/<key>/" next to the log. The key combines a
+fingerprint of the log (size, modification time and a BLAKE2b digest of
+sampled blocks, see log_fingerprint) with a digest of the DBC model it was
+decoded with (see model_digest), so editing either one misses the cache.
+An entry holds:
+    manifest.json         format, key, log fingerprint, reader counters, the
+                          caller's summary and the columns per message
+    <frame id>/time.npy   float64 timestamps of the frames of a message
+    <frame id>/<n>.npy    float64 values of the n-th signal of the message
+Columns are standard .npy files and are opened with
+np.load(mmap_mode='r'), so only the pages actually used are read.
+
+A CacheWriter fills an entry while the log is decoded: values are buffered
+and appended to the column files in large blocks, and the .npy headers are
+written with a fixed size and rewritten with the final lengths on commit.
+The entry is built under "<key>.partial" and renamed when complete, so an
+interrupted decode never leaves an entry that looks valid.
+
+Values are stored as float64 like the decoder returns them, so an entry
+takes 8 bytes per frame plus 8 per decoded signal value; for logs with
+many signals per frame this is more than the log itself.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from can_decoder import DecodedBatch
+from dbc_hashing import MessageHashes, file_digest
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = '.decoded'
+MANIFEST_FILE = 'manifest.json'
+CACHE_FORMAT = 1
+# Entries kept per log (other DBC versions); the least recently used go first
+MAX_ENTRIES = 3
+
+# Log fingerprint: this many blocks of this size, spread over the file (first and last included)
+_SAMPLE_BLOCKS = 64
+_SAMPLE_SIZE = 64 * 1024
+# Buffered column data written out once it exceeds this
+_FLUSH_BYTES = 32 * 1024 * 1024
+# Every column starts with a .npy version 1.0 header of this size (a multiple of 64)
+_HEADER_SIZE = 128
+_NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+class DecodeCacheError(Exception):
+    pass
+
+
+def cache_directory(log_path: str) -> str:
+    return log_path + CACHE_SUFFIX
+
+
+def log_fingerprint(log_path: str) -> Dict[str, Any]:
+    """
+    Size, modification time and a digest of _SAMPLE_BLOCKS blocks spread over
+    the file. Reading a few MB instead of the whole log keeps reopening fast;
+    any rewrite of the file also changes its modification time.
+    """
+    stat = os.stat(log_path)
+    h = hashlib.blake2b(digest_size=16)
+    size = stat.st_size
+    with open(log_path, 'rb') as f:
+        if size <= _SAMPLE_BLOCKS * _SAMPLE_SIZE:
+            h.update(f.read())
+        else:
+            span = size - _SAMPLE_SIZE
+            for i in range(_SAMPLE_BLOCKS):
+                f.seek(span * i // (_SAMPLE_BLOCKS - 1))
+                h.update(f.read(_SAMPLE_SIZE))
+    return {'size': size, 'mtime_ns': stat.st_mtime_ns, 'digest': h.hexdigest()}
+
+
+def model_digest(messages: Iterable[Dict[str, Any]]) -> str:
+    """Digest of everything in the DBC model that affects decoding (signals and J1939 flags included)."""
+    return hashlib.blake2b(file_digest(MessageHashes(m) for m in messages), digest_size=16).hexdigest()
+
+
+def cache_key(fingerprint: Dict[str, Any], dbc_digest: str) -> str:
+    h = hashlib.blake2b(json.dumps(fingerprint, sort_keys=True).encode('utf-8'), digest_size=12)
+    h.update(dbc_digest.encode('ascii'))
+    return h.hexdigest()
+
+
+def _npy_header(length: int) -> bytes:
+    header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d,), }" % length
+    header = header.ljust(_HEADER_SIZE - len(_NPY_MAGIC) - 2 - 1) + '\n'
+    return _NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin-1')
+
+
+class _Column:
+    """One .npy file filled in appends; the header is rewritten with the final length on close."""
+    __slots__ = ('path', 'length', 'pending', 'pending_bytes')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.length = 0
+        self.pending: List[np.ndarray] = []
+        self.pending_bytes = 0
+        with open(path, 'wb') as f:
+            f.write(_npy_header(0))
+
+    def add(self, values: np.ndarray) -> int:
+        values = np.ascontiguousarray(values, dtype='<f8')
+        self.pending.append(values)
+        self.pending_bytes += values.nbytes
+        self.length += len(values)
+        return values.nbytes
+
+    def flush(self) -> None:
+        if self.pending:
+            with open(self.path, 'ab') as f:
+                for values in self.pending:
+                    f.write(values.tobytes())
+            self.pending, self.pending_bytes = [], 0
+
+    def close(self) -> None:
+        self.flush()
+        with open(self.path, 'r+b') as f:
+            f.write(_npy_header(self.length))
+
+
+class CachedLog:
+    """A complete cache entry; columns are memory-mapped on request."""
+
+    def __init__(self, directory: str, manifest: Dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        """What the caller passed to CacheWriter.commit()."""
+        return self.manifest.get('summary', {})
+
+    @property
+    def reader(self) -> Dict[str, Any]:
+        """Counters of the log reader (frame_count, skipped_lines, error_frames) and the decode time."""
+        return self.manifest.get('reader', {})
+
+    def _message(self, frame_id: int) -> Dict[str, Any]:
+        message = self.manifest['messages'].get(f"{frame_id:08X}")
+        if message is None:
+            raise DecodeCacheError(f"No cached frames of frame ID 0x{frame_id:X}")
+        return message
+
+    def signal_names(self, frame_id: int) -> List[str]:
+        return list(self._message(frame_id)['signals'])
+
+    def _load(self, frame_id: int, file_name: str) -> np.ndarray:
+        path = os.path.join(self.directory, f"{frame_id:08X}", file_name)
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            raise DecodeCacheError(f"Could not read cached column {path}: {e}")
+
+    def timestamps(self, frame_id: int) -> np.ndarray:
+        """Read-only memory map of the timestamps of the decoded frames of a message."""
+        self._message(frame_id)
+        return self._load(frame_id, 'time.npy')
+
+    def values(self, frame_id: int, signal: str) -> np.ndarray:
+        """Read-only memory map of a signal, aligned with timestamps(frame_id)."""
+        file_name = self._message(frame_id)['signals'].get(signal)
+        if file_name is None:
+            raise DecodeCacheError(f"Signal '{signal}' of frame ID 0x{frame_id:X} is not cached")
+        return self._load(frame_id, file_name)
+
+
+class CacheWriter:
+    """Builds the cache entry of one decode; call append() per batch, then commit() or abort()."""
+
+    def __init__(self, directory: str, key: str, fingerprint: Dict[str, Any], dbc_digest: str):
+        self.root = directory
+        self.key = key
+        self.fingerprint = fingerprint
+        self.dbc_digest = dbc_digest
+        self.directory = os.path.join(directory, key + '.partial')
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        self._messages: Dict[int, Tuple[_Column, Dict[str, _Column]]] = {}
+        self._pending_bytes = 0
+
+    def _columns(self, frame_id: int) -> Tuple[_Column, Dict[str, _Column]]:
+        columns = self._messages.get(frame_id)
+        if columns is None:
+            folder = os.path.join(self.directory, f"{frame_id:08X}")
+            os.makedirs(folder, exist_ok=True)
+            columns = self._messages[frame_id] = (_Column(os.path.join(folder, 'time.npy')), {})
+        return columns
+
+    def append(self, decoded: DecodedBatch) -> None:
+        for frame_id, (timestamps, values) in decoded.items():
+            times, signals = self._columns(frame_id)
+            self._pending_bytes += times.add(timestamps)
+            for name, column in values.items():
+                signal = signals.get(name)
+                if signal is None:
+                    # Signals only appear when a batch has frames of the message, so they start together
+                    signal = signals[name] = _Column(os.path.join(os.path.dirname(times.path), f"{len(signals)}.npy"))
+                    if times.length != len(column):
+                        raise DecodeCacheError(f"Signal '{name}' of frame ID 0x{frame_id:X} started late")
+                self._pending_bytes += signal.add(column)
+        if self._pending_bytes >= _FLUSH_BYTES:
+            self._flush()
+
+    def _flush(self) -> None:
+        for times, signals in self._messages.values():
+            times.flush()
+            for signal in signals.values():
+                signal.flush()
+        self._pending_bytes = 0
+
+    def commit(self, summary: Dict[str, Any], reader: Dict[str, Any]) -> CachedLog:
+        """Finish the columns, write the manifest and publish the entry."""
+        messages = {}
+        for frame_id, (times, signals) in self._messages.items():
+            times.close()
+            for signal in signals.values():
+                signal.close()
+            messages[f"{frame_id:08X}"] = {
+                'rows': times.length,
+                'signals': {name: os.path.basename(signal.path) for name, signal in signals.items()},
+            }
+        manifest = {
+            'format': CACHE_FORMAT,
+            'key': self.key,
+            'created': time.time(),
+            'log': self.fingerprint,
+            'dbc': self.dbc_digest,
+            'reader': reader,
+            'summary': summary,
+            'messages': messages,
+        }
+        with open(os.path.join(self.directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        final = os.path.join(self.root, self.key)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(self.directory, final)
+        _prune(self.root)
+        logger.info(f"Cached decoded log in {final}")
+        return CachedLog(final, manifest)
+
+    def abort(self) -> None:
+        self._messages.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _prune(root: str) -> None:
+    """
+    Keep the MAX_ENTRIES most recently used entries of a log. Leftovers of
+    interrupted decodes (".partial") count as entries, so they go too.
+    """
+    def last_used(path: str) -> float:
+        manifest = os.path.join(path, MANIFEST_FILE)
+        return os.path.getmtime(manifest if os.path.exists(manifest) else path)
+
+    try:
+        entries = [os.path.join(root, name) for name in os.listdir(root)]
+        entries = sorted((path for path in entries if os.path.isdir(path)), key=last_used, reverse=True)
+    except OSError:
+        return
+    for path in entries[MAX_ENTRIES:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def find_cached(log_path: str, dbc_digest: str,
+                fingerprint: Optional[Dict[str, Any]] = None) -> Optional[CachedLog]:
+    """The cache entry of log_path decoded with the DBC of dbc_digest, None if there is none."""
+    try:
+        fingerprint = fingerprint or log_fingerprint(log_path)
+    except OSError:
+        return None
+    directory = os.path.join(cache_directory(log_path), cache_key(fingerprint, dbc_digest))
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable decode cache {manifest_path}: {e}")
+        return None
+    if manifest.get('format') != CACHE_FORMAT or manifest.get('log') != fingerprint \
+            or manifest.get('dbc') != dbc_digest:
+        return None
+    # Mark the entry as recently used for pruning
+    try:
+        os.utime(manifest_path)
+    except OSError:
+        pass
+    return CachedLog(directory, manifest)
+
+
+def create_writer(log_path: str, dbc_digest: str,
+                  fingerprint: Optional[Dict[str, Any]] = None) -> Optional[CacheWriter]:
+    """Writer for a new cache entry of log_path; None (logged) if the cache directory is not writable."""
+    try:
+        fingerprint = fingerprint or log_fingerprint(log_path)
+        directory = cache_directory(log_path)
+        os.makedirs(directory, exist_ok=True)
+        return CacheWriter(directory, cache_key(fingerprint, dbc_digest), fingerprint, dbc_digest)
+    except OSError as e:
+        logger.warning(f"Decoded log will not be cached: {e}")
+        return None
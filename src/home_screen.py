@@ -221,9 +221,8 @@ class HomeScreenWidget(QtWidgets.QWidget):
         self.edit_button = QtWidgets.QPushButton("Edit DBC")
         self.edit_button.setToolTip("Open a DBC in the Editor (modify messages & signals).")
 
-        # CAN Bus Viewer is coming soon
         self.can_button = QtWidgets.QPushButton("CAN Bus Viewer")
-        self.can_button.setToolTip("Coming soon.")
+        self.can_button.setToolTip("Decode CAN logs (candump, Vector ASC/BLF) or a live bus with a DBC.")
 
         # Icons + native buttons
         self.view_button.setIcon(QtGui.QIcon(get_resource_path("icons/view.ico")))
@@ -242,29 +241,11 @@ class HomeScreenWidget(QtWidgets.QWidget):
             b.setMinimumHeight(40)
             b.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
             b.setIconSize(QtCore.QSize(18, 18))
-            if b is self.can_button:
-                can_container = QtWidgets.QWidget()
-                can_stack = QtWidgets.QStackedLayout(can_container)
-                can_stack.setContentsMargins(0, 0, 0, 0)
-                can_stack.addWidget(self.can_button)
-
-                overlay = QtWidgets.QWidget()
-                overlay.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, False)
-                overlay.setToolTip(self.can_button.toolTip())
-                can_stack.addWidget(overlay)
-                can_stack.setStackingMode(QtWidgets.QStackedLayout.StackAll)
-
-                self.can_button.setEnabled(False)
-                overlay.setCursor(QtGui.QCursor(QtCore.Qt.WhatsThisCursor))
-                overlay.mousePressEvent = lambda _e: None
-
-                buttons_row.addWidget(can_container, 1)
-            else:
-                buttons_row.addWidget(b, 1)
+            buttons_row.addWidget(b, 1)
 
         self.view_button.clicked.connect(self._request_view)
         self.edit_button.clicked.connect(self._request_edit)
-        # Note: CAN button is disabled in the Home screen
+        self.can_button.clicked.connect(self.openCanBusRequested.emit)
 
         card_layout.addLayout(buttons_row)
 
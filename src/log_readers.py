@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+CAN log formats known to DBC Utility, chosen by file extension. Every reader
+iterates over a log as FrameBatch chunks and reports its progress through
+`bytes_read` / `file_size`.
+"""
+
+from __future__ import annotations
+
+import os
+
+from can_frames import CHUNK_SIZE, LogFormatError, LogReader
+from candump_reader import CandumpReader
+from asc_reader import ASCReader
+from blf_reader import BLFReader
+
+LOG_READERS = {
+    '.log': CandumpReader,
+    '.asc': ASCReader,
+    '.blf': BLFReader,
+}
+
+LOG_FILE_FILTER = ("CAN Logs (*.log *.asc *.blf);;"
+                   "candump Logs (*.log);;"
+                   "Vector ASC Logs (*.asc);;"
+                   "Vector BLF Logs (*.blf);;"
+                   "All Files (*)")
+
+
+def open_log_reader(file_path: str, chunk_size: int = CHUNK_SIZE) -> LogReader:
+    """Reader for the log at file_path, by extension; raises LogFormatError for unknown formats."""
+    extension = os.path.splitext(file_path)[1].lower()
+    reader_class = LOG_READERS.get(extension)
+    if reader_class is None:
+        known = ", ".join(sorted(LOG_READERS))
+        raise LogFormatError(f"Unsupported log format '{extension or file_path}' (supported: {known})")
+    return reader_class(file_path, chunk_size)
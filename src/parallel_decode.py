@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Multi-process decoding of large text logs (candump, Vector ASC).
+
+Parsing and decoding a text log is CPU-bound NumPy work on independent
+lines, so the log is cut into byte ranges and each range is parsed and
+decoded in a worker process:
+
+- split_lines() cuts the file at the same line boundaries the reader uses
+  when it reads the file itself (the last newline before each multiple of
+  the chunk size), so every range is the batch the single-process path
+  would have produced.
+- Each worker compiles its own FrameDecoder from the DBC messages once, in
+  the pool initializer, and keeps it for all the ranges it gets.
+- A worker returns the frame statistics of its range (can_statistics) and
+  writes the decoded columns to a per-range column file in a temporary
+  directory, so the arrays do not go through the pool's pipe.
+- Results are taken in file order, which for a log is timestamp order, and
+  the statistics are merged with FrameStatistics.merge(), so the outcome
+  is the same as decoding the file front to back in one process.
+
+At most two ranges per worker are in flight, so memory stays bounded by the
+chunk size. Logs whose lines depend on the lines before them (ASC with
+relative timestamps, see TextLogReader.prepare) and small logs are not
+worth splitting; parallel_workers() tells when to use this module.
+
+Workers are started with the "spawn" method on every platform, as forking a
+process that runs Qt threads is not safe.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from can_decoder import DecodedBatch, FrameDecoder
+from can_frames import CHUNK_SIZE, LogReader, TextLogReader
+from can_statistics import FrameStatistics
+
+logger = logging.getLogger(__name__)
+
+# Logs smaller than this are decoded faster in one process than it takes to start the workers
+PARALLEL_MIN_SIZE = 4 * CHUNK_SIZE
+
+# Bytes searched backwards at a time for the line end before a chunk boundary
+_LINE_SEARCH = 64 * 1024
+
+# Compiled decoder of a worker process, set by _start_worker
+_decoder: Optional[FrameDecoder] = None
+
+
+class ChunkResult:
+    """
+    One decoded byte range: `frames` are its frame statistics (None when not
+    asked for), `decoded` its decoded signals, and the counters those of
+    the reader that parsed it.
+    """
+    __slots__ = ('start', 'end', 'frames', 'decoded', 'frame_count', 'skipped_lines', 'error_frames',
+                 'channels')
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.frames: Optional[FrameStatistics] = None
+        self.decoded: DecodedBatch = {}
+        self.frame_count = 0
+        self.skipped_lines = 0
+        self.error_frames = 0
+        self.channels: List[str] = []
+
+
+def parallel_workers(reader: LogReader) -> int:
+    """Worker processes worth using for reader's log, 0 to decode it in this process."""
+    workers = os.cpu_count() or 1
+    if workers < 2 or not isinstance(reader, TextLogReader) or reader.file_size < PARALLEL_MIN_SIZE \
+            or not reader.prepare():
+        return 0
+    return workers
+
+
+def split_lines(file_path: str, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Byte ranges of about chunk_size covering the file, each ending after the
+    last newline before a multiple of chunk_size (the last one at the end
+    of the file).
+    """
+    size = os.path.getsize(file_path)
+    ranges = []
+    start = 0
+    with open(file_path, 'rb') as f:
+        for boundary in range(chunk_size, size, chunk_size):
+            # Search back from the boundary, not past the start of the current range
+            end = boundary
+            while end > start:
+                low = max(start, end - _LINE_SEARCH)
+                f.seek(low)
+                cut = f.read(end - low).rfind(b'\n')
+                if cut >= 0:
+                    end = low + cut + 1
+                    break
+                end = low
+            if end > start:
+                ranges.append((start, end))
+                start = end
+    if start < size:
+        ranges.append((start, size))
+    return ranges
+
+
+def _start_worker(messages: List[Dict[str, Any]]) -> None:
+    global _decoder
+    _decoder = FrameDecoder(messages)
+
+
+def _decode_range(reader: TextLogReader, start: int, end: int, signals: Optional[List[str]],
+                  statistics: bool, column_file: str) -> Tuple[ChunkResult, List[Tuple[int, List[str]]]]:
+    """
+    Worker: parse and decode one range. The decoded columns are written to
+    column_file (timestamps, then the signals, per message, as consecutive
+    .npy arrays); returns the result without them and the file layout.
+    """
+    # The reader is a copy of the parent's, counters included
+    counters = reader.frame_count, reader.skipped_lines, getattr(reader, 'error_frames', 0)
+    batch = reader.parse_range(start, end)
+    result = ChunkResult(start, end)
+    if statistics:
+        result.frames = FrameStatistics()
+        result.frames.update(batch)
+    result.frame_count = reader.frame_count - counters[0]
+    result.skipped_lines = reader.skipped_lines - counters[1]
+    result.error_frames = getattr(reader, 'error_frames', 0) - counters[2]
+    result.channels = reader.channels
+    layout = []
+    with open(column_file, 'wb') as f:
+        for frame_id, (timestamps, values) in _decoder.decode_batch(batch, signals).items():
+            np.save(f, timestamps)
+            for column in values.values():
+                np.save(f, column)
+            layout.append((frame_id, list(values)))
+    return result, layout
+
+
+def _read_columns(column_file: str, layout: List[Tuple[int, List[str]]]) -> DecodedBatch:
+    decoded: DecodedBatch = {}
+    with open(column_file, 'rb') as f:
+        for frame_id, names in layout:
+            timestamps = np.load(f)
+            decoded[frame_id] = (timestamps, {name: np.load(f) for name in names})
+    os.remove(column_file)
+    return decoded
+
+
+def decode_parallel(reader: TextLogReader, messages: List[Dict[str, Any]], workers: int,
+                    signals: Optional[Iterable[str]] = None, statistics: bool = True) -> Iterator[ChunkResult]:
+    """
+    Decode reader's log with `workers` processes, yielding the ranges in
+    file order. The reader's counters and `bytes_read` are updated as the
+    results come in, as if it were read in this process. Closing the
+    iterator early cancels the ranges not started yet.
+    """
+    if not reader.prepare():
+        raise ValueError(f"{reader.file_path} must be read in one pass")
+    ranges = split_lines(reader.file_path, reader.chunk_size)
+    signals = list(signals) if signals is not None else None
+    directory = tempfile.mkdtemp(prefix='dbcutility-decode-')
+    pool = ProcessPoolExecutor(workers, multiprocessing.get_context('spawn'),
+                               initializer=_start_worker, initargs=(messages,))
+    try:
+        pending: Deque[Tuple[Future, str]] = deque()
+        queued = iter(enumerate(ranges))
+        while True:
+            for index, (start, end) in queued:
+                column_file = os.path.join(directory, f"{index}.npy")
+                pending.append((pool.submit(_decode_range, reader, start, end, signals, statistics,
+                                            column_file), column_file))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            future, column_file = pending.popleft()
+            result, layout = future.result()
+            result.decoded = _read_columns(column_file, layout)
+            reader.frame_count += result.frame_count
+            reader.skipped_lines += result.skipped_lines
+            if hasattr(reader, 'error_frames'):
+                reader.error_frames += result.error_frames
+            for name in result.channels:
+                if name not in reader.channels:
+                    reader.channels.append(name)
+            reader.bytes_read = result.end
+            yield result
+        logger.info(f"Read {reader.frame_count} frames from {reader.file_path} with {workers} processes "
+                    f"({reader.skipped_lines} lines skipped)")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Plot of one decoded signal over time, drawn with QPainter from a
+MinMaxPyramid (see signal_pyramid).
+
+Each repaint asks the pyramid for the visible time range at about two
+vertices per pixel column and draws them as a single polyline, so zooming
+and panning cost the same for a thousand samples as for tens of millions.
+
+The time axis counts seconds from the first sample (`origin`), so logs
+with absolute (POSIX) timestamps get readable labels.
+
+Mouse: wheel zooms the time axis around the cursor (Shift+wheel zooms the
+value axis), dragging pans, double-click shows the whole signal.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from signal_pyramid import MinMaxPyramid
+
+_ZOOM_STEP = 1.25
+_MARGIN_LEFT = 70
+_MARGIN_RIGHT = 12
+_MARGIN_TOP = 22
+_MARGIN_BOTTOM = 28
+# Samples are marked with a dot when at least this many pixels apart on average
+_SAMPLE_MARK_SPACING = 6
+_LINE_COLOR = QtGui.QColor("#2E86C1")
+_GRID_COLOR = QtGui.QColor("#E5E5E5")
+_AXIS_COLOR = QtGui.QColor("#555555")
+
+
+def nice_ticks(low: float, high: float, count: int) -> List[float]:
+    """About `count` round tick positions (1, 2 or 5 times a power of ten) between low and high."""
+    if not (math.isfinite(low) and math.isfinite(high)) or high <= low or count < 1:
+        return []
+    raw = (high - low) / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    first = math.ceil(low / step) * step
+    return [first + i * step for i in range(int((high - first) / step) + 1)]
+
+
+def _polygon(x: np.ndarray, y: np.ndarray) -> QtGui.QPolygonF:
+    """QPolygonF filled straight from the coordinate arrays (no QPointF per vertex)."""
+    polygon = QtGui.QPolygonF(len(x))
+    buffer = polygon.data()
+    buffer.setsize(len(x) * 2 * np.dtype(np.float64).itemsize)
+    points = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)
+    points[:, 0] = x
+    points[:, 1] = y
+    return polygon
+
+
+class SignalPlotWidget(QtWidgets.QWidget):
+    """Time plot of one signal; the view is the time range [t0, t1] and value range [v0, v1]."""
+    # Emitted after each repaint, when drawn_points / drawn_level describe the view
+    drawn = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pyramid: Optional[MinMaxPyramid] = None
+        self.unit = ""
+        self.origin = 0.0
+        self.t0 = self.t1 = 0.0
+        self.v0 = self.v1 = 0.0
+        self.auto_scale = True
+        self.drawn_points = 0
+        self.drawn_level = 0
+        self._drag: Optional[Tuple[QtCore.QPoint, float, float, float, float]] = None
+        self.setMinimumSize(400, 250)
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+
+    def set_series(self, pyramid: MinMaxPyramid, unit: str = "") -> None:
+        self.pyramid = pyramid
+        self.unit = unit
+        self.origin = pyramid.time_range[0]
+        self.reset_view()
+
+    def reset_view(self) -> None:
+        """Show the whole signal, values scaled to fit."""
+        if self.pyramid is None:
+            return
+        self.t0, self.t1 = self.pyramid.time_range
+        if self.t1 <= self.t0:
+            self.t0, self.t1 = self.t0 - 0.5, self.t0 + 0.5
+        self.auto_scale = True
+        self.update()
+
+    def plot_rect(self) -> QtCore.QRectF:
+        return QtCore.QRectF(_MARGIN_LEFT, _MARGIN_TOP, max(1, self.width() - _MARGIN_LEFT - _MARGIN_RIGHT),
+                             max(1, self.height() - _MARGIN_TOP - _MARGIN_BOTTOM))
+
+    def _time_at(self, x: float) -> float:
+        rect = self.plot_rect()
+        return self.t0 + (x - rect.left()) / rect.width() * (self.t1 - self.t0)
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtCore.Qt.white)
+        rect = self.plot_rect()
+        if self.pyramid is None or not len(self.pyramid):
+            painter.setPen(_AXIS_COLOR)
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "No samples")
+            return
+        x, y, self.drawn_level = self.pyramid.visible(self.t0, self.t1, 2 * int(rect.width()))
+        self.drawn_points = len(x)
+        if self.auto_scale:
+            self.v0, self.v1 = (float(y.min()), float(y.max())) if len(y) else (0.0, 1.0)
+            pad = (self.v1 - self.v0) * 0.05 or max(abs(self.v0) * 0.05, 0.5)
+            self.v0, self.v1 = self.v0 - pad, self.v1 + pad
+        self._draw_grid(painter, rect)
+        if len(x):
+            px = rect.left() + (x - self.t0) * (rect.width() / (self.t1 - self.t0))
+            py = rect.bottom() - (y - self.v0) * (rect.height() / (self.v1 - self.v0))
+            painter.setClipRect(rect)
+            painter.setPen(QtGui.QPen(_LINE_COLOR, 1))
+            polygon = _polygon(px, py)
+            painter.drawPolyline(polygon)
+            if self.drawn_level == 0 and len(x) * _SAMPLE_MARK_SPACING < rect.width():
+                # Few enough samples to mark each one
+                painter.setPen(QtGui.QPen(_LINE_COLOR, 4, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap))
+                painter.drawPoints(polygon)
+            painter.setClipping(False)
+        painter.setPen(_AXIS_COLOR)
+        painter.drawRect(rect)
+        painter.end()
+        self.drawn.emit()
+
+    def _draw_grid(self, painter: QtGui.QPainter, rect: QtCore.QRectF) -> None:
+        metrics = painter.fontMetrics()
+        t0, t1 = self.t0 - self.origin, self.t1 - self.origin
+        for t in nice_ticks(t0, t1, max(2, int(rect.width() / 90))):
+            px = rect.left() + (t - t0) / (t1 - t0) * rect.width()
+            painter.setPen(_GRID_COLOR)
+            painter.drawLine(QtCore.QPointF(px, rect.top()), QtCore.QPointF(px, rect.bottom()))
+            painter.setPen(_AXIS_COLOR)
+            label = f"{t:g}"
+            left = px - metrics.horizontalAdvance(label) / 2
+            if left + metrics.horizontalAdvance(label) <= self.width():
+                painter.drawText(QtCore.QPointF(left, rect.bottom() + metrics.height()), label)
+        for v in nice_ticks(self.v0, self.v1, max(2, int(rect.height() / 40))):
+            py = rect.bottom() - (v - self.v0) / (self.v1 - self.v0) * rect.height()
+            painter.setPen(_GRID_COLOR)
+            painter.drawLine(QtCore.QPointF(rect.left(), py), QtCore.QPointF(rect.right(), py))
+            painter.setPen(_AXIS_COLOR)
+            label = f"{v:g}"
+            painter.drawText(QtCore.QPointF(rect.left() - metrics.horizontalAdvance(label) - 6,
+                                            py + metrics.ascent() / 2), label)
+        painter.drawText(QtCore.QPointF(4, rect.bottom() + metrics.height()), "t (s)")
+        if self.unit:
+            painter.drawText(QtCore.QPointF(4, rect.top() - metrics.descent() - 4), self.unit)
+
+    def zoom_time(self, factor: float, center: float) -> None:
+        """Scale the time range by factor (below 1 zooms in) around the time `center`."""
+        span = (self.t1 - self.t0) * factor
+        if span <= 1e-9:
+            return
+        share = (center - self.t0) / (self.t1 - self.t0)
+        self.t0 = center - share * span
+        self.t1 = self.t0 + span
+        self.update()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if not steps or self.pyramid is None:
+            return
+        factor = _ZOOM_STEP ** -steps
+        if event.modifiers() & QtCore.Qt.ShiftModifier:
+            rect = self.plot_rect()
+            center = self.v0 + (rect.bottom() - event.pos().y()) / rect.height() * (self.v1 - self.v0)
+            self.auto_scale = False
+            self.v0 = center - (center - self.v0) * factor
+            self.v1 = center + (self.v1 - center) * factor
+            self.update()
+        else:
+            self.zoom_time(factor, self._time_at(event.pos().x()))
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton:
+            self._drag = (event.pos(), self.t0, self.t1, self.v0, self.v1)
+
+    def mouseMoveEvent(self, event):
+        if self._drag is None:
+            return
+        start, t0, t1, v0, v1 = self._drag
+        rect = self.plot_rect()
+        dt = (event.pos().x() - start.x()) / rect.width() * (t1 - t0)
+        self.t0, self.t1 = t0 - dt, t1 - dt
+        if not self.auto_scale:
+            dv = (event.pos().y() - start.y()) / rect.height() * (v1 - v0)
+            self.v0, self.v1 = v0 + dv, v1 + dv
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
+
+
+class SignalPlotDialog(QtWidgets.QDialog):
+    """Non-modal window with the plot of one signal and the size of what is drawn."""
+
+    def __init__(self, title: str, pyramid: MinMaxPyramid, unit: str = "", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(900, 450)
+        layout = QtWidgets.QVBoxLayout(self)
+        self.plot = SignalPlotWidget(self)
+        layout.addWidget(self.plot, 1)
+        self.info_label = QtWidgets.QLabel()
+        self.info_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.info_label)
+        self.plot.drawn.connect(self._update_info)
+        self.plot.set_series(pyramid, unit)
+
+    def _update_info(self):
+        plot = self.plot
+        self.info_label.setText(
+            f"{len(plot.pyramid):,} samples, {plot.t0 - plot.origin:.6g} to {plot.t1 - plot.origin:.6g} s, "
+            f"{plot.drawn_points:,} points drawn (level {plot.drawn_level}). "
+            "Wheel: zoom, Shift+wheel: zoom values, drag: pan, double-click: all")
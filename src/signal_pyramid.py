@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Min/max decimation pyramid of a decoded signal, for plotting millions of
+samples at interactive speed.
+
+Level 0 is the samples themselves (timestamps sorted). Level k groups the
+samples into buckets of FACTOR**k consecutive samples and keeps the
+smallest and largest value of each bucket; the time span of a bucket is
+read from the timestamps of its first and last sample. Every level is
+computed once from the level below with NumPy reductions, and all levels
+together take about 1 / (FACTOR - 1) of the memory of the samples.
+
+To draw a time range, visible() picks the finest level with at most
+`max_points` buckets in that range. Each bucket becomes a vertical stroke
+from its minimum to its maximum, so spikes stay visible at every zoom, and
+the cost depends on the plot width only, not on the length of the signal.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+# Samples per bucket of the first level and buckets per bucket of each level above it
+FACTOR = 4
+
+# Levels stop once they are this small
+_MIN_LEVEL_SIZE = 64
+
+
+class PyramidLevel:
+    """Min/max value of each bucket of `size` consecutive samples."""
+    __slots__ = ('size', 'minimum', 'maximum')
+
+    def __init__(self, size: int, minimum: np.ndarray, maximum: np.ndarray):
+        self.size = size
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __len__(self) -> int:
+        return len(self.minimum)
+
+    def coarser(self, factor: int) -> 'PyramidLevel':
+        """The next level: `factor` of these buckets per bucket."""
+        starts = np.arange(0, len(self), factor)
+        return PyramidLevel(self.size * factor, np.minimum.reduceat(self.minimum, starts),
+                            np.maximum.reduceat(self.maximum, starts))
+
+
+class MinMaxPyramid:
+    """
+    Decimation pyramid of one signal. NaN samples (frames where a
+    multiplexed signal is absent) are dropped; samples are sorted by time
+    if needed.
+    """
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, factor: int = FACTOR):
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        present = np.isfinite(values)
+        if not present.all():
+            timestamps, values = timestamps[present], values[present]
+        if len(timestamps) > 1 and (np.diff(timestamps) < 0).any():
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+        self.factor = factor
+        self.timestamps = timestamps
+        self.values = values
+        self.levels: List[PyramidLevel] = []
+        if len(values) > _MIN_LEVEL_SIZE:
+            level = PyramidLevel(1, values, values).coarser(factor)
+            self.levels.append(level)
+            while len(level) > _MIN_LEVEL_SIZE:
+                level = level.coarser(factor)
+                self.levels.append(level)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def time_range(self) -> Tuple[float, float]:
+        if not len(self):
+            return 0.0, 0.0
+        return float(self.timestamps[0]), float(self.timestamps[-1])
+
+    @property
+    def value_range(self) -> Tuple[float, float]:
+        if not len(self):
+            return 0.0, 0.0
+        top = self.levels[-1] if self.levels else None
+        if top is None:
+            return float(self.values.min()), float(self.values.max())
+        return float(top.minimum.min()), float(top.maximum.max())
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes + sum(
+            level.minimum.nbytes * 2 for level in self.levels)
+
+    def visible(self, t0: float, t1: float, max_points: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Polyline of the signal between t0 and t1 with at most about
+        max_points vertices (plus the samples just outside the range, so the
+        line runs to the edges). Returns (x times, y values, level), level 0
+        being the samples themselves.
+        """
+        max_points = max(2, int(max_points))
+        i0 = max(0, int(np.searchsorted(self.timestamps, t0, 'left')) - 1)
+        i1 = min(len(self), int(np.searchsorted(self.timestamps, t1, 'right')) + 1)
+        count = i1 - i0
+        if count <= max_points or not self.levels:
+            return self.timestamps[i0:i1], self.values[i0:i1], 0
+        # Two vertices (min and max) per bucket
+        wanted = math.log(2 * count / max_points, self.factor)
+        index = min(len(self.levels), max(1, math.ceil(wanted))) - 1
+        level = self.levels[index]
+        b0 = i0 // level.size
+        b1 = min(len(level), -(-i1 // level.size))
+        first = np.arange(b0, b1) * level.size
+        last = np.minimum(first + level.size, len(self)) - 1
+        low, high = level.minimum[b0:b1], level.maximum[b0:b1]
+        x = np.repeat((self.timestamps[first] + self.timestamps[last]) * 0.5, 2)
+        # Alternate max/min order so the strokes join into one envelope
+        y = np.empty(len(x))
+        flip = (np.arange(b0, b1) & 1).astype(bool)
+        y[0::2] = np.where(flip, high, low)
+        y[1::2] = np.where(flip, low, high)
+        return x, y, index + 1